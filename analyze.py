@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Offline analysis of eVAS recordings.
+
+Reads CSV recordings (with or without the config header, any delimiter and decimal point), binary
+recordings and compressed recordings, resamples the irregular values onto a uniform time grid and computes
+summary metrics per session and scale. The files are processed in parallel in a pool of processes.
+
+Usage:
+    python analyze.py [--rate 10] [--method hold|linear] [--jobs 4] [--resampled DIR] [--summary summary.csv] recordings ...
+
+Recordings can be given as files or directories, which are searched for '*_vas.csv' and '*_vas.bin' files.
+Resampling methods:
+    - hold: zero-order hold, each grid point takes the last value recorded at or before it (default)
+    - linear: linear interpolation between the recorded values
+Grid points before the first recorded value are empty.
+
+Requires numpy (pip install numpy), an optional dependency that is not part of requirements.txt,
+so the eVAS itself and its executable do not depend on it.
+"""
+
+import io
+import os
+import sys
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import numpy
+except ImportError:
+    sys.exit(
+        "The analysis of recordings requires the optional dependency numpy: pip install numpy"
+    )
+
+from export_csv import parse_csv_header, read_header, record_dtype
+from compression import COMPRESSED_EXTENSION, is_compressed, open_recording
+from recorder import BINARY_MAGIC
+
+# 'trapz' was renamed in numpy 2.0
+trapezoid = getattr(numpy, "trapezoid", None) or numpy.trapz
+
+RECORDING_PATTERNS = ["*_vas.csv", "*_vas.bin"]
+METHODS = ["hold", "linear"]
+# summary metrics of each scale, computed on the resampled values
+METRICS = ["mean", "std", "min", "max", "median", "auc", "time_of_max", "final"]
+
+
+def find_recordings(paths):
+    """Expands directories to the recordings they contain.
+
+    Args:
+        paths (list): Paths of recordings or directories.
+
+    Returns:
+        list: Paths of the recordings.
+    """
+    recordings = []
+    for path in paths:
+        if not os.path.isdir(path):
+            recordings.append(path)
+            continue
+        for pattern in RECORDING_PATTERNS:
+            for extension in ["", COMPRESSED_EXTENSION]:
+                recordings += glob.glob(os.path.join(path, pattern + extension))
+    return sorted(set(recordings))
+
+
+def read_csv(path):
+    """Reads a CSV recording.
+
+    Args:
+        path (str): Path of the recording, optionally compressed.
+
+    Returns:
+        tuple: The column names, the times in seconds and the values with one column per scale.
+    """
+    with open_recording(path, "r") as f:
+        text = f.read()
+    lines = text.splitlines(keepends=True)
+    index, columns, delimiter, decimal_point = parse_csv_header(lines)
+
+    data = "".join(lines[index + 1 :])
+    # a line cut off during a crash is ignored
+    if data and not data.endswith("\n"):
+        data = data[: data.rfind("\n") + 1]
+    # replace the delimiter first, so a decimal point equal to another delimiter is not confused with it
+    data = data.replace(delimiter, "\t")
+    if decimal_point != ".":
+        data = data.replace(decimal_point, ".")
+
+    records = numpy.loadtxt(
+        io.StringIO(data), delimiter="\t", ndmin=2, dtype=numpy.float64
+    )
+    if records.size == 0:
+        records = numpy.empty((0, len(columns) + 1))
+    return columns, records[:, 0], records[:, 1:]
+
+
+def read_binary(path):
+    """Reads a binary recording.
+
+    Args:
+        path (str): Path of the recording, optionally compressed.
+
+    Returns:
+        tuple: The column names, the times in seconds and the values with one column per scale.
+    """
+    header, offset = read_header(path)
+    columns = header.get("columns", ["values"])
+    dtype = numpy.dtype(record_dtype(header))
+
+    if is_compressed(path):
+        with open_recording(path) as f:
+            f.seek(offset)
+            data = f.read()
+        records = numpy.frombuffer(data, dtype=dtype, count=len(data) // dtype.itemsize)
+    else:
+        count = (os.path.getsize(path) - offset) // dtype.itemsize
+        if count:
+            records = numpy.memmap(
+                path, dtype=dtype, mode="r", offset=offset, shape=count
+            )
+        else:
+            records = numpy.empty(0, dtype=dtype)
+
+    names = dtype.names[1:]
+    values = numpy.column_stack([records[name] for name in names])
+    return columns, records["ns"] / 1e9, values.reshape(len(records), len(names))
+
+
+def read_recording(path):
+    """Reads a CSV, binary or compressed recording.
+
+    Args:
+        path (str): Path of the recording.
+
+    Returns:
+        tuple: The column names, the times in seconds and the values with one column per scale.
+    """
+    with open_recording(path) as f:
+        magic = f.read(len(BINARY_MAGIC))
+    if magic == BINARY_MAGIC:
+        return read_binary(path)
+    return read_csv(path)
+
+
+def resample(times, values, rate, method="hold", start=None, end=None):
+    """Resamples irregularly recorded values onto a uniform time grid.
+
+    Args:
+        times (numpy.ndarray): Times of the recorded values in seconds, not decreasing.
+        values (numpy.ndarray): Recorded values with one column per scale.
+        rate (float): Sampling rate of the grid in Hz.
+        method (str, optional): "hold" for zero-order hold or "linear" for linear interpolation. Defaults to "hold".
+        start (float, optional): Start of the grid in seconds. Defaults to the first recorded time.
+        end (float, optional): End of the grid in seconds. Defaults to the last recorded time.
+
+    Returns:
+        tuple: The times of the grid and the resampled values, NaN before the first recorded value.
+    """
+    if len(times) == 0:
+        return numpy.empty(0), numpy.empty((0, values.shape[1]))
+    start = times[0] if start is None else start
+    end = times[-1] if end is None else end
+    # round to avoid a missing last grid point due to floating point errors
+    grid = start + numpy.arange(int(round((end - start) * rate, 9)) + 1) / rate
+
+    if method == "linear":
+        resampled = numpy.column_stack(
+            [numpy.interp(grid, times, column, left=numpy.nan) for column in values.T]
+        )
+    else:
+        # the last value recorded at or before each grid point
+        index = numpy.searchsorted(times, grid, side="right") - 1
+        resampled = values[numpy.maximum(index, 0)].astype(numpy.float64)
+        resampled[index < 0] = numpy.nan
+    return grid, resampled.reshape(len(grid), values.shape[1])
+
+
+def summarize(grid, resampled):
+    """Computes the summary metrics of each scale.
+
+    Args:
+        grid (numpy.ndarray): Times of the grid in seconds.
+        resampled (numpy.ndarray): Resampled values with one column per scale.
+
+    Returns:
+        list: One dict of metrics per scale.
+    """
+    summaries = []
+    for column in resampled.T:
+        valid = ~numpy.isnan(column)
+        if not valid.any():
+            summaries.append({metric: numpy.nan for metric in METRICS})
+            continue
+        times, values = grid[valid], column[valid]
+        summaries.append(
+            {
+                "mean": values.mean(),
+                "std": values.std(),
+                "min": values.min(),
+                "max": values.max(),
+                "median": numpy.median(values),
+                # area under the curve in value * seconds
+                "auc": trapezoid(values, times) if len(values) > 1 else 0.0,
+                "time_of_max": times[values.argmax()],
+                "final": values[-1],
+            }
+        )
+    return summaries
+
+
+def format_table(header, rows, delimiter=";", decimal_point=",", decimal_places=4):
+    """Formats rows as CSV lines in the layout of the eVAS.
+
+    Args:
+        header (list): The column names.
+        rows (list): The rows, lists of strings and numbers.
+        delimiter (str, optional): Delimiter of the columns. Defaults to ";".
+        decimal_point (str, optional): Decimal point of the numbers. Defaults to ",".
+        decimal_places (int, optional): Number of digits after the decimal point. Defaults to 4.
+
+    Returns:
+        str: The CSV lines.
+    """
+
+    def cell(value):
+        if isinstance(value, str):
+            return value
+        if isinstance(value, int):
+            return str(value)
+        if numpy.isnan(value):
+            return ""
+        return f"{value:.{decimal_places}f}".replace(".", decimal_point)
+
+    lines = [delimiter.join(header)]
+    lines += [delimiter.join(cell(value) for value in row) for row in rows]
+    return "\n".join(lines) + "\n"
+
+
+def analyze(path, rate=10, method="hold", resampled_directory=None, csv_options=None):
+    """Resamples and summarizes a recording. Runs in a worker process.
+
+    Args:
+        path (str): Path of the recording.
+        rate (float, optional): Sampling rate of the grid in Hz. Defaults to 10.
+        method (str, optional): "hold" or "linear". Defaults to "hold".
+        resampled_directory (str, optional): Directory to save the resampled values to. Defaults to None.
+        csv_options (dict, optional): Options of 'format_table()' for the resampled values. Defaults to None.
+
+    Returns:
+        list: One row per scale with the session, the scale, the duration, the number of samples and the metrics.
+    """
+    columns, times, values = read_recording(path)
+    grid, resampled = resample(times, values, rate, method)
+
+    if resampled_directory is not None:
+        name = os.path.basename(path)
+        if name.endswith(COMPRESSED_EXTENSION):
+            name = name[: -len(COMPRESSED_EXTENSION)]
+        output_path = os.path.join(
+            resampled_directory, os.path.splitext(name)[0] + "_resampled.csv"
+        )
+        with open(output_path, "w") as f:
+            f.write(
+                format_table(
+                    ["secs"] + columns,
+                    numpy.column_stack([grid, resampled]).tolist(),
+                    **(csv_options or {}),
+                )
+            )
+
+    session = os.path.basename(path)
+    duration = times[-1] - times[0] if len(times) else 0.0
+    return [
+        [session, column, duration, len(times)]
+        + [summary[metric] for metric in METRICS]
+        for column, summary in zip(columns, summarize(grid, resampled))
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline analysis of eVAS recordings.")
+    parser.add_argument("recordings", nargs="+", help="Recordings or directories.")
+    parser.add_argument(
+        "--rate", type=float, default=10, help="Sampling rate of the grid in Hz."
+    )
+    parser.add_argument(
+        "--method", choices=METHODS, default="hold", help="Resampling method."
+    )
+    parser.add_argument(
+        "--jobs", type=int, default=None, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--resampled", help="Directory to save the resampled values of each recording."
+    )
+    parser.add_argument(
+        "--summary", help="Path of the summary CSV. Printed if not given."
+    )
+    parser.add_argument("--delimiter", default=";", help="Delimiter of the output.")
+    parser.add_argument(
+        "--decimal-point", default=",", help="Decimal point of the output."
+    )
+    parser.add_argument(
+        "--decimal-places", type=int, default=4, help="Decimal places of the output."
+    )
+    args = parser.parse_args()
+
+    recordings = find_recordings(args.recordings)
+    if not recordings:
+        print("No recordings found.")
+        return 1
+    if args.resampled is not None:
+        os.makedirs(args.resampled, exist_ok=True)
+
+    csv_options = {
+        "delimiter": args.delimiter,
+        "decimal_point": args.decimal_point,
+        "decimal_places": args.decimal_places,
+    }
+    rows = []
+    with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        futures = [
+            executor.submit(
+                analyze, path, args.rate, args.method, args.resampled, csv_options
+            )
+            for path in recordings
+        ]
+        for path, future in zip(recordings, futures):
+            try:
+                rows += future.result()
+            except (OSError, ValueError) as e:
+                print(f"Could not analyze '{path}': {e}", file=sys.stderr)
+
+    summary = format_table(
+        ["session", "scale", "duration", "samples"] + METRICS, rows, **csv_options
+    )
+    if args.summary is None:
+        print(summary, end="")
+    else:
+        with open(args.summary, "w") as f:
+            f.write(summary)
+        print(f"Written '{args.summary}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
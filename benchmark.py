@@ -0,0 +1,435 @@
+#!/usr/bin/env python3
+"""
+End-to-end latency benchmark of the eVAS.
+
+Replays scripted or recorded input streams against the headless 'SliderEngine' and the 'RecordingWriter'
+of the eVAS for each config in 'examples/' and measures:
+    - the latency from an input event until the changed value is sampled, written to the file
+      and shown by the next frame (the frame loop of the TK slider is simulated at the configured frame rate)
+    - dropped and duplicated samples and the achieved sampling rate
+    - the CPU usage and memory of the process
+
+Usage:
+    python benchmark.py [--rate 20] [--duration 5] [--stream input.jsonl] [--output results.json] [examples/default ...]
+    python benchmark.py --record input.jsonl
+
+Recorded input streams are JSON lines with the time in seconds since the first event, the type of event
+('press', 'release' or 'mouse') and the key (e.g. "Key.right" or "'a'") or the mouse position (0 to 1), e.g.:
+    {"t": 0.0, "type": "release", "key": "Key.space"}
+    {"t": 0.25, "type": "mouse", "position": 0.6}
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import math
+import argparse
+import platform
+import tempfile
+import threading
+import configparser
+
+from meta_info import app_version
+from settings import HEADLESS_KEYBOARD, Settings, complete_config
+from engine import SliderEngine
+from timing import SamplingScheduler, now_ns
+from recorder import BinaryFormat, CsvFormat, RecordingWriter
+from frame_timing import DEFAULT_FRAME_RATE
+from latency_trace import percentiles
+
+current_path = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_settings(config_path):
+    """Reads a config file and fills missing entries with the defaults of the eVAS.
+
+    Args:
+        config_path (str): Path of the config file.
+
+    Returns:
+        Settings: The settings of the config.
+    """
+    config = configparser.ConfigParser(allow_no_value=True)
+    config.optionxform = str
+    config.read(config_path, encoding="utf-8")
+
+    return Settings.from_config(complete_config(config))
+
+
+def parse_key(name):
+    """Converts a key of a recorded stream into a key of the headless settings.
+
+    Args:
+        name (str): The key as written by 'str(key)', e.g. "Key.right" or "'a'".
+
+    Returns:
+        KeyName: The key.
+    """
+    Key, KeyCode = HEADLESS_KEYBOARD["Key"], HEADLESS_KEYBOARD["KeyCode"]
+
+    if name.startswith("Key."):
+        return Key[name[len("Key.") :]]
+    return KeyCode.from_char(name.strip("'"))
+
+
+def load_stream(path):
+    """Loads a recorded input stream.
+
+    Args:
+        path (str): Path of the JSON lines file.
+
+    Returns:
+        list: List of (nanoseconds since the first event, type, key or position) tuples.
+    """
+    events = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            event = json.loads(line)
+            if event["type"] == "mouse":
+                argument = float(event["position"])
+            else:
+                argument = parse_key(event["key"])
+            events.append((int(event["t"] * 1e9), event["type"], argument))
+    return sorted(events, key=lambda x: x[0])
+
+
+def scripted_stream(settings, rate, duration):
+    """Creates an input stream that starts the eVAS and moves the slider at a fixed rate.
+
+    Keyboard configs step the slider back and forth, mouse configs sweep the mouse across the scale.
+
+    Args:
+        settings (Settings): The settings of the replayed config.
+        rate (float): Input events per second.
+        duration (float): Duration of the stream in seconds.
+
+    Returns:
+        list: List of (nanoseconds since the first event, type, key or position) tuples.
+    """
+    interval_ns = int(1e9 / rate)
+    start = settings.keys_start[0]
+    events = [(0, "press", start), (0, "release", start)]
+
+    steps = int(duration * rate)
+    for i in range(1, steps + 1):
+        t = i * interval_ns
+        if settings.use_mouse:
+            # one sweep per second
+            position = 0.5 + 0.5 * math.sin(2 * math.pi * t / 1e9)
+            events.append((t, "mouse", position))
+        else:
+            # a few steps to the right, then back to the left
+            keys = settings.keys_right if (i // 5) % 2 == 0 else settings.keys_left
+            events.append((t, "release", keys[0]))
+    return events
+
+
+def record_stream(path):
+    """Records keyboard input until escape is pressed and saves it as an input stream.
+
+    Args:
+        path (str): Path of the JSON lines file.
+    """
+    from pynput.keyboard import Key, Listener
+
+    start = []
+
+    def write(kind, key):
+        t = now_ns()
+        if not start:
+            start.append(t)
+        f.write(
+            json.dumps({"t": (t - start[0]) / 1e9, "type": kind, "key": str(key)})
+            + "\n"
+        )
+
+    def on_release(key):
+        write("release", key)
+        if key == Key.esc:
+            return False
+
+    print(f"Recording input to '{path}', press escape to stop.")
+    with open(path, "w", encoding="utf-8") as f:
+        with Listener(
+            on_press=lambda key: write("press", key), on_release=on_release
+        ) as listener:
+            listener.join()
+
+
+class ProbeFormat:
+    """Wraps the format of the recording and stores the time each sample is written to the file."""
+
+    def __init__(self, sample_format):
+        self.sample_format = sample_format
+        self.mode = sample_format.mode
+        self.metadata = sample_format.metadata
+        self.write_ns = []
+
+    def header(self):
+        return self.sample_format.header()
+
+    def format(self, samples):
+        data = self.sample_format.format(samples)
+        # the batch is written right after it is formatted
+        self.write_ns.extend([now_ns()] * len(samples))
+        return data
+
+
+def replay(settings, events, output_format="csv", directory=None):
+    """Replays an input stream through the engine and the recording writer of the eVAS.
+
+    Args:
+        settings (Settings): The settings of the replayed config.
+        events (list): The input stream, see 'scripted_stream()'.
+        output_format (str, optional): Format of the recording, "csv" or "binary". Defaults to "csv".
+        directory (str, optional): Directory of the recording. Defaults to a temporary directory.
+
+    Returns:
+        dict: The measured latencies and statistics.
+    """
+    if directory is None:
+        # the temporary directory is removed with the recording
+        with tempfile.TemporaryDirectory(prefix="evas_benchmark_") as directory:
+            return replay(settings, events, output_format, directory)
+
+    import psutil
+
+    process = psutil.Process()
+    filename = os.path.join(directory, f"benchmark.{output_format[:3]}")
+
+    sample_format = ProbeFormat(
+        BinaryFormat()
+        if output_format == "binary"
+        else CsvFormat(
+            delimiter=settings.delimiter,
+            decimal_point=settings.decimal_point,
+            decimal_places=settings.decimal_places,
+        )
+    )
+    writer = RecordingWriter(
+        filename=filename,
+        sample_format=sample_format,
+        flush_interval=settings.flush_interval,
+    )
+
+    # (time the sample was pushed, nanoseconds since start, value)
+    pushed = []
+
+    def on_sample(ns, value):
+        pushed.append((now_ns(), ns, value))
+        writer.push(ns, value)
+
+    engine = SliderEngine(settings, on_sample=on_sample)
+
+    # simulated frame loop: (time of the frame, number of changes shown)
+    frames = []
+    peak_rss = [process.memory_info().rss]
+
+    def render_frames():
+        scheduler = SamplingScheduler(
+            interval=1 / (settings.frame_rate or DEFAULT_FRAME_RATE),
+            spin_time=settings.spin_time,
+        )
+
+        def frame():
+            frames.append((now_ns(), engine.changes))
+            if len(frames) % 10 == 0:
+                peak_rss[0] = max(peak_rss[0], process.memory_info().rss)
+
+        scheduler.run(function=frame, is_running=lambda: engine.running)
+
+    writer.start()
+    frame_thread = threading.Thread(target=render_frames, name="Frames")
+    frame_thread.start()
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    scheduler = SamplingScheduler(interval=1, spin_time=settings.spin_time)
+    replay_start = now_ns()
+
+    # (time of the event, number of changes after the event, value after the event)
+    changes = []
+    for offset, kind, argument in events:
+        event_ns = replay_start + offset
+        scheduler.wait_until(event_ns)
+        before, started = engine.changes, engine.started
+        if kind == "press":
+            engine.key_press(argument, event_ns=event_ns)
+        elif kind == "release":
+            engine.key_release(argument, event_ns=event_ns)
+        elif kind == "mouse":
+            engine.mouse(argument, event_ns=event_ns)
+        # changes by the start of the recording are not sampled on change
+        if started and engine.changes != before:
+            changes.append((event_ns, engine.changes, engine.value))
+
+    # let the last changes be sampled
+    time.sleep(2 * settings.sampling_rate)
+    engine.stop()
+    frame_thread.join()
+    writer.close()
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+    peak_rss[0] = max(peak_rss[0], process.memory_info().rss)
+    if os.path.isfile(filename):
+        os.remove(filename)
+
+    return {
+        **latencies(changes, pushed, sample_format.write_ns, frames, engine.start_ns),
+        **sample_statistics(settings, pushed, changes),
+        "buffer_overruns": writer.buffer.overruns,
+        "cpu_percent": round(100 * cpu / wall, 1),
+        "peak_rss_mb": round(peak_rss[0] / 2**20, 1),
+    }
+
+
+def latencies(changes, pushed, write_ns, frames, start_ns):
+    """Measures the latencies from the input events until the sample, the file and the next frame.
+
+    Args:
+        changes (list): List of (event time, number of changes, value) of the value changing events.
+        pushed (list): List of (push time, nanoseconds since start, value) of the samples.
+        write_ns (list): Times the samples were written to the file, in the order they were pushed.
+        frames (list): List of (frame time, number of changes) of the rendered frames.
+        start_ns (int): Start of the recording.
+
+    Returns:
+        dict: Latency percentiles in milliseconds.
+    """
+    to_sample, to_file, to_frame = [], [], []
+
+    # the first sample taken at or after the event, a change is lost if the value changed again before
+    i = 0
+    for event_ns, _, value in changes:
+        while i < len(pushed) and start_ns + pushed[i][1] < event_ns:
+            i += 1
+        if i < len(pushed) and pushed[i][2] == value:
+            to_sample.append(pushed[i][0] - event_ns)
+            if i < len(write_ns):
+                to_file.append(write_ns[i] - event_ns)
+
+    # the first frame showing the change
+    i = 0
+    for event_ns, count, _ in changes:
+        while i < len(frames) and frames[i][1] < count:
+            i += 1
+        if i < len(frames):
+            to_frame.append(max(frames[i][0] - event_ns, 0))
+
+    return {
+        "event_to_sample_ms": percentiles(to_sample),
+        "event_to_file_ms": percentiles(to_file),
+        "event_to_frame_ms": percentiles(to_frame),
+        "changes_not_sampled": len(changes) - len(to_sample),
+    }
+
+
+def sample_statistics(settings, pushed, changes):
+    """Counts dropped and duplicated samples and the achieved sampling rate.
+
+    Args:
+        settings (Settings): The settings of the replayed config.
+        pushed (list): List of (push time, nanoseconds since start, value) of the samples.
+        changes (list): List of (event time, number of changes, value) of the value changing events.
+
+    Returns:
+        dict: The statistics.
+    """
+    timestamps = [ns for _, ns, _ in pushed]
+    duplicated = sum(a == b for a, b in zip(timestamps, timestamps[1:]))
+    span = (timestamps[-1] - timestamps[0]) / 1e9 if len(timestamps) > 1 else 0
+
+    if settings.only_on_change:
+        # one sample per change is expected
+        dropped = max(len(changes) - len(pushed), 0)
+    else:
+        # gaps larger than 1.5 intervals miss samples
+        interval = settings.sampling_rate * 1e9
+        dropped = sum(
+            max(round((b - a) / interval) - 1, 0)
+            for a, b in zip(timestamps, timestamps[1:])
+            if b - a > 1.5 * interval
+        )
+
+    return {
+        "samples": len(pushed),
+        "dropped_samples": dropped,
+        "duplicated_samples": duplicated,
+        "target_rate_hz": (
+            None if settings.only_on_change else round(1 / settings.sampling_rate, 3)
+        ),
+        "achieved_rate_hz": round((len(timestamps) - 1) / span, 3) if span else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="End-to-end latency benchmark of the eVAS."
+    )
+    parser.add_argument(
+        "examples",
+        nargs="*",
+        help="Directories containing a config.ini. Defaults to all examples.",
+    )
+    parser.add_argument(
+        "--rate", type=float, default=20, help="Scripted input events per second."
+    )
+    parser.add_argument(
+        "--duration", type=float, default=5, help="Duration of the scripted input."
+    )
+    parser.add_argument("--stream", help="Replay a recorded input stream instead.")
+    parser.add_argument(
+        "--format", choices=["csv", "binary"], default=None, help="Output format."
+    )
+    parser.add_argument("--output", help="Path of the JSON results.")
+    parser.add_argument("--record", help="Record keyboard input to a stream file.")
+    args = parser.parse_args()
+
+    if args.record:
+        record_stream(args.record)
+        return
+
+    examples = args.examples or sorted(
+        glob.glob(os.path.join(current_path, "examples", "*"))
+    )
+    results = []
+    for example in examples:
+        settings = load_settings(os.path.join(example, "config.ini"))
+        if args.stream:
+            events = load_stream(args.stream)
+        else:
+            events = scripted_stream(settings, args.rate, args.duration)
+
+        output_format = args.format or settings.output_format
+        print(f"Replaying {len(events)} events against '{example}' ...")
+        result = replay(settings, events, output_format=output_format)
+        results.append(
+            {
+                "example": os.path.basename(os.path.normpath(example)),
+                "stream": args.stream or f"scripted {args.rate} Hz",
+                "output_format": output_format,
+                "only_on_change": settings.only_on_change,
+                "use_mouse": settings.use_mouse,
+                **result,
+            }
+        )
+
+    report = {
+        "version": app_version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Block-based compression of eVAS recordings.
+
+If 'compression' is configured, each batch written by the recorder is compressed into an independent block.
+Each block starts with its compressed and uncompressed size and a checksum, so a reader can skip from block to
+block and a file that was cut off during a crash stays readable up to the last complete block.
+
+File layout:
+    magic, version and length of the codec name, followed by the codec name
+    blocks: compressed size, uncompressed size and CRC-32 of the compressed data, followed by the data
+
+Codecs of the standard library ('gzip', 'zlib', 'bz2' and 'lzma') are available by default, further codecs can be
+added with 'register_codec()'. Compressed recordings are read transparently with 'open_recording()' and can be
+decompressed to their original form with:
+    python compression.py 20240101_120000_vas.csv.evz [more files ...]
+"""
+
+import io
+import sys
+import zlib
+import struct
+import locale
+import importlib
+
+COMPRESSED_MAGIC = b"eVCZ"
+COMPRESSED_VERSION = 1
+COMPRESSED_EXTENSION = ".evz"
+FILE_HEADER = struct.Struct("<4sBB")
+BLOCK_HEADER = struct.Struct("<III")
+
+
+class StdlibCodec:
+    """Codec using a compression module of the standard library."""
+
+    def __init__(self, name, module, **options):
+        """
+        Args:
+            name (str): Name of the codec, stored in the compressed file.
+            module (str): Name of the module providing 'compress()' and 'decompress()'.
+            options: Options passed to 'compress()', e.g. the compression level.
+        """
+        self.name = name
+        self.module = module
+        self.options = options
+
+    def compress(self, data):
+        return importlib.import_module(self.module).compress(data, **self.options)
+
+    def decompress(self, data):
+        return importlib.import_module(self.module).decompress(data)
+
+
+CODECS = {}
+
+
+def register_codec(codec):
+    """Makes a codec available for compressing and reading recordings.
+
+    Args:
+        codec (object): Object with a 'name' and the functions 'compress(bytes)' and 'decompress(bytes)'.
+    """
+    CODECS[codec.name] = codec
+
+
+register_codec(StdlibCodec("gzip", "gzip", compresslevel=6, mtime=0))
+register_codec(StdlibCodec("zlib", "zlib", level=6))
+register_codec(StdlibCodec("bz2", "bz2", compresslevel=9))
+register_codec(StdlibCodec("lzma", "lzma"))
+
+
+class CompressedWriter:
+    """File-like object compressing everything written between two flushes into one block."""
+
+    def __init__(self, path, codec, text=False):
+        """
+        Args:
+            path (str): Path of the compressed file.
+            codec (str): Name of the codec.
+            text (bool, optional): Whether strings are written, which are encoded like an uncompressed text file. Defaults to False.
+        """
+        self.codec = CODECS[codec]
+        self.encoding = locale.getpreferredencoding(False) if text else None
+        self._file = open(path, "wb")
+        self._pending = []
+
+        name = self.codec.name.encode("ascii")
+        self._file.write(
+            FILE_HEADER.pack(COMPRESSED_MAGIC, COMPRESSED_VERSION, len(name)) + name
+        )
+
+    def write(self, data):
+        if self.encoding is not None:
+            data = data.encode(self.encoding)
+        self._pending.append(data)
+        return len(data)
+
+    def flush(self):
+        """Compresses the data written since the last flush into a block and writes it."""
+        if self._pending:
+            data = b"".join(self._pending)
+            self._pending = []
+            compressed = self.codec.compress(data)
+            self._file.write(
+                BLOCK_HEADER.pack(len(compressed), len(data), zlib.crc32(compressed))
+                + compressed
+            )
+        self._file.flush()
+
+    def fileno(self):
+        return self._file.fileno()
+
+    def close(self):
+        self.flush()
+        self._file.close()
+
+
+def is_compressed(path):
+    """Returns whether a file is a compressed recording.
+
+    Args:
+        path (str): Path of the file.
+
+    Returns:
+        bool: Whether the file starts with the magic of compressed recordings.
+    """
+    with open(path, "rb") as f:
+        return f.read(len(COMPRESSED_MAGIC)) == COMPRESSED_MAGIC
+
+
+def read_file_header(f):
+    """Reads the header of a compressed recording.
+
+    Args:
+        f (file): The compressed file opened in binary mode, positioned at its start.
+
+    Raises:
+        ValueError: If the file is not a compressed recording.
+
+    Returns:
+        object: The codec of the recording.
+    """
+    magic, version, name_size = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    if magic != COMPRESSED_MAGIC or version != COMPRESSED_VERSION:
+        raise ValueError("Not a compressed eVAS recording.")
+    name = f.read(name_size).decode("ascii")
+    if name not in CODECS:
+        raise ValueError(f"Unknown codec '{name}' of the compressed recording.")
+    return CODECS[name]
+
+
+def iter_blocks(f):
+    """Iterates over the complete blocks of a compressed recording, starting at the current position.
+
+    Args:
+        f (file): The compressed file opened in binary mode, positioned at the start of a block.
+
+    Yields:
+        tuple: Start offset, end offset, uncompressed size and compressed data of each block.
+            Stops at the first incomplete or corrupt block.
+    """
+    while True:
+        start = f.tell()
+        header = f.read(BLOCK_HEADER.size)
+        if len(header) < BLOCK_HEADER.size:
+            return
+        size, uncompressed_size, crc = BLOCK_HEADER.unpack(header)
+        compressed = f.read(size)
+        if len(compressed) < size or zlib.crc32(compressed) != crc:
+            return
+        yield start, f.tell(), uncompressed_size, compressed
+
+
+def complete_size(path):
+    """Returns the size of a compressed recording up to the end of its last complete block.
+
+    Args:
+        path (str): Path of the compressed recording.
+
+    Returns:
+        int: The size in bytes, 0 if not even the file header is complete.
+    """
+    with open(path, "rb") as f:
+        try:
+            read_file_header(f)
+        except (struct.error, ValueError, UnicodeDecodeError):
+            return 0
+        end = f.tell()
+        for _, end, _, _ in iter_blocks(f):
+            pass
+    return end
+
+
+class BlockReader(io.RawIOBase):
+    """Reads the decompressed content of a compressed recording block by block.
+
+    Seeking only decompresses the block containing the new position, using an index of the block sizes.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, "rb")
+        self.codec = read_file_header(self._file)
+        self._first_block = self._file.tell()
+        self._blocks = iter_blocks(self._file)
+        self._index = None
+        self._data = b""
+        self._position = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def index(self):
+        """Returns the index of the blocks.
+
+        Returns:
+            list: Offset in the file, uncompressed start and uncompressed size of each complete block.
+        """
+        if self._index is None:
+            self._index = []
+            position = self._file.tell()
+            self._file.seek(self._first_block)
+            start = 0
+            for offset, _, size, _ in iter_blocks(self._file):
+                self._index.append((offset, start, size))
+                start += size
+            self._file.seek(position)
+        return self._index
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += sum(size for _, _, size in self.index())
+
+        # continue reading at the block containing the offset
+        self._data = b""
+        self._position = offset
+        for block_offset, start, size in self.index():
+            if start <= offset < start + size:
+                self._file.seek(block_offset)
+                self._blocks = iter_blocks(self._file)
+                _, _, _, compressed = next(self._blocks)
+                self._data = self.codec.decompress(compressed)[offset - start :]
+                break
+        else:
+            # behind the last block
+            self._blocks = iter([])
+        return self._position
+
+    def tell(self):
+        return self._position
+
+    def readinto(self, buffer):
+        while not self._data:
+            block = next(self._blocks, None)
+            if block is None:
+                return 0
+            self._data = self.codec.decompress(block[3])
+        size = min(len(buffer), len(self._data))
+        buffer[:size] = self._data[:size]
+        self._data = self._data[size:]
+        self._position += size
+        return size
+
+    def close(self):
+        self._file.close()
+        super().close()
+
+
+def open_recording(path, mode="rb"):
+    """Opens a recording, compressed or not.
+
+    Args:
+        path (str): Path of the recording.
+        mode (str, optional): "rb" for bytes or "r" for text. Defaults to "rb".
+
+    Returns:
+        file: The opened recording.
+    """
+    if not is_compressed(path):
+        return open(path, mode)
+    reader = io.BufferedReader(BlockReader(path))
+    if mode == "rb":
+        return reader
+    return io.TextIOWrapper(reader, encoding=locale.getpreferredencoding(False))
+
+
+def decompress(path, output_path=None):
+    """Decompresses a recording to its original form.
+
+    Args:
+        path (str): Path of the compressed recording.
+        output_path (str, optional): Path of the decompressed file. Defaults to the path without '.evz'.
+
+    Returns:
+        str: Path of the decompressed file.
+    """
+    if output_path is None:
+        output_path = path[: -len(COMPRESSED_EXTENSION)]
+        if not path.endswith(COMPRESSED_EXTENSION):
+            output_path = path + ".out"
+
+    with open_recording(path) as f, open(output_path, "wb") as output:
+        while True:
+            data = f.read(1 << 20)
+            if not data:
+                break
+            output.write(data)
+    return output_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        print(f"Written '{decompress(path)}'.")
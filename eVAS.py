@@ -13,6 +13,7 @@ import os
 import sys
 import logging
 from datetime import datetime
+from profiling import StartupProfile
 
 
 def get_current_path():
@@ -40,53 +41,51 @@ logging.basicConfig(
     format="%(asctime)s %(levelname)s: %(message)s",
 )
 
+# optionally measure the startup, imports are measured from here on
+startup_profile = StartupProfile(enabled="--startup-profile" in sys.argv)
+
 try:
+    # modules only needed in some cases (update check, thermode trigger, cursor warping, ...)
+    # are imported on first use to reduce the startup time
+    import io
+    import math
     import time
     import glob
-    import psutil
-    import requests
-    import pyautogui
     import threading
-    import webbrowser
     import configparser
     import tkinter as tk
     from functools import wraps
-    from packaging import version
     from tkinter.messagebox import showinfo, askquestion
     from tkinter.constants import *
-    from contextlib import contextmanager
-    from urllib.request import urlretrieve
     import PIL.Image, PIL.ImageTk
-    from screeninfo import get_monitors
-    from pynput.keyboard import Key, Listener
-    from send_trigger import get_com, send_start_trigger
+    from render_cache import RenderCache
+    from single_instance import InstanceLock
+    from settings import (
+        Settings,
+        complete_config,
+        create_config,
+        pynput_keyboard,
+        read_cached_settings,
+        write_cached_settings,
+    )
+    from recorder import (
+        BinaryFormat,
+        CsvFormat,
+        RecordingWriter,
+        recover_recordings,
+    )
+    from timing import now_ns
+    from engine import MouseCoalescer, MouseFlushThread, ScaleGroup
 
 except Exception as e:
     logging.exception(f"Import error: '{e}'.")
 
 
-def clip(value, min_value, max_value):
-    return max(min_value, min(value, max_value))
-
-
 def linspace(start, stop, num):
     step = (stop - start) / (num - 1) if num > 1 else 0
     return [start + i * step for i in range(num)]
 
 
-def get_key_string(x):
-    # get string and remove "Key."
-    x = [str(i).replace("Key.", "") for i in x]
-    if len(x) == 1:
-        return x[0]
-    if len(x) == 2:
-        return x[0] + " or " + x[1]
-    if len(x) > 2:
-        x = [el if ((i + 1) == len(x)) else el + "," for i, el in enumerate(x)]
-        x.insert(len(x) - 1, "or")
-        return " ".join(x)
-
-
 def try_delete_log_file():
     """If empty, tries to delete the logging file. Upon error, only prints the error to the console."""
     try:
@@ -145,182 +144,36 @@ def catch(func):
     return wrapper
 
 
-def is_already_running():
-    """Function to check whether the application is already running.
+def acquire_instance_lock():
+    """Function to ensure that only one instance of the application is running.
+    If another instance is running, it is asked to bring its window to the front.
 
     Returns:
-        bool: Whether another instance of the eVAS is already running.
+        bool: Whether this is the only running instance of the eVAS.
     """
-    processes = [p for p in psutil.process_iter() if "eVAS.exe" in p.name()]
-    return len(processes) > 2
+    global instance_lock
+    instance_lock = InstanceLock(os.path.join(current_path, lock_file_name))
+    if not instance_lock.acquire():
+        return False
+
+    # bring the window to the front if the eVAS is started again
+    instance_lock.listen_for_focus(on_focus=focus_requested.set)
+    return True
 
 
 #################################################################################################################
 # Config file
 config_file_name = "config.ini"
-
-
-def create_config():
-    """Creates the default configuration file with it default elements.
-
-    Returns:
-        ConfigParser: Default configuration.
-    """
-    config = configparser.ConfigParser(allow_no_value=True)
-
-    # preserve capital letters in config
-    config.optionxform = str
-
-    config.add_section("general")
-    config.set(
-        "general",
-        "# Sampling rate: How often should values be saved to file (in seconds).",
-    )
-    config.set("general", "sampling_rate", "0.1")
-    config.set(
-        "general", "# Whether to save values only upon change. Should be: True/False"
-    )
-    config.set("general", "only_on_change", "True")
-    config.set(
-        "general",
-        "# Whether to use the second screen to show the eVAS. Should be: True/False",
-    )
-    config.set("general", "use_second_screen", "True")
-
-    config.add_section("scale")
-    config.set(
-        "scale",
-        "# Define the anchor labels of the scale. You can wrap text by placing a '\\n' in the label.",
-    )
-    config.set("scale", "anchors", "['No pain', 'Highest\\nimaginable pain']")
-    config.set("scale", "# Font size of the defined anchor labels above.")
-    config.set("scale", "label_size", "32")
-    config.set("scale", "# Define the value range")
-    config.set("scale", "range", "[0, 1]")
-    config.set("scale", "# Define the start value")
-    config.set("scale", "start", "0")
-    config.set("scale", "# Step size to move the slider whenever a key is released.")
-    config.set("scale", "step_size", "0.02")
-    config.set(
-        "scale",
-        "# Height of vertical lines for each anchor. Can be 0 to not draw any vertical lines.",
-    )
-    config.set("scale", "vertical_line_height", "0")
-    config.set(
-        "scale", "# Whether to plot numbers below the lines. Should be: True/False"
-    )
-    config.set("scale", "numbers", "False")
-    config.set("scale", "# Font size of the defined numbers below the scale.")
-    config.set("scale", "number_size", "32")
-
-    config.add_section("devices")
-    config.set(
-        "devices",
-        "# Whether to send a signal to trigger a 'QST.LAB TCS2' thermode when the eVAS is recording. Only works on Windows. Should be: True/False",
-    )
-    config.set("devices", "trigger_thermode", "False")
-    config.set(
-        "devices",
-        "# Moving the slider not only when the button is released, but also while the button is held down. Should be: True/False",
-    )
-    config.set("devices", "move_while_down", "False")
-    config.set(
-        "devices",
-        "# Whether to use the mouse (slider does not move with keys anymore). Should be: True/False",
-    )
-    config.set("devices", "use_mouse", "False")
-    config.set(
-        "devices",
-        "# Whether to update only on mouse click (only has an effect if 'use_mouse' is 'True'). Should be: True/False",
-    )
-    config.set("devices", "on_click", "False")
-
-    config.add_section("keys")
-    config.set("keys", "# The following section is used to defined the keys.")
-    config.set(
-        "keys",
-        "# Keys code names can be found under: 'https://pynput.readthedocs.io/en/latest/keyboard.html'",
-    )
-    config.set("keys", "")
-    config.set("keys", "# Keys to start the recording.")
-    config.set("keys", "keys_start", "[Key.space]")
-    config.set("keys", "# Keys to end the application.")
-    config.set("keys", "keys_end", "[Key.esc, Key.end]")
-    config.set("keys", "# Keys to move the slider left.")
-    config.set("keys", "keys_left", "[Key.left, Key.page_up]")
-    config.set("keys", "# Keys to move the slider right.")
-    config.set("keys", "keys_right", "[Key.right, Key.page_down]")
-
-    config.add_section("appearance")
-    config.set(
-        "appearance",
-        "# Whether to load an image as slider background. Image must be placed in the same directory and called 'image'. Should be: True/False",
-    )
-    config.set("appearance", "use_image", "False")
-    config.set(
-        "appearance",
-        "# Whether to load an image and place it above the slider. Image must be placed in the same directory and called 'upper_image'. Should be: True/False",
-    )
-    config.set("appearance", "use_upper_image", "False")
-    config.set("appearance", "# Width of the slider")
-    config.set("appearance", "slider_width", "31")
-    config.set("appearance", "# Height of the slider")
-    config.set("appearance", "slider_height", "138")
-    config.set(
-        "appearance",
-        "# Color of the slider. Should be in form (R,G,B). Colors can be found under: 'https://redketchup.io/color-picker'",
-    )
-    config.set("appearance", "slider_color", "(0,0,0)")
-    config.set("appearance", "# Background color left")
-    config.set("appearance", "left_color", "(192,192,192)")
-    config.set("appearance", "# Background color right")
-    config.set("appearance", "right_color", "(64,64,64)")
-    config.set(
-        "appearance", "# Background color mid. Can also be disabled with 'None'."
-    )
-    config.set("appearance", "mid_color", "None")
-    config.set("appearance", "# Height of the line the slider moves on.")
-    config.set("appearance", "line_height", "128")
-    config.set(
-        "appearance",
-        "# Use a triangle instead of a square for the background. Should be: True/False.",
-    )
-    config.set("appearance", "use_triangle", "False")
-    config.set(
-        "appearance",
-        "# Use a decreasing and an increasing triangle instead of a square for the background. Should be: True/False.",
-    )
-    config.set("appearance", "use_two_triangle", "False")
-    config.set(
-        "appearance",
-        "# Welcome message that is displayed at the beginning. Should be list of Strings. Each element of the list is separated by a line break.",
-    )
-    config.set(
-        "appearance",
-        "welcome_message",
-        '[f"Press {get_key_string(self.keys_start)} to start.", f"You can configure {config_file_name} to change the eVAS.", f"The application can be exited at any time by pressing {get_key_string(self.keys_end)}."]',
-    )
-    config.set(
-        "appearance",
-        "# Whether to hide the slider until first user interaction. Should only be used with 'use_mouse' set to 'True'. Should be: True/False.",
-    )
-    config.set("appearance", "hide_slider", "False")
-
-    config.add_section("csv")
-    config.set("csv", "# Delimiter used in the CSV output file, for example ';'.")
-    config.set("csv", "delimiter", ";")
-    config.set("csv", "# Decimal point used in the CSV output file, for example ','.")
-    config.set("csv", "decimal_point", ",")
-    config.set(
-        "csv", "# Number of digits after the decimal point for the slider values saved."
-    )
-    config.set("csv", "decimal_places", "4")
-    config.set(
-        "csv", "# Whether to save the used config at the beginning of the CSV file."
-    )
-    config.set("csv", "save_config_in_csv", "False")
-
-    return config
+# settings parsed from the config file, reused while the config file is unchanged
+settings_cache_file_name = "config.cache"
+# lock file held by the running instance
+lock_file_name = "eVAS.lock"
+# set when another instance asks for the focus
+focus_requested = threading.Event()
+# cached port of the thermode
+trigger_state_file_name = "trigger_state.json"
+# cached result of the last update check
+update_state_file_name = "update_state.json"
 
 
 def write_config(config, config_file_name=config_file_name):
@@ -353,8 +206,8 @@ def read_config(config_file_name=config_file_name):
 
 def eval_config(config):
     """Evaluates a given configuration.
-    First entries that are in the "default" configuration but missing in the given one are filled.
-    Next simplistic checks are performed to ensure the correctness of the config.
+    Entries that are in the "default" configuration but missing in the given one are filled.
+    The config file is only rewritten if it changed.
 
     Args:
         config (ConfigParser): The config to check.
@@ -364,186 +217,258 @@ def eval_config(config):
     """
 
     try:
-        generic_config = create_config()
-
-        # check if all elements are present
-        new_config = configparser.ConfigParser(allow_no_value=True)
-        new_config.optionxform = str
-
-        for section in generic_config:
-            if section == "DEFAULT":
-                continue
-            new_config.add_section(section)
-            for entry in generic_config[section]:
-                if len(entry) == 0:
-                    continue
-                if entry.startswith("#"):
-                    new_config.set(section, entry)
-                    continue
-                if not config.has_option(section, entry):
-                    new_config.set(section, entry, generic_config[section][entry])
-                    continue
-                new_config.set(section, entry, config[section][entry])
-
-        config = new_config
-        write_config(config=config)
-
-        range = eval(config["scale"]["range"])
-        start_value = eval(config["scale"]["start"])
-
-        if type(range) != list or len(range) != 2:
-            message(
-                showinfo,
-                title="eVAS: Warning",
-                message=f"Range should be a list with two entries but is '{range}'. "
-                + "Fix or delete the '{config_file_name}' file.",
-            )
-            sys.exit()
-        if range[0] >= range[1]:
-            message(
-                showinfo,
-                title="eVAS: Warning",
-                message=f"First element of range should be smaller than second value, "
-                + "but are '{range[0]}' and '{range[1]}'. "
-                + "Fix or delete the '{config_file_name}' file.",
-            )
-            sys.exit()
-        if start_value < range[0] or start_value > range[1]:
-            message(
-                showinfo,
-                title="eVAS: Warning",
-                message=f"Start value should be in-between range, "
-                + "but is '{start_value}' with range '{range[0]}' and '{range[1]}'. "
-                + "Fix or delete the '{config_file_name}' file.",
-            )
-            sys.exit()
+        config = complete_config(config)
+
+        # only rewrite the config file if entries were added
+        content = io.StringIO()
+        config.write(content)
+        try:
+            with open(
+                os.path.join(current_path, config_file_name), encoding="utf-8"
+            ) as fp:
+                changed = fp.read() != content.getvalue()
+        except OSError:
+            changed = True
+        if changed:
+            write_config(config=config)
+
         return config
     except Exception as e:
         throw_config_error(e)
 
 
+def load_settings():
+    """Loads the settings of the eVAS.
+    If the config file did not change since the last start, the cached settings are used.
+    Otherwise, a default config file is created if none is existing, the config file is read, evaluated and parsed.
+
+    Returns:
+        Settings: The settings of the eVAS.
+    """
+    config_path = os.path.join(current_path, config_file_name)
+    cache_path = os.path.join(current_path, settings_cache_file_name)
+
+    keyboard = pynput_keyboard()
+    settings = read_cached_settings(
+        config_path, cache_path, version=app_version, keyboard=keyboard
+    )
+    if settings is not None:
+        return settings
+
+    # create a config file if none is existing
+    if not os.path.isfile(config_path):
+        write_config(config=create_config())
+
+    # read and check config
+    config = eval_config(read_config())
+
+    try:
+        settings = Settings.from_config(
+            config, config_file_name=config_file_name, keyboard=keyboard
+        )
+    except (ValueError, TypeError) as e:
+        logging.exception(e)
+        message(
+            showinfo,
+            title="eVAS: Warning",
+            message=f"{e} Fix or delete the '{config_file_name}' file.",
+        )
+        sys.exit()
+
+    write_cached_settings(settings, config_path, cache_path, version=app_version)
+    return settings
+
+
+#################################################################################################################
+# CoVAS
+class KeyMonitor:
+    """Listens to the keyboard in the background and passes key events with their monotonic time on."""
+
+    def __init__(self, key_press_function, key_release_function):
+        from pynput.keyboard import Key, Listener
+
+        self.caps_lock = Key.caps_lock
+        self.listener = Listener(on_press=self.on_press, on_release=self.on_release)
+        self.key_release_fun = key_release_function
+        self.key_press_fun = key_press_function
+
+    def ignore(self, key):
+        """Returns whether a key event is ignored.
+
+        Args:
+            key (Key): The pressed/released key.
+
+        Returns:
+            bool: Whether to ignore the event.
+        """
+        # reduce crashes on mac os when caps lock is pressed
+        if (sys.platform == "darwin") and (key == self.caps_lock):
+            time.sleep(0.05)
+            return True
+        return False
+
+    def on_press(self, key):
+        event_ns = now_ns()
+        if not self.ignore(key):
+            self.key_press_fun(key, event_ns)
+
+    def on_release(self, key):
+        event_ns = now_ns()
+        if not self.ignore(key):
+            self.key_release_fun(key, event_ns)
+
+    def stop_monitoring(self):
+        self.listener.stop()
+
+    def start_monitoring(self):
+        self.listener.start()
+
+
+class MouseMonitor:
+    """Listens to the mouse in the background and passes movements or left clicks with their screen position
+    and monotonic time on."""
+
+    def __init__(self, mouse_function, on_click=False):
+        """
+        Args:
+            mouse_function (function): Called with the x and y position on the screen and the time of the event.
+            on_click (bool, optional): Whether to pass left clicks on instead of movements. Defaults to False.
+        """
+        from pynput.mouse import Button, Listener
+
+        self.left_button = Button.left
+        self.mouse_fun = mouse_function
+        if on_click:
+            self.listener = Listener(on_click=self.on_click)
+        else:
+            self.listener = Listener(on_move=self.on_move)
+
+    def on_move(self, x, y):
+        self.mouse_fun(x, y, now_ns())
+
+    def on_click(self, x, y, button, pressed):
+        event_ns = now_ns()
+        # like the window, react on the release of the left button
+        if button == self.left_button and not pressed:
+            self.mouse_fun(x, y, event_ns)
+
+    def stop_monitoring(self):
+        self.listener.stop()
+
+    def start_monitoring(self):
+        self.listener.start()
+
+
+def open_trigger_device(root):
+    """Opens the connection to the thermode once, so triggers are sent without delay.
+
+    Args:
+        root (tk.Tk): Root window used to ask for the port.
+
+    Returns:
+        TriggerDevice: The opened device or None if it could not be opened.
+    """
+    from send_trigger import TriggerDevice
+
+    try:
+        trigger_device = TriggerDevice(
+            state_path=os.path.join(current_path, trigger_state_file_name)
+        )
+        trigger_device.open(root=root)
+        return trigger_device
+    except Exception as e:
+        logging.exception(e)
+        message(
+            showinfo,
+            title="eVAS: Warning",
+            message=f"The connection to the thermode could not be opened: '{e}'. "
+            + "The eVAS is started without sending triggers.",
+        )
+        return None
+
+
 #################################################################################################################
 # CoVAS
 class Covas(tk.Frame):
-    def __init__(self, callback, master=None, *args, **kwargs):
+    def __init__(self, engine, settings, master=None, grab=True, *args, **kwargs):
 
-        on_click = eval(config["devices"]["on_click"])
+        on_click = settings.on_click
         # set a visible cursor if interact by mouse click, otherwise set cursor invisible
         cursor = "target" if on_click else "none"
         super().__init__(master, cursor=cursor, background="white")
         self.pack(fill=BOTH, expand=True)
         self.focus_set()
-        self.callback = callback
 
-        self.slider = Slider(self, callback=callback, *args, **kwargs)
+        self.slider = Slider(
+            self,
+            engine=engine,
+            settings=settings,
+            *args,
+            **kwargs,
+        )
         self.slider.pack(side="top", expand=True, fill=X, padx=10, pady=10)
-        self.slider.grab_set()
-
-    def update(self):
-        self.slider.update_slider()
-        return super().update()
+        # TK keeps only one grab, so with several scales each window keeps its own pointer input
+        if grab:
+            self.slider.grab_set()
 
 
 # constants for placement
 xpad, ypad, gradfac, linefac, textfac = 0.1, 0.1, 0.75, 0, 0.5
 
+# decoded and resized images shared by all sliders
+render_cache = RenderCache()
+
 
 class Slider(tk.Canvas):
-    def __init__(self, master=None, *, callback=None):
-        """callback is called with the slider's value as sole parameter. value is kept in [0,1] to accommodate for possibly changing scales."""
+    def __init__(self, master=None, *, engine=None, settings=None, trace=None):
+        """The slider is a view on a 'SliderEngine', which holds the state and records the values.
+        Key events are passed to the engine by a 'KeyMonitor', mouse events of the slider by the slider itself.
+        trace is an optional 'LatencyTrace' stamped with the mouse events and frames.
+        """
 
         super().__init__(master, highlightthickness=0, background="#FFFFFF", height=800)
 
-        # config
-        try:
-            self.sampling_rate = eval(config["general"]["sampling_rate"])
-            self.only_on_change = eval(config["general"]["only_on_change"])
-
-            self.range = eval(config["scale"]["range"])
-            self.start_value = eval(config["scale"]["start"])
-            self.labels = eval(config["scale"]["anchors"])
-            self.label_size = eval(config["scale"]["label_size"])
-            self.numbers = eval(config["scale"]["numbers"])
-            self.number_size = eval(config["scale"]["number_size"])
-            self.vertical_line_height = eval(config["scale"]["vertical_line_height"])
-            self.step_size = eval(config["scale"]["step_size"])
-
-            self.use_mouse = eval(config["devices"]["use_mouse"])
-            self.move_while_down = eval(config["devices"]["move_while_down"])
-            self.trigger_thermode = eval(config["devices"]["trigger_thermode"])
-            self.on_click = eval(config["devices"]["on_click"])
-
-            self.keys_start = eval(config["keys"]["keys_start"])
-            self.keys_end = eval(config["keys"]["keys_end"])
-            if Key.esc not in self.keys_end:
-                self.keys_end.append(Key.esc)
-            self.keys_left = eval(config["keys"]["keys_left"])
-            self.keys_right = eval(config["keys"]["keys_right"])
-
-            self.use_image = eval(config["appearance"]["use_image"])
-            self.use_upper_image = eval(config["appearance"]["use_upper_image"])
-            self.left_color = eval(config["appearance"]["left_color"])
-            self.right_color = eval(config["appearance"]["right_color"])
-            self.mid_color = eval(config["appearance"]["mid_color"])
-            self.line_height = int(eval(config["appearance"]["line_height"]))
-            self.use_triangle = eval(config["appearance"]["use_triangle"])
-            self.use_two_triangle = eval(config["appearance"]["use_two_triangle"])
-            self.slider_width = eval(config["appearance"]["slider_width"])
-            self.slider_height = eval(config["appearance"]["slider_height"])
-            self.slider_color = eval(config["appearance"]["slider_color"])
-            self.welcome_message = "\n".join(
-                eval(config["appearance"]["welcome_message"])
-            )
-            self.hide_slider = eval(config["appearance"]["hide_slider"])
-        except Exception as e:
-            throw_config_error(e)
+        self.settings = settings
+        self.engine = engine
 
         # generic init
         self.master = master
         self.w, self.h = None, None
-        self.callback = callback
-        self.started = False
-        self.slider_value = self.start_value
+        self.start_text_id = None
+        self.trace = trace
+        self.dirty = True
+        self.drawn_changes = None
+        # position of the canvas on the screen for the 'pynput' mouse backend
+        self.screen_geometry = None
+        self.mouse_moved = False
 
         self.bind("<Configure>", self.update_size)
 
-        if self.use_mouse:
-            if self.on_click:
+        # motion events arrive at the polling rate of the mouse and are coalesced to 'mouse_rate'
+        self.mouse_coalescer = None
+        self.mouse_flush_thread = None
+        if self.settings.use_mouse and not self.settings.on_click:
+            self.mouse_coalescer = MouseCoalescer(engine, rate=self.settings.mouse_rate)
+            # events of the 'pynput' backend are flushed by one thread instead of TK
+            if self.settings.mouse_backend == "pynput":
+                self.mouse_flush_thread = MouseFlushThread(self.mouse_coalescer)
+                self.mouse_flush_thread.start()
+        # with the 'pynput' backend, the mouse is passed on by a 'MouseMonitor'
+        if self.settings.use_mouse and self.settings.mouse_backend == "tk":
+            if self.settings.on_click:
                 self.bind("<ButtonRelease-1>", self.update_mouse)
             else:
                 self.bind("<Motion>", self.update_mouse)
 
-        if (self.trigger_thermode) and (sys.platform == "win32"):
-            self.com = get_com(self.master.master)
-
-        # -------------------------------------------------------------------------------------------------------
-        # KeyMonitor class
-        # -------------------------------------------------------------------------------------------------------
-        class KeyMonitor:
-            def __init__(self, key_press_function, key_release_function):
-                super().__init__()
-                self.listener = Listener(
-                    on_press=self.on_press, on_release=self.on_release
-                )
-                self.key_release_fun = key_release_function
-                self.key_press_fun = key_press_function
-
-            def on_press(self, key):
-                self.key_press_fun(key)
-
-            def on_release(self, key):
-                self.key_release_fun(key)
-
-            def stop_monitoring(self):
-                self.listener.stop()
+    @property
+    def slider_value(self):
+        """Current value of the slider."""
+        return self.engine.value
 
-            def start_monitoring(self):
-                self.listener.start()
-
-        monitor = KeyMonitor(
-            key_press_function=self.key_press, key_release_function=self.key_release
-        )
-        monitor.start_monitoring()
+    @property
+    def started(self):
+        """Whether the recording was started."""
+        return self.engine.started
 
     def get_image_path(self, pattern="image.*"):
         """Finds paths for files with the given pattern and returns the first one.
@@ -574,61 +499,59 @@ class Slider(tk.Canvas):
             return
         self.w, self.h = w, h
 
-        # visualize the slider background
-        self.delete("all")
-        self.gradient_w, gradient_h = int(w * (1 - 2 * xpad)), self.line_height
+        # visualize the slider background - images are only resized if their size changed
+        self.gradient_w, gradient_h = int(w * (1 - 2 * xpad)), self.settings.line_height
         gradient_y = h * (ypad + (1 - 2 * ypad)) * gradfac
-        if self.use_image:
-            image_path = self.get_image_path()
-            im = PIL.Image.open(image_path)
-            gradient_img = im.resize(
-                (self.gradient_w, gradient_h), PIL.Image.Resampling.BILINEAR
-            )
-        else:
-            if self.mid_color is None:
-                gradient_img = PIL.Image.new("RGB", (2, 1))
-                pixel = gradient_img.load()
-                pixel[0, 0] = self.left_color
-                pixel[1, 0] = self.right_color
-            else:
-                gradient_img = PIL.Image.new("RGB", (3, 1))
-                pixel = gradient_img.load()
-                pixel[0, 0] = self.left_color
-                pixel[1, 0] = self.mid_color
-                pixel[2, 0] = self.right_color
-            gradient_img = gradient_img.resize(
-                (self.gradient_w, gradient_h), PIL.Image.Resampling.BILINEAR
-            )
-        self.gradient_img_tk = PIL.ImageTk.PhotoImage(gradient_img, master=self)
-        self.gradient_tk = self.create_image(
-            w / 2, gradient_y, anchor=CENTER, image=self.gradient_img_tk
+        self.gradient_img_tk = render_cache.photo_image(
+            key=(
+                "gradient",
+                self.gradient_w,
+                gradient_h,
+                self.settings.use_image,
+                self.settings.left_color,
+                self.settings.mid_color,
+                self.settings.right_color,
+            ),
+            create_image=lambda: self.create_gradient_image(
+                self.gradient_w, gradient_h
+            ),
+            master=self,
         )
+        self.gradient_tk = self.place_image(
+            getattr(self, "gradient_tk", None), w / 2, gradient_y, self.gradient_img_tk
+        )
+        self.cache_screen_geometry()
 
         # optionally, place an image above
-        if self.use_upper_image:
-            image_path = self.get_image_path(pattern="upper_image.*")
-            im = PIL.Image.open(image_path)
-            gradient_img = im.resize((w, 3 * gradient_h), PIL.Image.Resampling.BILINEAR)
-            self.upper_img_tk = PIL.ImageTk.PhotoImage(gradient_img, master=self)
-            self.upper_tk = self.create_image(
-                w / 2, h / 4, anchor=CENTER, image=self.upper_img_tk
+        if self.settings.use_upper_image:
+            self.upper_img_tk = render_cache.photo_image(
+                key=("upper_image", w, 3 * gradient_h),
+                create_image=lambda: render_cache.source_image(
+                    "upper_image.*", self.get_image_path
+                ).resize((w, 3 * gradient_h), PIL.Image.Resampling.BILINEAR),
+                master=self,
+            )
+            self.upper_tk = self.place_image(
+                getattr(self, "upper_tk", None), w / 2, h / 4, self.upper_img_tk
             )
 
+        # cut-outs, labels, lines and numbers depend on the full size and are redrawn
+        self.delete("static")
         semi_line_height = gradient_h * linefac / 2
         xs = linspace(w * xpad, w * (1 - xpad), 11)
 
-        if self.use_two_triangle or self.use_triangle:
+        if self.settings.use_two_triangle or self.settings.use_triangle:
             mid_x = xs[len(xs) // 2]  # x value in the middle
             quart_w = (mid_x - xs[0]) // 2  # width of one quartile of the VAS
             y_0 = gradient_y - gradient_h // 2  # y-coordinate where VAS gradient starts
             y_1 = gradient_y + gradient_h // 2  # y-coordinate where VAS gradient ends
 
-            if self.use_two_triangle:
+            if self.settings.use_two_triangle:
                 # --- Morin et al. 1998 „Pain Threshold“
                 points = [mid_x, y_0, mid_x, y_1, mid_x + quart_w + quart_w, y_0]
-                self.cut_out = self.create_polygon(points, fill="white")
+                self.cut_out = self.create_polygon(points, fill="white", tags="static")
                 points = [mid_x, y_0, mid_x, y_1, mid_x - quart_w - quart_w, y_0]
-                self.cut_out2 = self.create_polygon(points, fill="white")
+                self.cut_out2 = self.create_polygon(points, fill="white", tags="static")
             else:
                 points = [
                     mid_x - quart_w - quart_w,
@@ -638,69 +561,136 @@ class Slider(tk.Canvas):
                     mid_x + quart_w + quart_w,
                     y_0,
                 ]
-                self.cut_out2 = self.create_polygon(points, fill="white")
+                self.cut_out2 = self.create_polygon(points, fill="white", tags="static")
 
         # visualize the labels with optional bars and numbers
         y2 = (1 - textfac) * gradient_y + semi_line_height + textfac * h * (1 - ypad)
         offset = 20
         for i, x, text in zip(
-            linspace(start=self.range[0], stop=self.range[1], num=len(self.labels)),
+            linspace(
+                start=self.settings.range[0],
+                stop=self.settings.range[1],
+                num=len(self.settings.labels),
+            ),
             range(
                 int(xs[0]),
                 int(xs[-1]),
-                int((xs[-1] - xs[0]) // max((len(self.labels) - 1), 1)) - 1,
+                int((xs[-1] - xs[0]) // max((len(self.settings.labels) - 1), 1)) - 1,
             ),
-            self.labels,
+            self.settings.labels,
         ):
             x += i
             self.create_text(
                 x,
-                y2 + self.vertical_line_height + offset,
+                y2 + self.settings.vertical_line_height + offset,
                 text=text,
-                font=("DejaVu", self.label_size),
+                font=("DejaVu", self.settings.label_size),
                 anchor=CENTER,
                 justify="center",
                 fill="black",
+                tags="static",
             )
             # vertical lines
             y0, y1 = (
-                gradient_y - self.vertical_line_height,
-                gradient_y + self.vertical_line_height,
+                gradient_y - self.settings.vertical_line_height,
+                gradient_y + self.settings.vertical_line_height,
             )
-            self.create_line(*[x, y0, x, y1], fill="#000000", width=3)
-            if self.numbers:
+            self.create_line(*[x, y0, x, y1], fill="#000000", width=3, tags="static")
+            if self.settings.numbers:
                 value = str(round(i, 2)).rstrip("0").rstrip(".")
                 self.create_text(
                     x,
                     y1 + offset,
                     text=value,
-                    font=("DejaVu", self.number_size, "bold"),
+                    font=("DejaVu", self.settings.number_size, "bold"),
                     anchor=N,
                     fill="black",
+                    tags="static",
                 )
 
-        # create slider already if it should not be invisible at the start
-        if not self.hide_slider:
+        # create slider already if it should not be invisible at the start, it is placed with the next frame
+        if hasattr(self, "slider_tk"):
+            self.tag_raise(self.slider_tk)
+        elif not self.settings.hide_slider:
             self.create_slider()
 
         # create welcome message text
-        self.start_text_id = self.create_text(
-            w // 2,
-            h // 4,
-            text=self.welcome_message,
-            font=("DejaVu", 32),
-            anchor=CENTER,
-            justify="center",
-            fill="black",
-        )
+        if self.start_text_id is not None:
+            self.coords(self.start_text_id, w // 2, h // 4)
+            self.tag_raise(self.start_text_id)
+        elif not self.started:
+            self.start_text_id = self.create_text(
+                w // 2,
+                h // 4,
+                text=self.settings.welcome_message,
+                font=("DejaVu", 32),
+                anchor=CENTER,
+                justify="center",
+                fill="black",
+            )
+        self.dirty = True
+
+    def create_gradient_image(self, width, height):
+        """Creates the background image of the slider, either from the configured image or the colors.
+
+        Args:
+            width (int): Width of the image.
+            height (int): Height of the image.
+
+        Returns:
+            PIL.Image.Image: The background image.
+        """
+        if self.settings.use_image:
+            im = render_cache.source_image("image.*", self.get_image_path)
+            return im.resize((width, height), PIL.Image.Resampling.BILINEAR)
+
+        if self.settings.mid_color is None:
+            gradient_img = PIL.Image.new("RGB", (2, 1))
+            pixel = gradient_img.load()
+            pixel[0, 0] = self.settings.left_color
+            pixel[1, 0] = self.settings.right_color
+        else:
+            gradient_img = PIL.Image.new("RGB", (3, 1))
+            pixel = gradient_img.load()
+            pixel[0, 0] = self.settings.left_color
+            pixel[1, 0] = self.settings.mid_color
+            pixel[2, 0] = self.settings.right_color
+        return gradient_img.resize((width, height), PIL.Image.Resampling.BILINEAR)
+
+    def place_image(self, item, x, y, image):
+        """Places an image on the canvas. Existing items are moved instead of recreated.
+
+        Args:
+            item (int): Id of the existing canvas item or None.
+            x (float): x-coordinate of the image center.
+            y (float): y-coordinate of the image center.
+            image (PIL.ImageTk.PhotoImage): The image to show.
+
+        Returns:
+            int: Id of the canvas item.
+        """
+        if item is None:
+            return self.create_image(x, y, anchor=CENTER, image=image)
+        self.coords(item, x, y)
+        self.itemconfigure(item, image=image)
+        return item
 
     def create_slider(self):
         val = self.slider_value
-        self.slider_img = PIL.Image.new("RGBA", (1, 1), self.slider_color)
-        self.slider_img = self.slider_img.resize(
-            (self.slider_width, self.slider_height), PIL.Image.Resampling.NEAREST
+        self.slider_img_tk = render_cache.photo_image(
+            key=(
+                "slider",
+                self.settings.slider_width,
+                self.settings.slider_height,
+                self.settings.slider_color,
+            ),
+            create_image=lambda: PIL.Image.new(
+                "RGBA",
+                (self.settings.slider_width, self.settings.slider_height),
+                self.settings.slider_color,
+            ),
+            master=self,
         )
-        self.slider_img_tk = PIL.ImageTk.PhotoImage(self.slider_img, master=self)
         slider_x, slider_y = (
             self.w * ((1 - val) * xpad + val * (1 - xpad)),
             self.h * (ypad + (1 - 2 * ypad)) * gradfac,
@@ -709,266 +699,594 @@ class Slider(tk.Canvas):
             slider_x, slider_y, anchor=CENTER, image=self.slider_img_tk
         )
 
-    def key_release(self, key):
-        """Function triggered on a key release.
+    def update_mouse(self, event):
+        """Updates the slider on mouse move.
 
         Args:
-            key (Key): The released key.
+            event (event): The mouse move event.
         """
-        # reduce crashes on mac os when caps lock is pressed
-        if (sys.platform == "darwin") and (key == Key.caps_lock):
-            time.sleep(0.05)
+        event_ns = now_ns()
+        if not self.started:
             return
+        if self.trace is not None:
+            self.trace.received(event_ns)
 
-        self.check_start(key)
-        self.check_move(key)
+        if not hasattr(self, "slider_tk"):
+            self.create_slider()
+
+        # position of the mouse in relation to the slide, the engine calculates the value
+        self.move_to(
+            position=(event.x - (self.w * xpad)) / self.gradient_w,
+            event_ns=event_ns,
+            schedule_flush=lambda ns: self.after(
+                max(1, math.ceil(ns / 1e6)), self.mouse_coalescer.flush
+            ),
+        )
 
-    def key_press(self, key):
-        """Function triggered on a key press.
+    def screen_mouse(self, x, y, event_ns):
+        """Updates the slider on a mouse event of the 'pynput' backend. Called from the thread of the listener.
 
         Args:
-            key (Key): The pressed key.
+            x (int): Horizontal position of the mouse on the screen.
+            y (int): Vertical position of the mouse on the screen.
+            event_ns (int): Monotonic time of the event in nanoseconds.
         """
-        # reduce crashes on mac os when caps lock is pressed
-        if (sys.platform == "darwin") and (key == Key.caps_lock):
-            time.sleep(0.05)
+        geometry = self.screen_geometry
+        if not self.started or geometry is None:
             return
+        # like the events of the window, only react if the mouse is on the canvas
+        left, top, gradient_left, gradient_w = geometry
+        if not (left <= x < left + self.w and top <= y < top + self.h):
+            return
+        if self.trace is not None:
+            self.trace.received(event_ns)
+
+        # the slider is created by the next frame
+        self.mouse_moved = True
+        self.move_to(
+            position=(x - gradient_left) / gradient_w,
+            event_ns=event_ns,
+            schedule_flush=(
+                self.mouse_flush_thread.schedule
+                if self.mouse_flush_thread is not None
+                else None
+            ),
+        )
 
-        self.check_start(key)
-        if self.move_while_down:
-            self.check_move(key)
-
-    def check_start(self, key):
-        """Function to check whether the eVAS should be started.
-        Evaluates whether the pressed key is in the ones to start the eVAS.
-        If yes, optionally triggers the thermode and creates the callback thread.
-
-        Args:
-            key (Key): The pressed/released key.
-        """
-        if key in self.keys_start:
-            if not self.started:
-                self.started = True
-                self.start_time = time.time()
-
-                def callback_thread(each_sec=self.sampling_rate):
-                    start_time = time.time()
-                    while (not self.only_on_change) and (self.master.master.running):
-                        self.callback(self.slider_value, self.start_time)
-                        time.sleep(each_sec - ((time.time() - start_time) % each_sec))
-
-                if (self.trigger_thermode) and (sys.platform == "win32"):
-                    try:
-                        send_start_trigger(self.com)
-                        logging.info("trigger sent")
-                    except Exception as e:
-                        print(f"Error while sending trigger: '{e}'")
-                        logging.exception(e)
-
-                x = threading.Thread(target=callback_thread)
-                x.start()
-
-    def check_move(self, key):
-        """Function to check whether the slider should be moved upon key press.
-        Ends the eVAS upon escape, does nothing when eVAS was not started and moves slider right/left upon key stroke.
+    def move_to(self, position, event_ns, schedule_flush):
+        """Passes a mouse position on to the engine, coalesced to the 'mouse_rate' if it is a movement.
 
         Args:
-            key (Key): The pressed/released key.
+            position (float): Position on the scale, 0 at the left and 1 at the right end.
+            event_ns (int): Monotonic time of the event in nanoseconds.
+            schedule_flush (function): Called with the nanoseconds until the coalesced movements are applied.
         """
-        if key in self.keys_end:
-            self.master.master.running = False
-
-        if not self.started:
+        if self.mouse_coalescer is None:
+            self.engine.mouse(position=position, event_ns=event_ns)
             return
 
-        if (key in self.keys_right or key in self.keys_left) and (not self.use_mouse):
-
-            # get old value
-            old_value = self.slider_value
-
-            # +/- step_length + old_value -> new value
-            step_length = self.step_size
-            step = step_length if (key in self.keys_right) else -step_length
-            new_value = old_value + step
+        flush_ns = self.mouse_coalescer.push(position, event_ns)
+        if flush_ns is not None:
+            schedule_flush(flush_ns)
 
-            # clip to [0, 1]
-            new_value = clip(
-                value=new_value, min_value=self.range[0], max_value=self.range[1]
-            )
-
-            # set value
-            self.slider_value = new_value
-
-            if self.only_on_change:
-                self.callback(self.slider_value, self.start_time)
+    def cache_screen_geometry(self):
+        """Caches the position of the canvas and the gradient on the screen for the 'pynput' mouse backend."""
+        if self.w is None:
+            return
+        left, top = self.winfo_rootx(), self.winfo_rooty()
+        self.screen_geometry = (left, top, left + self.w * xpad, self.gradient_w)
 
-    def update_mouse(self, event):
-        """Updates the slider on mouse move.
+    def update_slider(self):
+        """Visualize the slider movement. Only redraws if the slider changed since the last call.
 
-        Args:
-            event (event): The mouse move event.
+        Returns:
+            bool: Whether the slider was moved.
         """
-        if not self.started:
-            return
-
-        if not hasattr(self, "slider_tk"):
+        if self.mouse_moved and not hasattr(self, "slider_tk"):
             self.create_slider()
 
-        # calculate new value depending on the mouse position in relation to the slide
-        new_value = ((event.x - (self.w * xpad)) / self.gradient_w) * (
-            self.range[1] - self.range[0]
-        ) + self.range[0]
-        # clip the value to the allowed range
-        new_value = clip(
-            value=new_value, min_value=self.range[0], max_value=self.range[1]
-        )
-        # limit the value to the allowed ranges - round to nearest multiple of 'step_size'
-        self.slider_value = round(new_value / self.step_size) * self.step_size
-
-        if self.only_on_change:
-            self.callback(self.slider_value, self.start_time)
+        changes = self.engine.changes
+        if not self.dirty and changes == self.drawn_changes:
+            return False
+        self.dirty = False
+        self.drawn_changes = changes
 
-    def update_slider(self):
-        """Visualize the slider movement."""
-
-        normalized_val = (self.slider_value - self.range[0]) / (
-            self.range[1] - self.range[0]
+        normalized_val = (self.slider_value - self.settings.range[0]) / (
+            self.settings.range[1] - self.settings.range[0]
         )
 
         # when the experiment just started
-        if self.started and (self.start_text_id in self.find_all()):
+        if self.started and (self.start_text_id is not None):
             self.delete(self.start_text_id)
+            self.start_text_id = None
+            # the window is placed on its monitor by now
+            self.cache_screen_geometry()
 
             # --- move cursor to location of slider
             # tk pads the window automatically - get the padding on the left side
-            tk_pad = (self.master.master.winfo_width() - self.w) // 2
+            window = self.winfo_toplevel()
+            tk_pad = (window.winfo_width() - self.w) // 2
             # calculate own padding
             x_pad = self.w * xpad
             # x position on gradient
             gradient_x = self.gradient_w * normalized_val
             # cursor position is tk padding + own padding + position on the gradient
             x = int(tk_pad + x_pad + gradient_x)
-            y = int(self.master.master.winfo_height() // 2)
-            pyautogui.moveTo(x + self.master.master.monitor.x, y)
+            y = int(window.winfo_height() // 2)
+            # preloaded in the background after the first frame
+            import pyautogui
+
+            pyautogui.moveTo(x + window.monitor.x, y)
 
         # if the background and slider are not initialized
-        if not hasattr(self, "slider_tk") or not self.master.master.running:
-            return
+        if not hasattr(self, "slider_tk") or not self.engine.running:
+            return False
 
         # place the slider accordingly
-        w, h, f = self.winfo_width(), self.winfo_height(), normalized_val
+        w, h, f = self.w, self.h, normalized_val
         slider_x, slider_y = (
             w * ((1 - f) * xpad + f * (1 - xpad)),
             h * (ypad + (1 - 2 * ypad)) * gradfac,
         )
         self.coords(self.slider_tk, slider_x, slider_y)
+        if self.trace is not None:
+            self.trace.shown(self.engine.value_event_ns)
+        return True
+
+
+def preload_modules():
+    """Imports modules that are needed once the recording is started, so they are not imported on the first key press."""
+    try:
+        import pyautogui
+    except Exception as e:
+        logging.exception(e)
 
 
 class vas_thread(threading.Thread):
-    def __init__(self):
+    def __init__(self, settings):
         threading.Thread.__init__(self)
 
-        self.filename = (
+        self.settings = settings
+        # name and settings of each scale, a single scale is saved to the 'values' column
+        self.scales = settings.scales or (("values", settings),)
+        self.first_frame_shown = False
+
+        extension = "bin" if self.settings.output_format == "binary" else "csv"
+        # path of the recording without extension, shared by the files saved next to it
+        self.base_filename = (
             current_path
             + os.sep
-            + "{}_vas.csv".format(datetime.now().strftime("%Y%m%d_%H%M%S"))
+            + "{}_vas".format(datetime.now().strftime("%Y%m%d_%H%M%S"))
         )
+        self.filename = self.base_filename + "." + extension
+        if self.settings.compression is not None:
+            from compression import COMPRESSED_EXTENSION
 
-        try:
-            # csv options
-            self.delimiter = config["csv"]["delimiter"]
-            self.decimal_point = config["csv"]["decimal_point"]
-            self.decimal_places = int(config["csv"]["decimal_places"])
-            self.save_config_in_csv = eval(config["csv"]["save_config_in_csv"])
-        except Exception as e:
-            throw_config_error(e)
+            self.filename += COMPRESSED_EXTENSION
+
+    def create_sample_format(self):
+        """Creates the format of the output file according to the config.
+
+        Returns:
+            CsvFormat or BinaryFormat: The format used by the recording writer.
+        """
+        with open(os.path.join(current_path, config_file_name)) as f:
+            config_lines = f.readlines()
+        # the config of the recording, also hashed in the session index
+        self.config_text = "".join(config_lines)
+
+        if self.settings.output_format == "binary":
+            return BinaryFormat(
+                config_text=self.config_text,
+                csv_options={
+                    "delimiter": self.settings.delimiter,
+                    "decimal_point": self.settings.decimal_point,
+                    "decimal_places": self.settings.decimal_places,
+                    "save_config_in_csv": self.settings.save_config_in_csv,
+                    "save_clock_anchor": self.settings.save_clock_anchor,
+                },
+                columns=[name for name, _ in self.scales],
+            )
+
+        return CsvFormat(
+            delimiter=self.settings.delimiter,
+            decimal_point=self.settings.decimal_point,
+            decimal_places=self.settings.decimal_places,
+            header_lines=config_lines if self.settings.save_config_in_csv else [],
+            columns=[name for name, _ in self.scales],
+        )
 
     def run(self):
 
-        @contextmanager
-        def callback_context():
+        # optionally trace the latency of each input event
+        self.trace = None
+        if self.settings.save_latency_trace:
+            from latency_trace import LatencyTrace
+
+            self.trace = LatencyTrace(
+                filename=self.base_filename + "_trace.bin",
+                flush_interval=self.settings.flush_interval,
+            )
 
-            with open(self.filename, "w+") as f_output:
-                assert f_output is not None
+        # summary of the written samples for the session index
+        self.session_stats = None
+        if self.settings.save_session_index:
+            from session_index import SessionStats
+
+            self.session_stats = SessionStats([name for name, _ in self.scales])
+        self.clock_anchor = None
+
+        def on_write(samples):
+            if self.session_stats is not None:
+                self.session_stats.update(samples)
+            if self.trace is not None:
+                self.trace.written(samples)
+
+        writer_options = {
+            "filename": self.filename,
+            "sample_format": self.create_sample_format(),
+            "flush_interval": self.settings.flush_interval,
+            "fsync_interval": self.settings.fsync_interval,
+            "fsync_samples": self.settings.fsync_samples,
+            "journal": True,
+            "codec": self.settings.compression,
+        }
+        # optionally send the values to another computer while recording
+        stream_options = None
+        if self.settings.stream_address is not None:
+            stream_options = {
+                "address": self.settings.stream_address,
+                "protocol": self.settings.stream_protocol,
+                "batch_interval": self.settings.stream_batch_interval,
+                "sync_interval": self.settings.stream_sync_interval,
+                "columns": len(self.scales),
+            }
+
+        # optionally tune the garbage collection, priority and CPU affinity during the recording
+        self.tuning = None
+        if any(
+            [
+                self.settings.gc_freeze,
+                self.settings.disable_gc,
+                self.settings.gc_threshold,
+                self.settings.process_priority,
+                self.settings.thread_priority,
+                self.settings.sampling_cpus,
+                self.settings.writer_cpus,
+            ]
+        ):
+            from performance import RuntimeTuning
+
+            self.tuning = RuntimeTuning.from_settings(self.settings)
+
+        self.stream = None
+        if self.settings.recorder_process:
+            # the values are sampled, written and streamed by another process
+            from recorder_process import RecorderProcess
+
+            self.writer = RecorderProcess(
+                writer_options=writer_options,
+                columns=[name for name, _ in self.scales],
+                sampling_rate=self.settings.sampling_rate,
+                spin_time=self.settings.spin_time,
+                only_on_change=self.settings.only_on_change,
+                stream_options=stream_options,
+                tuning=self.tuning,
+            )
+        else:
+            self.writer = RecordingWriter(**writer_options, on_write=on_write)
+            if stream_options is not None:
+                from live_stream import SampleStream
 
-                if f_output.tell() == 0:
-                    if self.save_config_in_csv:
-                        with open(config_file_name) as f:
-                            lines = f.readlines()
-                            for line in lines:
-                                f_output.write(line)
+                self.stream = SampleStream(**stream_options)
 
-                    f_output.write(f"secs{self.delimiter}values\n")
-                else:
-                    f_output.write("\n")
+        # optionally publish the current value in shared memory
+        self.live_value = None
+        if self.settings.live_value_file is not None:
+            from live_value import LiveValue
 
-                def callback(slider_value, start_time):
+            self.live_value = LiveValue(
+                path=os.path.join(current_path, self.settings.live_value_file),
+                columns=len(self.scales),
+            )
 
-                    if slider_value is None or f_output.closed:
-                        return
+        def callback(ns, slider_value):
 
-                    secs = str(round(time.time() - start_time, 2))
-                    value = str(round(slider_value, self.decimal_places))
-                    if self.decimal_point != ".":
-                        secs = secs.replace(".", self.decimal_point)
-                        value = value.replace(".", self.decimal_point)
-                    f_output.write(f"{secs}{self.delimiter}{value}\n")
+            if slider_value is None:
+                return
 
-                yield callback
+            self.writer.push(ns, slider_value)
+            if self.stream is not None:
+                self.stream.push(ns, slider_value)
+
+        def on_start(clock_anchor, metadata):
+            self.clock_anchor = clock_anchor
+            if self.tuning is not None:
+                self.tuning.apply()
+            # binary recordings always carry the clock anchor
+            if (
+                self.settings.save_clock_anchor
+                or self.settings.output_format == "binary"
+            ):
+                self.writer.add_metadata(clock_anchor.metadata())
+            # e.g. the latency of the thermode trigger
+            self.writer.add_metadata(metadata)
+            if self.trace is not None:
+                self.trace.add_metadata(clock_anchor.metadata())
+            if self.stream is not None:
+                self.stream.start_recording(clock_anchor)
+            if self.live_value is not None:
+                self.live_value.start_recording(clock_anchor, self.scale_group.values())
+            # the metadata is sent before, so it is written with the header
+            if self.settings.recorder_process:
+                self.writer.start_recording(clock_anchor, self.scale_group.values())
+
+        def on_change(event_ns, value):
+            if self.live_value is not None:
+                self.live_value.publish(event_ns, value)
+            if self.settings.recorder_process and not self.settings.only_on_change:
+                self.writer.set_value(event_ns, value)
 
         # get information about screens
-        monitors = get_monitors()
-        monitor_index = -1 if eval(config["general"]["use_second_screen"]) else 0
-        monitor = monitors[monitor_index]
+        with startup_profile.phase("monitor discovery"):
+            from screeninfo import get_monitors
+
+            monitors = get_monitors()
 
+        # the first scale is shown in the root window, further scales in their own windows
         self.root = tk.Tk()
-        self.root.title("eVAS")
-        self.root.wm_attributes("-topmost", 1)
         self.root.running = True
-        self.root.monitor = monitor
+        windows = [self.root] + [tk.Toplevel(self.root) for _ in self.scales[1:]]
+        used_monitors = []
+        for window, (name, settings) in zip(windows, self.scales):
+            used_monitors.append(self.select_monitor(monitors, settings))
+            self.setup_window(window, used_monitors[-1])
+        from frame_timing import FrameScheduler
+
+        self.frame_scheduler = FrameScheduler(self.select_frame_rate(used_monitors))
 
         # set an icon
         icon_path = f"{os.path.dirname(__file__)}/images/icon.png"
         icon_path = icon_path.replace("\\", "/")
         self.root.iconphoto(True, PIL.ImageTk.PhotoImage(file=icon_path))
 
+        trigger_device = None
+        if (self.settings.trigger_thermode) and (sys.platform == "win32"):
+            trigger_device = open_trigger_device(self.root)
+
+        def on_end():
+            self.root.running = False
+
+        self.scale_group = ScaleGroup(
+            settings=self.settings,
+            scale_settings=[settings for _, settings in self.scales],
+            on_sample=callback,
+            on_start=on_start,
+            on_end=on_end,
+            trigger_device=trigger_device,
+            trace=self.trace,
+            on_change=(
+                on_change
+                if self.live_value is not None or self.settings.recorder_process
+                else None
+            ),
+            sampling=not self.settings.recorder_process,
+            tuning=self.tuning,
+        )
+        if self.live_value is not None:
+            from live_value import STATE_WAITING
+
+            self.live_value.publish(
+                now_ns(), self.scale_group.values(), state=STATE_WAITING
+            )
+
+        self.writer.start()
+        if self.tuning is not None and not self.settings.recorder_process:
+            self.tuning.tune_writer_thread(self.writer)
+        if self.trace is not None:
+            self.trace.start()
+        if self.stream is not None:
+            self.stream.start()
+        try:
+            self.covas_frames = [
+                Covas(
+                    master=window,
+                    engine=engine,
+                    settings=engine.settings,
+                    grab=len(self.scales) == 1,
+                    trace=self.trace,
+                )
+                for window, engine in zip(windows, self.scale_group.engines)
+            ]
+            for window in windows:
+                window.deiconify()
+
+            # one keyboard listener for all scales
+            KeyMonitor(
+                key_press_function=self.scale_group.key_press,
+                key_release_function=self.scale_group.key_release,
+            ).start_monitoring()
+
+            # optionally one mouse listener for all scales, each slider checks if the mouse is on it
+            if self.settings.use_mouse and self.settings.mouse_backend == "pynput":
+                sliders = [covas.slider for covas in self.covas_frames]
+
+                def mouse_event(x, y, event_ns):
+                    for slider in sliders:
+                        slider.screen_mouse(x, y, event_ns)
+
+                MouseMonitor(
+                    mouse_function=mouse_event, on_click=self.settings.on_click
+                ).start_monitoring()
+
+            # render frames until the eVAS is ended
+            self.root.after(0, self.render_frame)
+            self.root.mainloop()
+
+            self.end()
+            for covas in self.covas_frames:
+                if covas.slider.mouse_flush_thread is not None:
+                    covas.slider.mouse_flush_thread.stop()
+                coalescer = covas.slider.mouse_coalescer
+                if coalescer is not None and coalescer.events:
+                    logging.info(
+                        f"{coalescer.applied} of {coalescer.events} mouse motion events were applied."
+                    )
+        finally:
+            # write the remaining samples
+            self.writer.close()
+            if self.settings.recorder_process and self.session_stats is not None:
+                self.session_stats = self.writer.session_stats
+            if self.trace is not None:
+                self.trace.close()
+            if self.stream is not None:
+                self.stream.close()
+            if self.live_value is not None:
+                self.live_value.close(now_ns(), self.scale_group.values())
+            if trigger_device is not None:
+                trigger_device.close()
+            if self.tuning is not None:
+                self.tuning.restore()
+
+        if self.settings.save_frame_stats and self.writer.samples_written:
+            try:
+                self.frame_scheduler.save(self.base_filename + "_frames.json")
+            except OSError as e:
+                logging.exception(e)
+        if self.frame_scheduler.dropped_frames:
+            logging.warning(
+                f"{self.frame_scheduler.dropped_frames} of {self.frame_scheduler.frames + self.frame_scheduler.dropped_frames} frames were dropped."
+            )
+
+        # remove file if no data was saved
+        if self.writer.samples_written == 0 and os.path.isfile(self.filename):
+            os.remove(self.filename)
+            if self.trace is not None and os.path.isfile(self.trace.writer.filename):
+                os.remove(self.trace.writer.filename)
+        elif self.settings.save_session_index:
+            self.register_session()
+
+    def register_session(self):
+        """Adds the recording to the session index."""
+        import sqlite3
+        import session_index
+
+        start = None
+        if self.clock_anchor is not None:
+            start = datetime.fromtimestamp(self.clock_anchor.wall_ns / 1e9)
+
+        try:
+            connection = session_index.connect(
+                os.path.join(current_path, session_index.INDEX_FILE_NAME)
+            )
+            try:
+                session_index.register_session(
+                    connection,
+                    self.filename,
+                    self.session_stats,
+                    start,
+                    self.config_text,
+                )
+            finally:
+                connection.close()
+        except (sqlite3.Error, OSError) as e:
+            logging.exception(e)
+
+    def select_monitor(self, monitors, settings):
+        """Returns the monitor to show a scale on.
+
+        Args:
+            monitors (list): The available monitors.
+            settings (Settings): The settings of the scale.
+
+        Returns:
+            Monitor: The configured monitor, or the second/first one if none is configured.
+        """
+        if settings.monitor is None:
+            return monitors[-1 if settings.use_second_screen else 0]
+        if settings.monitor >= len(monitors):
+            logging.warning(
+                f"Monitor {settings.monitor} is not available, using the last monitor."
+            )
+        return monitors[min(settings.monitor, len(monitors) - 1)]
+
+    def select_frame_rate(self, monitors):
+        """Returns the frame rate to render the scales with.
+
+        Args:
+            monitors (list): The monitors the scales are shown on.
+
+        Returns:
+            float: The configured frame rate or the highest refresh rate of the monitors.
+        """
+        if self.settings.frame_rate is not None:
+            return self.settings.frame_rate
+        from frame_timing import DEFAULT_FRAME_RATE, refresh_rates
+
+        rates = [rate for rate in refresh_rates(monitors) if rate is not None]
+        rate = max(rates, default=DEFAULT_FRAME_RATE)
+        logging.info(f"Rendering with the refresh rate of the monitor: {rate} Hz.")
+        return rate
+
+    def setup_window(self, window, monitor):
+        """Shows a window in fullscreen on the given monitor.
+
+        Args:
+            window (tk.Tk or tk.Toplevel): The window.
+            monitor (Monitor): The monitor to show the window on.
+        """
+        window.title("eVAS")
+        window.wm_attributes("-topmost", 1)
+        window.monitor = monitor
+
         # bind window close to end function
-        self.root.protocol("WM_DELETE_WINDOW", self.end)
+        window.protocol("WM_DELETE_WINDOW", self.end)
 
         # set to fullscreen on the correct monitor
-        self.root.geometry(f"{monitor.width}x{monitor.height}+{monitor.x}+0")
+        window.geometry(f"{monitor.width}x{monitor.height}+{monitor.x}+0")
 
         if sys.platform == "win32":
             # remove 'upper bar with close, maximize and minimize options' and taskbar icon in windows
-            self.root.overrideredirect(1)
+            window.overrideredirect(1)
         elif sys.platform == "linux":
             # enter full screen mode
-            self.root.attributes("-fullscreen", True)
-
-        with callback_context() as callback:
-            covas_frame = Covas(master=self.root, callback=callback)
-            self.root.deiconify()
-            self.root.update()
-
-            while self.root.running:
-                covas_frame.update_idletasks()
-                covas_frame.update()
-                # reduce (cpu) load in while loop
-                time.sleep(1 / 50)
+            window.attributes("-fullscreen", True)
 
+    def render_frame(self):
+        """Renders a frame of all scales and schedules the next one. Ends the eVAS once it is not running anymore."""
+        if not self.root.running:
             self.end()
+            return
 
-        # remove file if no data was saved
-        remove = True
-        for i, _ in enumerate(open(self.filename, "r").readlines()):
-            if i > 0:
-                remove = False
-                break
-        if remove:
-            os.remove(self.filename)
+        start_ns = self.frame_scheduler.frame_started()
+        drawn = False
+        for covas_frame in self.covas_frames:
+            drawn = covas_frame.slider.update_slider() or drawn
+
+        # another instance was started, bring the window to the front
+        if focus_requested.is_set():
+            focus_requested.clear()
+            self.root.deiconify()
+            self.root.lift()
+            self.root.focus_force()
+
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            self.root.update_idletasks()
+            startup_profile.mark("first frame")
+            startup_profile.finish(os.path.join(current_path, "startup_profile.txt"))
+            # import modules needed on start of the recording in the background
+            threading.Thread(target=preload_modules, daemon=True).start()
+
+        self.root.after(
+            self.frame_scheduler.frame_finished(start_ns, drawn), self.render_frame
+        )
 
     def end(self):
         self.root.running = False
+        # stop sampling
+        if hasattr(self, "scale_group"):
+            self.scale_group.stop()
         try:
             self.root.update()
             self.root.destroy()
@@ -980,28 +1298,6 @@ class vas_thread(threading.Thread):
 # Update
 
 
-def is_update_available():
-    """Checks whether there is a new release on GitHub available.
-
-    Returns:
-        bool: Whether a new release is available.
-    """
-    try:
-        # get info from the latest release from github
-        response = requests.get(
-            "https://api.github.com/repos/gouverneurp/eVAS/releases/latest"
-        )
-        # retrieve the version of the release
-        server_version = response.json()["tag_name"]
-        # compare to current version
-        return version.parse(app_version) < version.parse(server_version)
-
-    except Exception as e:
-        print(f"Error while checking for update: '{e}'")
-        logging.exception(e)
-        return False
-
-
 def perform_windows_update():
     """Function to automatically perform an update of the application on Windows.
     First, the newest version of the application is downloaded.
@@ -1010,6 +1306,8 @@ def perform_windows_update():
 
     Application should stop and restart with the updated version.
     """
+    from urllib.request import urlretrieve
+
     # get latest application from github
     url = "https://github.com/gouverneurp/eVAS/releases/latest/download/eVAS.exe"
     filename = "eVAS_new.exe"
@@ -1040,13 +1338,41 @@ def perform_windows_update():
     sys.exit()
 
 
-def check_for_update():
-    """Function to check if an update is available.
+def start_update_check(settings):
+    """Starts the check for a new release on GitHub in the background.
+
+    Args:
+        settings (Settings): The settings of the eVAS.
+
+    Returns:
+        UpdateChecker: The running check or None if update checks are disabled.
+    """
+    if settings.update_check_interval is None:
+        return None
+
+    from update_check import RELEASES_URL, UpdateChecker
+
+    update_checker = UpdateChecker(
+        current_version=app_version,
+        state_path=os.path.join(current_path, update_state_file_name),
+        check_interval=settings.update_check_interval,
+        # can be set to a local stand-in for testing
+        url=os.environ.get("EVAS_UPDATE_URL", RELEASES_URL),
+    )
+    update_checker.start()
+    return update_checker
+
+
+def check_for_update(update_checker):
+    """Function to check if an update is available. Should be called after the session ended.
     Depending on the OS, an automated update or redirect to the download page is performed.
+
+    Args:
+        update_checker (UpdateChecker): The update check started with 'start_update_check()' or None.
     """
     try:
 
-        if is_update_available():
+        if update_checker is not None and update_checker.is_update_available(wait=1):
 
             if not sys.platform == "win32":
                 answer = message(
@@ -1057,6 +1383,8 @@ def check_for_update():
                     + "Do you want to open the download page?",
                 )
                 if answer == "yes":
+                    import webbrowser
+
                     webbrowser.open_new(url="https://gouverneurp.github.io/evas.html")
                     sys.exit()
                 return
@@ -1120,8 +1448,8 @@ def main():
     """Main function of the eVAS.
 
     Checks whether the appropriate rights are given under MacOS, if the app is already running,
-    creates a default config file if none exists, reads and evaluates the config file, checks for updates,
-    and eventually starts the eVAS.
+    creates a default config file if none exists, reads and evaluates the config file, starts the update check,
+    starts the eVAS and eventually offers available updates.
     """
 
     # under MAC OS
@@ -1157,12 +1485,18 @@ def main():
             )
 
             if answer == "yes":
+                import webbrowser
+
                 webbrowser.open_new(
                     url="https://github.com/gouverneurp/eVAS/blob/main/tutorials/mac_not_trusted.md"
                 )
             return
 
-    if is_already_running():
+    with startup_profile.phase("is_already_running"):
+        is_only_instance = acquire_instance_lock()
+    if not is_only_instance:
+        # bring the running window to the front before the message blocks
+        instance_lock.request_focus()
         message(
             showinfo,
             title="eVAS: Warning",
@@ -1170,26 +1504,41 @@ def main():
         )
         return
 
-    global config
-    # create a config file if none is existing
-    if not os.path.isfile(os.path.join(current_path, config_file_name)):
-        config = create_config()
-        write_config(config=config)
+    # read the config file or the cached settings
+    with startup_profile.phase("config load"):
+        settings = load_settings()
 
-    # read and check config
-    config = read_config()
-    config = eval_config(config)
+    # repair recordings of a previous session that ended without closing the file
+    with startup_profile.phase("recovery"):
+        recovered = recover_recordings(current_path)
+    if recovered:
+        names = ", ".join(f"'{os.path.basename(x)}'" for x in recovered)
+        message(
+            showinfo,
+            title="eVAS: Warning",
+            message=f"The recording(s) {names} of a previous session were not closed properly, e.g. due to a crash. "
+            + "Incomplete values at their end were removed.",
+        )
 
-    # check for updates: new releases on GitHub
-    check_for_update()
+    # check for updates in the background: new releases on GitHub
+    with startup_profile.phase("check_for_update"):
+        update_checker = start_update_check(settings)
 
     # start the vas
     global vas
-    vas = vas_thread()
+    vas = vas_thread(settings=settings)
     vas.run()
 
+    # ask for the update only after the session ended
+    check_for_update(update_checker)
+
 
 if __name__ == "__main__":
+    # the recorder process of frozen executables starts here
+    if getattr(sys, "frozen", False):
+        import multiprocessing
+
+        multiprocessing.freeze_support()
     main()
 
     logging.shutdown()
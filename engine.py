@@ -0,0 +1,547 @@
+"""
+Headless core of the eVAS.
+
+'SliderEngine' is a state machine that turns input events into slider values and samples for the recorder.
+It has no dependency on TK or pynput, so the full input -> value -> file pipeline can run without a display,
+e.g. for regression tests and benchmarks. The TK 'Slider' is a view on top of it.
+'ScaleGroup' starts, samples and records one or more engines together on a common clock.
+'MouseCoalescer' limits the rate at which mouse motion is applied to an engine.
+"""
+
+import logging
+import threading
+
+from timing import ClockAnchor, SamplingScheduler, now_ns
+
+
+def clip(value, min_value, max_value):
+    return max(min_value, min(value, max_value))
+
+
+def fire_trigger(trigger_device, event_ns):
+    """Triggers the thermode.
+
+    Args:
+        trigger_device (TriggerDevice): The device to trigger or None.
+        event_ns (int): Monotonic time of the causing event in nanoseconds or None.
+
+    Returns:
+        dict: Metadata of the trigger, i.e. its latency.
+    """
+    metadata = {}
+    if trigger_device is not None:
+        try:
+            latency_ns = trigger_device.fire(event_ns=event_ns)
+            logging.info("trigger sent")
+            if latency_ns is not None:
+                metadata["trigger_latency_ms"] = round(latency_ns / 1e6, 3)
+        except Exception as e:
+            print(f"Error while sending trigger: '{e}'")
+            logging.exception(e)
+    return metadata
+
+
+class SliderEngine:
+    """State machine of a slider: start, value changes and end of a recording."""
+
+    def __init__(
+        self,
+        settings,
+        on_sample,
+        on_start=None,
+        on_end=None,
+        trigger_device=None,
+        trace=None,
+        on_change=None,
+    ):
+        """
+        Args:
+            settings (Settings): The settings of the eVAS.
+            on_sample (function): Called with the nanoseconds since the start and the value of each sample.
+            on_start (function, optional): Called with the 'ClockAnchor' and a dict of metadata on start. Defaults to None.
+            on_end (function, optional): Called when an end key is pressed. Defaults to None.
+            trigger_device (TriggerDevice, optional): Device triggered on start. Defaults to None.
+            trace (LatencyTrace, optional): Trace stamped with the value updates and samples. Defaults to None.
+            on_change (function, optional): Called with the monotonic time of the causing event and the new value
+                on every change of the value, independent of the sampling. Defaults to None.
+        """
+        self.settings = settings
+        self.on_sample = on_sample
+        self.on_start = on_start
+        self.on_end = on_end
+        self.trigger_device = trigger_device
+        self.trace = trace
+        self.on_change = on_change
+
+        self.value = settings.start_value
+        self.started = False
+        self.running = True
+        self.start_ns = None
+        self.clock_anchor = None
+        # incremented on every change that needs to be shown
+        self.changes = 0
+        # monotonic time of the input event that caused the current value
+        self.value_event_ns = None
+
+    def set_value(self, value, event_ns):
+        """Sets the value of the slider and records it if values are saved on change.
+
+        Args:
+            value (float): The new value.
+            event_ns (int): Monotonic time of the causing event in nanoseconds.
+        """
+        self.value = value
+        self.value_event_ns = event_ns
+        self.changes += 1
+        if self.trace is not None:
+            self.trace.updated(event_ns)
+        if self.on_change is not None:
+            self.on_change(event_ns, value)
+        if self.settings.only_on_change:
+            self.record(event_ns - self.start_ns, value)
+
+    def sample(self, sample_ns=None):
+        """Records the current value.
+
+        Args:
+            sample_ns (int, optional): Monotonic time of the sample in nanoseconds. Defaults to now.
+        """
+        if sample_ns is None:
+            sample_ns = now_ns()
+        self.record(sample_ns - self.start_ns, self.value)
+
+    def record(self, ns, value):
+        """Passes a sample on to 'on_sample'.
+
+        Args:
+            ns (int): Nanoseconds since the start.
+            value (float): The value.
+        """
+        if self.trace is not None and self.value_event_ns is not None:
+            self.trace.sampled(ns, self.value_event_ns)
+        self.on_sample(ns, value)
+
+    def key_press(self, key, event_ns=None):
+        """Handles a key press.
+
+        Args:
+            key (Key): The pressed key.
+            event_ns (int, optional): Monotonic time of the event in nanoseconds. Defaults to now.
+        """
+        event_ns = now_ns() if event_ns is None else event_ns
+        self.check_start(key, event_ns)
+        if self.settings.move_while_down:
+            self.check_move(key, event_ns)
+
+    def key_release(self, key, event_ns=None):
+        """Handles a key release.
+
+        Args:
+            key (Key): The released key.
+            event_ns (int, optional): Monotonic time of the event in nanoseconds. Defaults to now.
+        """
+        event_ns = now_ns() if event_ns is None else event_ns
+        self.check_start(key, event_ns)
+        self.check_move(key, event_ns)
+
+    def check_start(self, key, event_ns, sampling=True):
+        """Starts the recording if the key is one to start the eVAS.
+
+        Args:
+            key (Key): The pressed/released key.
+            event_ns (int): Monotonic time of the event in nanoseconds.
+            sampling (bool, optional): Whether to start the sampling thread. Defaults to True.
+        """
+        if key in self.settings.keys_start and not self.started:
+            self.start(event_ns, sampling=sampling)
+
+    def start(self, event_ns=None, sampling=True, clock_anchor=None):
+        """Starts the recording: optionally triggers the thermode and starts sampling.
+
+        Args:
+            event_ns (int, optional): Monotonic time of the causing event in nanoseconds. Defaults to None.
+            sampling (bool, optional): Whether to start the sampling thread if values are not only saved on change.
+                Headless runs can call 'sample()' themselves instead. Defaults to True.
+            clock_anchor (ClockAnchor, optional): Anchor shared with other engines. Defaults to a new anchor.
+        """
+        self.started = True
+        self.changes += 1
+        self.clock_anchor = clock_anchor or ClockAnchor()
+        self.start_ns = self.clock_anchor.monotonic_ns
+
+        metadata = fire_trigger(self.trigger_device, event_ns)
+
+        if self.on_start is not None:
+            self.on_start(self.clock_anchor, metadata)
+
+        if sampling and not self.settings.only_on_change:
+            threading.Thread(target=self.run_sampling, name="Sampling").start()
+
+    def run_sampling(self):
+        """Samples the value in the configured sampling rate until the engine is stopped."""
+        scheduler = SamplingScheduler(
+            interval=self.settings.sampling_rate, spin_time=self.settings.spin_time
+        )
+        scheduler.run(
+            function=self.sample,
+            is_running=lambda: self.running,
+            start_ns=self.start_ns,
+        )
+
+    def check_move(self, key, event_ns):
+        """Ends the eVAS upon an end key, does nothing when eVAS was not started and moves the slider right/left upon key stroke.
+
+        Args:
+            key (Key): The pressed/released key.
+            event_ns (int): Monotonic time of the event in nanoseconds.
+        """
+        if key in self.settings.keys_end:
+            self.stop()
+            if self.on_end is not None:
+                self.on_end()
+
+        if not self.started:
+            return
+
+        keys_right, keys_left = self.settings.keys_right, self.settings.keys_left
+        if (key in keys_right or key in keys_left) and (not self.settings.use_mouse):
+
+            # +/- step_length + old_value -> new value
+            step_length = self.settings.step_size
+            step = step_length if (key in keys_right) else -step_length
+            new_value = self.value + step
+
+            # clip to the range
+            new_value = clip(
+                value=new_value,
+                min_value=self.settings.range[0],
+                max_value=self.settings.range[1],
+            )
+
+            self.set_value(new_value, event_ns)
+
+    def mouse(self, position, event_ns=None):
+        """Moves the slider to a mouse position.
+
+        Args:
+            position (float): Position on the scale, 0 at the left and 1 at the right end.
+            event_ns (int, optional): Monotonic time of the event in nanoseconds. Defaults to now.
+        """
+        if not self.started:
+            return
+        event_ns = now_ns() if event_ns is None else event_ns
+
+        low, high = self.settings.range
+        # calculate new value depending on the mouse position in relation to the slide
+        new_value = position * (high - low) + low
+        # clip the value to the allowed range
+        new_value = clip(value=new_value, min_value=low, max_value=high)
+        # limit the value to the allowed ranges - round to nearest multiple of 'step_size'
+        new_value = round(new_value / self.settings.step_size) * self.settings.step_size
+
+        self.set_value(new_value, event_ns)
+
+    def stop(self):
+        """Stops the engine and its sampling."""
+        self.running = False
+
+
+class MouseCoalescer:
+    """Applies mouse motion to an engine at a maximum rate.
+
+    A motion event is applied immediately if the last applied event is at least one interval ago. Otherwise only
+    its position and the time of the event are kept, replacing an earlier pending event, and applied by 'flush()'.
+    Applied values keep the time of their raw event, so coalescing reduces the number of samples but not the
+    accuracy of their timestamps.
+    """
+
+    def __init__(self, engine, rate=None):
+        """
+        Args:
+            engine (SliderEngine): The engine to move.
+            rate (float, optional): Maximum number of applied events per second. None to apply every event. Defaults to None.
+        """
+        self.engine = engine
+        self.interval_ns = None if rate is None else int(1e9 / rate)
+        self.pending = None
+        self.last_applied_ns = None
+        # number of received and applied motion events
+        self.events = 0
+        self.applied = 0
+        # events and flushes may come from different threads
+        self._lock = threading.Lock()
+
+    def push(self, position, event_ns):
+        """Applies a motion event or keeps it until the next flush.
+
+        Args:
+            position (float): Position on the scale, 0 at the left and 1 at the right end.
+            event_ns (int): Monotonic time of the event in nanoseconds.
+
+        Returns:
+            int: Nanoseconds until 'flush()' should be called, or None if no new flush is needed.
+        """
+        with self._lock:
+            self.events += 1
+            if (
+                self.interval_ns is None
+                or self.last_applied_ns is None
+                or event_ns - self.last_applied_ns >= self.interval_ns
+            ):
+                self.pending = None
+                self.apply(position, event_ns)
+                return None
+
+            flush_scheduled = self.pending is not None
+            self.pending = (position, event_ns)
+            if flush_scheduled:
+                return None
+            return self.last_applied_ns + self.interval_ns - event_ns
+
+    def flush(self):
+        """Applies the pending motion event, if any."""
+        with self._lock:
+            if self.pending is not None:
+                position, event_ns = self.pending
+                self.pending = None
+                self.apply(position, event_ns)
+
+    def apply(self, position, event_ns):
+        self.engine.mouse(position=position, event_ns=event_ns)
+        # the rate is limited by the time of applying, as pending events are applied late
+        self.last_applied_ns = now_ns()
+        self.applied += 1
+
+
+class MouseFlushThread(threading.Thread):
+    """Applies the pending events of a 'MouseCoalescer' from one long-lived thread.
+
+    Used for motion events that do not arrive on the TK thread, where 'after()' schedules the flushes.
+    """
+
+    def __init__(self, coalescer):
+        """
+        Args:
+            coalescer (MouseCoalescer): The coalescer to flush.
+        """
+        super().__init__(name="MouseFlush", daemon=True)
+        self.coalescer = coalescer
+        self.deadline_ns = None
+        self.running = True
+        self._condition = threading.Condition()
+
+    def schedule(self, delay_ns):
+        """Schedules a flush, as returned by 'MouseCoalescer.push()'.
+
+        Args:
+            delay_ns (int): Nanoseconds until the flush.
+        """
+        with self._condition:
+            deadline_ns = now_ns() + delay_ns
+            if self.deadline_ns is None or deadline_ns < self.deadline_ns:
+                self.deadline_ns = deadline_ns
+                self._condition.notify()
+
+    def run(self):
+        while True:
+            with self._condition:
+                while self.running and (
+                    self.deadline_ns is None or self.deadline_ns > now_ns()
+                ):
+                    timeout = None
+                    if self.deadline_ns is not None:
+                        timeout = (self.deadline_ns - now_ns()) / 1e9
+                    self._condition.wait(timeout)
+                if not self.running:
+                    return
+                self.deadline_ns = None
+            self.coalescer.flush()
+
+    def stop(self):
+        with self._condition:
+            self.running = False
+            self._condition.notify()
+
+
+class ScaleGroup:
+    """Scales that are started, sampled and recorded together.
+
+    All engines share one clock anchor, one trigger and one output. Each sample holds the values of all scales,
+    or the single value if there is only one scale, so the output of a single scale is unchanged.
+    Key events are passed on to all engines, which only react to their own keys.
+    """
+
+    def __init__(
+        self,
+        settings,
+        scale_settings,
+        on_sample,
+        on_start=None,
+        on_end=None,
+        trigger_device=None,
+        trace=None,
+        on_change=None,
+        sampling=True,
+        tuning=None,
+    ):
+        """
+        Args:
+            settings (Settings): The settings of the recording, e.g. the sampling rate.
+            scale_settings (list): The settings of each scale.
+            on_sample (function): Called with the nanoseconds since the start and the value(s) of each sample.
+            on_start (function, optional): Called with the 'ClockAnchor' and a dict of metadata on start. Defaults to None.
+            on_end (function, optional): Called when an end key is pressed. Defaults to None.
+            trigger_device (TriggerDevice, optional): Device triggered on start. Defaults to None.
+            trace (LatencyTrace, optional): Trace stamped with the input events, value updates and samples. Defaults to None.
+            on_change (function, optional): Called with the monotonic time of the causing event and the value(s)
+                on every change of a value. Defaults to None.
+            sampling (bool, optional): Whether to sample the values in a thread if they are not only saved on change.
+                False if they are sampled by another process. Defaults to True.
+            tuning (RuntimeTuning, optional): Priority and CPU affinity applied to the sampling thread. Defaults to None.
+        """
+        self.settings = settings
+        self.on_sample = on_sample
+        self.on_start = on_start
+        self.on_end = on_end
+        self.trigger_device = trigger_device
+        self.trace = trace
+        self.on_change = on_change
+        self.sampling = sampling
+        self.tuning = tuning
+
+        self.engines = [
+            SliderEngine(
+                scale,
+                on_sample=self.changed,
+                on_end=self.end,
+                trace=trace,
+                on_change=self.value_changed if on_change is not None else None,
+            )
+            for scale in scale_settings
+        ]
+        self.started = False
+        self.running = True
+        self.start_ns = None
+
+    def values(self):
+        """Returns the current value(s).
+
+        Returns:
+            float or tuple: The value of a single scale or a tuple with the values of all scales.
+        """
+        if len(self.engines) == 1:
+            return self.engines[0].value
+        return tuple([engine.value for engine in self.engines])
+
+    def changed(self, ns, value):
+        """Records all values when a scale changed and values are only saved on change.
+
+        Args:
+            ns (int): Nanoseconds since the start of the change.
+            value (float): The new value of the changed scale.
+        """
+        self.on_sample(ns, self.values())
+
+    def value_changed(self, event_ns, value):
+        """Passes all values on to 'on_change' when a scale changed.
+
+        Args:
+            event_ns (int): Monotonic time of the causing event in nanoseconds.
+            value (float): The new value of the changed scale.
+        """
+        self.on_change(event_ns, self.values())
+
+    def sample(self):
+        """Records the current values."""
+        ns = now_ns() - self.start_ns
+        if self.trace is not None:
+            events = [e.value_event_ns for e in self.engines if e.value_event_ns]
+            if events:
+                self.trace.sampled(ns, max(events))
+        self.on_sample(ns, self.values())
+
+    def key_press(self, key, event_ns=None):
+        """Handles a key press.
+
+        Args:
+            key (Key): The pressed key.
+            event_ns (int, optional): Monotonic time of the event in nanoseconds. Defaults to now.
+        """
+        event_ns = now_ns() if event_ns is None else event_ns
+        if self.trace is not None:
+            self.trace.received(event_ns)
+        self.check_start(key, event_ns)
+        for engine in self.engines:
+            engine.key_press(key, event_ns)
+
+    def key_release(self, key, event_ns=None):
+        """Handles a key release.
+
+        Args:
+            key (Key): The released key.
+            event_ns (int, optional): Monotonic time of the event in nanoseconds. Defaults to now.
+        """
+        event_ns = now_ns() if event_ns is None else event_ns
+        if self.trace is not None:
+            self.trace.received(event_ns)
+        self.check_start(key, event_ns)
+        for engine in self.engines:
+            engine.key_release(key, event_ns)
+
+    def check_start(self, key, event_ns):
+        """Starts all scales if the key is one to start any of them.
+
+        Args:
+            key (Key): The pressed/released key.
+            event_ns (int): Monotonic time of the event in nanoseconds.
+        """
+        if self.started:
+            return
+        if any(key in engine.settings.keys_start for engine in self.engines):
+            self.start(event_ns)
+
+    def start(self, event_ns=None):
+        """Starts the recording of all scales on a common clock.
+
+        Args:
+            event_ns (int, optional): Monotonic time of the causing event in nanoseconds. Defaults to None.
+        """
+        self.started = True
+        clock_anchor = ClockAnchor()
+        self.start_ns = clock_anchor.monotonic_ns
+        for engine in self.engines:
+            engine.start(event_ns, sampling=False, clock_anchor=clock_anchor)
+
+        metadata = fire_trigger(self.trigger_device, event_ns)
+        if self.on_start is not None:
+            self.on_start(clock_anchor, metadata)
+
+        if self.sampling and not self.settings.only_on_change:
+            threading.Thread(target=self.run_sampling, name="Sampling").start()
+
+    def run_sampling(self):
+        """Samples the values in the configured sampling rate until the group is stopped."""
+        if self.tuning is not None:
+            self.tuning.tune_sampling_thread()
+        scheduler = SamplingScheduler(
+            interval=self.settings.sampling_rate, spin_time=self.settings.spin_time
+        )
+        scheduler.run(
+            function=self.sample,
+            is_running=lambda: self.running,
+            start_ns=self.start_ns,
+        )
+
+    def end(self):
+        """Stops all scales and calls 'on_end' once."""
+        if not self.running:
+            return
+        self.stop()
+        if self.on_end is not None:
+            self.on_end()
+
+    def stop(self):
+        """Stops all scales and the sampling."""
+        self.running = False
+        for engine in self.engines:
+            engine.stop()
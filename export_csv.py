@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Converts binary eVAS recordings ('*_vas.bin') to the CSV layout of the eVAS.
+
+Usage:
+    python export_csv.py 20240101_120000_vas.bin [more files ...]
+
+Compressed binary recordings ('*_vas.bin.evz') are read transparently.
+
+The records of a binary recording can also be memory-mapped directly, for example with numpy:
+    header, offset = read_header(path)
+    records = numpy.memmap(path, dtype=record_dtype(header), mode="r", offset=offset)
+"""
+
+import os
+import sys
+import json
+import mmap
+
+from recorder import BINARY_MAGIC, BINARY_PREFIX, CsvFormat, binary_record
+from compression import COMPRESSED_EXTENSION, is_compressed, open_recording
+
+# numpy dtype of a single record
+RECORD_DTYPE = [("ns", "<i8"), ("value", "<f8")]
+
+
+def record_dtype(header):
+    """Returns the numpy dtype of the records of a binary recording.
+
+    Args:
+        header (dict): The header of the recording.
+
+    Returns:
+        list: The dtype, nanoseconds followed by one field per column.
+    """
+    columns = header.get("columns", ["values"])
+    if len(columns) == 1:
+        return RECORD_DTYPE
+    return [("ns", "<i8")] + [(name, "<f8") for name in columns]
+
+
+# metadata written by the clock anchor
+CLOCK_ANCHOR_KEYS = ["wall_clock_start", "monotonic_start_ns"]
+
+
+def read_header(path):
+    """Reads the header of a binary recording.
+
+    Args:
+        path (str): Path to the binary recording.
+
+    Returns:
+        tuple: The header as dict and the byte offset of the first record.
+    """
+    with open_recording(path) as f:
+        prefix = f.read(BINARY_PREFIX.size)
+        if len(prefix) < BINARY_PREFIX.size:
+            raise ValueError(f"'{path}' is not a binary eVAS recording.")
+        magic, _, header_size = BINARY_PREFIX.unpack(prefix)
+        if magic != BINARY_MAGIC:
+            raise ValueError(f"'{path}' is not a binary eVAS recording.")
+        header = json.loads(f.read(header_size).decode("utf-8"))
+
+    return header, BINARY_PREFIX.size + header_size
+
+
+def parse_csv_header(lines):
+    """Finds the column names, delimiter and decimal point of a CSV recording.
+
+    Args:
+        lines (list): The lines of the recording.
+
+    Raises:
+        ValueError: If the recording has no line with column names.
+
+    Returns:
+        tuple: Index of the line with the column names, the column names, the delimiter and the decimal point.
+    """
+    for i, line in enumerate(lines):
+        # optional config and metadata lines precede the column names 'secs<delimiter>values'
+        if not line.startswith("secs") or len(line.rstrip("\r\n")) <= len("secs"):
+            continue
+        delimiter = line[len("secs")]
+        if delimiter.isalnum() or delimiter == "_":
+            continue
+        columns = line.rstrip("\r\n").split(delimiter)[1:]
+
+        # the decimal point is a comma if a number contains one that is not the delimiter
+        decimal_point = "."
+        if i + 1 < len(lines) and delimiter != ",":
+            if "," in lines[i + 1]:
+                decimal_point = ","
+        return i, columns, delimiter, decimal_point
+
+    raise ValueError("No line with the column names 'secs' found.")
+
+
+def iter_records(path):
+    """Iterates over the records of a binary recording using a memory map.
+    Compressed recordings are decompressed block by block instead.
+    An incomplete record at the end of the file (e.g. after a crash) is ignored.
+
+    Args:
+        path (str): Path to the binary recording.
+
+    Yields:
+        tuple: Nanoseconds since the start of the recording and the slider value, a tuple for multiple scales.
+    """
+    header, offset = read_header(path)
+    columns = len(header.get("columns", ["values"]))
+    record = binary_record(columns)
+
+    if is_compressed(path):
+        with open_recording(path) as f:
+            f.seek(offset)
+            rest = b""
+            while True:
+                data = f.read(record.size * 10000)
+                if not data:
+                    return
+                data = rest + data
+                end = len(data) // record.size * record.size
+                rest = data[end:]
+                for values in record.iter_unpack(data[:end]):
+                    yield values if columns == 1 else (values[0], values[1:])
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        end = offset + (size - offset) // record.size * record.size
+        if end == offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            with memoryview(data) as view:
+                if columns == 1:
+                    yield from record.iter_unpack(view[offset:end])
+                else:
+                    for values in record.iter_unpack(view[offset:end]):
+                        yield values[0], values[1:]
+
+
+def to_csv(path, output_path=None):
+    """Converts a binary recording to a CSV file with the options stored in the recording.
+
+    Args:
+        path (str): Path to the binary recording.
+        output_path (str, optional): Path of the CSV file. Defaults to the path with a '.csv' extension.
+
+    Returns:
+        str: Path of the written CSV file.
+    """
+    if output_path is None:
+        if path.endswith(COMPRESSED_EXTENSION):
+            output_path = path[: -len(COMPRESSED_EXTENSION)]
+        output_path = os.path.splitext(output_path or path)[0] + ".csv"
+
+    header, _ = read_header(path)
+    options = header["csv"]
+
+    header_lines = []
+    if options.get("save_config_in_csv", False):
+        header_lines = header["config"].splitlines(keepends=True)
+
+    sample_format = CsvFormat(
+        delimiter=options.get("delimiter", ";"),
+        decimal_point=options.get("decimal_point", ","),
+        decimal_places=options.get("decimal_places", 4),
+        header_lines=header_lines,
+        columns=header.get("columns", ["values"]),
+    )
+    sample_format.metadata = {
+        key: value
+        for key, value in header["metadata"].items()
+        if options.get("save_clock_anchor", False) or key not in CLOCK_ANCHOR_KEYS
+    }
+
+    with open(output_path, "w") as f:
+        f.write(sample_format.header())
+        batch = []
+        for record in iter_records(path):
+            batch.append(record)
+            if len(batch) == 10000:
+                f.write(sample_format.format(batch))
+                batch = []
+        f.write(sample_format.format(batch))
+
+    return output_path
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        print(f"Written '{to_csv(path)}'.")
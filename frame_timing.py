@@ -0,0 +1,242 @@
+"""
+Frame timing of the eVAS.
+
+'FrameScheduler' paces the frames of the TK loop with absolute deadlines at the refresh rate of the monitor
+(or the configured 'frame_rate') and measures the interval between frames, the time needed to render them
+and the number of dropped frames. The statistics of a session are saved to '<recording>_frames.json'.
+"""
+
+import os
+import re
+import sys
+import json
+import shutil
+import logging
+import subprocess
+
+from timing import now_ns
+
+# frame rate used if the refresh rate of a monitor can not be determined
+DEFAULT_FRAME_RATE = 60
+
+
+def refresh_rates(monitors):
+    """Returns the refresh rates of monitors.
+
+    Args:
+        monitors (list): Monitors of 'screeninfo'.
+
+    Returns:
+        list: The refresh rate in Hz of each monitor or None if it can not be determined.
+    """
+    try:
+        if sys.platform == "win32":
+            return [windows_refresh_rate(monitor.name) for monitor in monitors]
+
+        if sys.platform == "linux":
+            # xrandr is run once for all monitors and only if it can answer
+            if not os.environ.get("DISPLAY") or shutil.which("xrandr") is None:
+                return [None] * len(monitors)
+            output = subprocess.run(
+                ["xrandr", "--current"], capture_output=True, text=True, timeout=0.5
+            ).stdout
+            return [xrandr_refresh_rate(output, monitor.name) for monitor in monitors]
+    except Exception as e:
+        logging.warning(f"Could not determine the refresh rates of {monitors}: '{e}'")
+    return [None] * len(monitors)
+
+
+def windows_refresh_rate(name):
+    """Returns the refresh rate of a monitor on Windows.
+
+    Args:
+        name (str): Name of the monitor of 'screeninfo'.
+
+    Returns:
+        float: The refresh rate in Hz or None if it can not be determined.
+    """
+    import ctypes
+
+    # VREFRESH of the device context of the monitor
+    hdc = ctypes.windll.gdi32.CreateDCW("DISPLAY", name, None, None)
+    if not hdc:
+        return None
+    try:
+        rate = ctypes.windll.gdi32.GetDeviceCaps(hdc, 116)
+    finally:
+        ctypes.windll.gdi32.DeleteDC(hdc)
+    # 0 and 1 stand for the default rate of the hardware
+    return float(rate) if rate > 1 else None
+
+
+def xrandr_refresh_rate(output, name):
+    """Finds the current refresh rate of an output in the output of 'xrandr --current'.
+
+    Args:
+        output (str): Output of xrandr.
+        name (str): Name of the output, e.g. 'DP-1'. None for the first connected output.
+
+    Returns:
+        float: The refresh rate in Hz or None if it is not found.
+    """
+    current = None
+    for line in output.splitlines():
+        if not line.startswith(" "):
+            fields = line.split()
+            current = len(fields) > 1 and fields[1] == "connected"
+            current = current and (name is None or fields[0] == name)
+            continue
+        if current:
+            # the current rate of a mode is marked with '*'
+            match = re.search(r"([\d.]+)\*", line)
+            if match:
+                return float(match.group(1))
+    return None
+
+
+class Histogram:
+    """Histogram of durations with a fixed bin width. Durations beyond the last bin are counted in it."""
+
+    def __init__(self, bin_width_ms=0.25, max_ms=100):
+        """
+        Args:
+            bin_width_ms (float, optional): Width of a bin in milliseconds. Defaults to 0.25.
+            max_ms (float, optional): Start of the last bin in milliseconds. Defaults to 100.
+        """
+        self.bin_width_ns = int(bin_width_ms * 1e6)
+        self.counts = [0] * (int(max_ms / bin_width_ms) + 1)
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, duration_ns):
+        self.counts[min(duration_ns // self.bin_width_ns, len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total_ns += duration_ns
+        self.max_ns = max(self.max_ns, duration_ns)
+
+    def percentile(self, p):
+        """Returns a percentile of the durations, accurate to the bin width.
+
+        Args:
+            p (float): The percentile from 0 to 100.
+
+        Returns:
+            float: Upper end of the bin of the percentile in milliseconds or None if there are no durations.
+        """
+        if not self.count:
+            return None
+        rank = p / 100 * self.count
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= rank:
+                return min((i + 1) * self.bin_width_ns, self.max_ns) / 1e6
+        return self.max_ns / 1e6
+
+    def summary(self):
+        """Returns the statistics and the histogram.
+
+        Returns:
+            dict: Count, mean, percentiles and maximum in milliseconds and the counts of the bins.
+        """
+        last_bin = max((i for i, count in enumerate(self.counts) if count), default=-1)
+        return {
+            "count": self.count,
+            "mean_ms": (
+                round(self.total_ns / self.count / 1e6, 3) if self.count else None
+            ),
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "p99_ms": self.percentile(99),
+            "max_ms": round(self.max_ns / 1e6, 3),
+            "bin_width_ms": self.bin_width_ns / 1e6,
+            "counts": self.counts[: last_bin + 1],
+        }
+
+
+class FrameScheduler:
+    """Paces frames with absolute deadlines and measures their timing.
+
+    As the deadlines are absolute, the frame rate is met on average even though TK only schedules in
+    whole milliseconds. Deadlines that passed while a frame was rendered count as dropped frames.
+    """
+
+    def __init__(self, rate):
+        """
+        Args:
+            rate (float): Target number of frames per second.
+        """
+        self.rate = rate
+        self.interval_ns = max(int(round(1e9 / rate)), 1)
+        self.deadline_ns = None
+        self.last_start_ns = None
+        self.frames = 0
+        self.dropped_frames = 0
+        # time between the starts of two frames, time to render a frame and time to redraw changed sliders
+        self.intervals = Histogram()
+        self.render_times = Histogram()
+        self.draw_times = Histogram()
+
+    def frame_started(self):
+        """Marks the start of a frame.
+
+        Returns:
+            int: Monotonic time of the start in nanoseconds.
+        """
+        start_ns = now_ns()
+        if self.last_start_ns is not None:
+            self.intervals.add(start_ns - self.last_start_ns)
+        self.last_start_ns = start_ns
+        self.frames += 1
+        if self.deadline_ns is None:
+            self.deadline_ns = start_ns
+        return start_ns
+
+    def frame_finished(self, start_ns, drawn=True):
+        """Marks the end of a frame and returns the delay until the next one.
+
+        Args:
+            start_ns (int): Start of the frame as returned by 'frame_started()'.
+            drawn (bool, optional): Whether a slider was redrawn in the frame. Defaults to True.
+
+        Returns:
+            int: Milliseconds until the next frame.
+        """
+        end_ns = now_ns()
+        self.render_times.add(end_ns - start_ns)
+        if drawn:
+            self.draw_times.add(end_ns - start_ns)
+
+        self.deadline_ns += self.interval_ns
+        late = end_ns - self.deadline_ns
+        if late >= 0:
+            # the next deadline has already passed, continue with the next one in the future
+            missed = late // self.interval_ns + 1
+            self.deadline_ns += missed * self.interval_ns
+            self.dropped_frames += missed
+        return int(round((self.deadline_ns - now_ns()) / 1e6))
+
+    def statistics(self):
+        """Returns the frame timing of the session.
+
+        Returns:
+            dict: Target rate, number of frames and dropped frames and the histograms.
+        """
+        return {
+            "target_rate": self.rate,
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "frame_interval": self.intervals.summary(),
+            "render_time": self.render_times.summary(),
+            "draw_time": self.draw_times.summary(),
+        }
+
+    def save(self, filename):
+        """Saves the statistics as JSON.
+
+        Args:
+            filename (str): Path of the file.
+        """
+        with open(filename, "w") as f:
+            json.dump(self.statistics(), f, indent=2)
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Latency trace of the eVAS.
+
+If 'save_latency_trace' is enabled, each input event is stamped with the monotonic time at which it passed
+the stages of the eVAS: the key or mouse callback, the update of the slider value, the write of the first sample
+carrying the value and the first frame showing it. The stamps are written to '<recording>_trace.bin' by a
+background writer. Values that were replaced before they were saved or shown do not get the later stamps.
+
+Summarize a trace with:
+    python latency_trace.py 20240101_120000_vas_trace.bin
+"""
+
+import sys
+import json
+import mmap
+import struct
+import threading
+
+from timing import now_ns
+from recorder import BINARY_PREFIX, RecordingWriter
+
+TRACE_MAGIC = b"eVTR"
+TRACE_VERSION = 1
+# each record: int64 time of the input event, int64 time of the stage and the stage
+TRACE_RECORD = struct.Struct("<qqB")
+
+STAGE_INPUT, STAGE_VALUE, STAGE_WRITE, STAGE_FRAME = range(4)
+STAGE_NAMES = ["input", "value", "write", "frame"]
+
+
+class TraceFormat:
+    """Formats the stamps of the latency trace as packed binary records."""
+
+    mode = "wb"
+
+    def __init__(self):
+        self.metadata = {}
+
+    def header(self):
+        """Returns the header of the trace file.
+
+        Returns:
+            bytes: Prefix and JSON header with the names of the stages and metadata.
+        """
+        header = json.dumps({"stages": STAGE_NAMES, "metadata": self.metadata}).encode(
+            "utf-8"
+        )
+        return BINARY_PREFIX.pack(TRACE_MAGIC, TRACE_VERSION, len(header)) + header
+
+    def format(self, samples):
+        """Formats a batch of stamps.
+
+        Args:
+            samples (list): List of (event time, stage time, stage) tuples in nanoseconds.
+
+        Returns:
+            bytes: One packed record per stamp.
+        """
+        pack = TRACE_RECORD.pack
+        return b"".join([pack(*stamp) for stamp in samples])
+
+
+class LatencyTrace:
+    """Collects the stage stamps of the input events and writes them in the background."""
+
+    def __init__(self, filename, flush_interval=0.5):
+        """
+        Args:
+            filename (str): Path of the trace file.
+            flush_interval (float, optional): Interval in seconds in which stamps are written. Defaults to 0.5.
+        """
+        self.writer = RecordingWriter(
+            filename=filename,
+            sample_format=TraceFormat(),
+            flush_interval=flush_interval,
+        )
+        # events whose value was sampled but not yet written, by nanoseconds since start of the sample
+        self._pending = {}
+        self._last_sampled = None
+        self._last_shown = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        self.writer.start()
+
+    def add_metadata(self, metadata):
+        self.writer.add_metadata(metadata)
+
+    def stamp(self, event_ns, stage, stage_ns=None):
+        """Records the time an event reached a stage.
+
+        Args:
+            event_ns (int): Monotonic time of the input event in nanoseconds.
+            stage (int): The stage, e.g. STAGE_VALUE.
+            stage_ns (int, optional): Monotonic time of the stage in nanoseconds. Defaults to now.
+        """
+        if stage_ns is None:
+            stage_ns = now_ns()
+        self.writer.buffer.push((event_ns, stage_ns, stage))
+
+    def received(self, event_ns):
+        """Stamps the arrival of an input event.
+
+        Args:
+            event_ns (int): Monotonic time of the input event in nanoseconds.
+        """
+        self.stamp(event_ns, STAGE_INPUT, event_ns)
+
+    def updated(self, event_ns):
+        """Stamps the update of the value caused by an input event.
+
+        Args:
+            event_ns (int): Monotonic time of the input event in nanoseconds.
+        """
+        self.stamp(event_ns, STAGE_VALUE)
+
+    def sampled(self, ns, event_ns):
+        """Remembers the event of the first sample carrying its value, so the write can be stamped.
+
+        Args:
+            ns (int): Nanoseconds since the start of the sample.
+            event_ns (int): Monotonic time of the event that caused the sampled value.
+        """
+        with self._lock:
+            if event_ns == self._last_sampled:
+                return
+            self._last_sampled = event_ns
+            self._pending[ns] = event_ns
+
+    def written(self, samples):
+        """Stamps the events of samples that were written to the recording. Used as 'on_write' of the recorder.
+
+        Args:
+            samples (list): The written (nanoseconds since start, value) samples.
+        """
+        stage_ns = now_ns()
+        with self._lock:
+            events = [self._pending.pop(ns, None) for ns, _ in samples]
+        for event_ns in events:
+            if event_ns is not None:
+                self.stamp(event_ns, STAGE_WRITE, stage_ns)
+
+    def shown(self, event_ns):
+        """Stamps the first frame showing the value of an event.
+
+        Args:
+            event_ns (int): Monotonic time of the event that caused the shown value.
+        """
+        if event_ns is None or event_ns == self._last_shown:
+            return
+        self._last_shown = event_ns
+        self.stamp(event_ns, STAGE_FRAME)
+
+    def close(self):
+        """Writes the remaining stamps and closes the trace file."""
+        self.writer.close()
+
+
+def read_trace(path):
+    """Reads a trace file.
+
+    Args:
+        path (str): Path of the trace file.
+
+    Returns:
+        tuple: The JSON header and a list of (event time, stage time, stage) tuples.
+    """
+    with open(path, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            magic, version, length = BINARY_PREFIX.unpack_from(data, 0)
+            if magic != TRACE_MAGIC or version != TRACE_VERSION:
+                raise ValueError(f"'{path}' is not a latency trace of the eVAS.")
+            offset = BINARY_PREFIX.size + length
+            header = json.loads(data[BINARY_PREFIX.size : offset].decode("utf-8"))
+            # ignore an incomplete last record
+            count = (len(data) - offset) // TRACE_RECORD.size
+            stamps = [
+                TRACE_RECORD.unpack_from(data, offset + i * TRACE_RECORD.size)
+                for i in range(count)
+            ]
+    return header, stamps
+
+
+def percentiles(values):
+    """Summarizes latencies in milliseconds.
+
+    Args:
+        values (list): Latencies in nanoseconds.
+
+    Returns:
+        dict: Number of values, mean, median, 90th, 99th percentile and maximum in milliseconds.
+    """
+    if not values:
+        return {"count": 0}
+    values = sorted(values)
+
+    def percentile(p):
+        return round(values[min(int(p / 100 * len(values)), len(values) - 1)] / 1e6, 3)
+
+    return {
+        "count": len(values),
+        "mean": round(sum(values) / len(values) / 1e6, 3),
+        "p50": percentile(50),
+        "p90": percentile(90),
+        "p99": percentile(99),
+        "max": round(values[-1] / 1e6, 3),
+    }
+
+
+def summarize(path):
+    """Returns the latency of each stage since the input event.
+
+    Args:
+        path (str): Path of the trace file.
+
+    Returns:
+        dict: Latency percentiles in milliseconds per stage and the number of traced events.
+    """
+    header, stamps = read_trace(path)
+    latencies = {name: [] for name in header["stages"][1:]}
+    events = set()
+    for event_ns, stage_ns, stage in stamps:
+        events.add(event_ns)
+        if stage != STAGE_INPUT:
+            latencies[header["stages"][stage]].append(stage_ns - event_ns)
+
+    return {
+        "events": len(events),
+        **{
+            f"input_to_{name}_ms": percentiles(values)
+            for name, values in latencies.items()
+        },
+        "metadata": header["metadata"],
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    for path in sys.argv[1:]:
+        print(json.dumps({"trace": path, **summarize(path)}, indent=2))
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Live network stream of the eVAS.
+
+If a 'stream' address is configured, each recorded sample is sent with its monotonic timestamp to an
+acquisition computer via UDP (default) or TCP, either one by one or in batches. Clock-sync packets pair
+the monotonic clock of the eVAS with its wall-clock time, so receivers can align the samples with their own clocks.
+
+Packets start with a header (magic, version, kind, number of columns, number of records and a sequence number):
+    - samples: one record per sample of int64 monotonic nanoseconds followed by one float64 per scale
+    - clock sync: int64 monotonic nanoseconds, int64 wall-clock nanoseconds and int64 monotonic start of the recording
+Over TCP, each packet is preceded by its length as uint16.
+
+A reference receiver, which can also be used as a local stand-in for tests, is started with:
+    python live_stream.py [host:port] [--tcp]
+It prints the samples as CSV lines and, as sender and receiver share the monotonic clock on one computer,
+the delivery latency of each batch.
+"""
+
+import sys
+import time
+import socket
+import struct
+import logging
+import threading
+
+from timing import now_ns
+from recorder import SampleBuffer
+
+STREAM_MAGIC = b"eVST"
+STREAM_VERSION = 1
+PACKET_HEADER = struct.Struct("<4sBBBxHI")
+PACKET_LENGTH = struct.Struct("<H")
+SYNC_RECORD = struct.Struct("<qqq")
+KIND_SAMPLES, KIND_SYNC = 0, 1
+# keep UDP packets below the usual MTU
+MAX_PACKET_SIZE = 1400
+
+DEFAULT_ADDRESS = "127.0.0.1:5005"
+
+
+def parse_address(address):
+    """Splits an address of the form 'host:port'.
+
+    Args:
+        address (str): The address.
+
+    Returns:
+        tuple: Host and port.
+    """
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+def sample_record(columns=1):
+    """Returns the struct of a streamed sample.
+
+    Args:
+        columns (int, optional): Number of values per sample. Defaults to 1.
+
+    Returns:
+        struct.Struct: int64 monotonic nanoseconds followed by one float64 per column.
+    """
+    return struct.Struct("<q" + "d" * columns)
+
+
+class SampleStream(threading.Thread):
+    """Sends the recorded samples and clock-sync packets to a receiver."""
+
+    def __init__(
+        self,
+        address,
+        protocol="udp",
+        batch_interval=0,
+        sync_interval=1,
+        columns=1,
+    ):
+        """
+        Args:
+            address (str): Address of the receiver in the form 'host:port'.
+            protocol (str, optional): "udp" or "tcp". Defaults to "udp".
+            batch_interval (float, optional): Interval in seconds in which samples are sent in batches.
+                0 to send each sample as soon as the stream thread wakes up. Defaults to 0.
+            sync_interval (float, optional): Interval in seconds between two clock-sync packets. Defaults to 1.
+            columns (int, optional): Number of values per sample, one per scale. Defaults to 1.
+        """
+        super().__init__(name="SampleStream", daemon=True)
+        self.address = parse_address(address)
+        self.protocol = protocol
+        self.batch_interval = batch_interval
+        self.sync_interval = sync_interval
+        self.columns = columns
+        self.record = sample_record(columns)
+        # records per packet
+        self.batch_size = (MAX_PACKET_SIZE - PACKET_HEADER.size) // self.record.size
+
+        self.buffer = SampleBuffer()
+        self.start_ns = 0
+        self.sequence = 0
+        self.packets_failed = 0
+
+        self._socket = None
+        self._send_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        # set by pushed samples and the start of the recording, all packets are sent by the stream thread
+        self._wake_event = threading.Event()
+        self._sync_requested = False
+
+    def connect(self):
+        """Opens the socket. TCP connections are retried with each clock-sync packet if they fail."""
+        try:
+            if self.protocol == "tcp":
+                self._socket = socket.create_connection(self.address, timeout=1)
+                self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            else:
+                self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                self._socket.connect(self.address)
+        except OSError as e:
+            self._socket = None
+            logging.warning(f"Could not connect the stream to {self.address}: '{e}'")
+
+    def start_recording(self, clock_anchor):
+        """Sets the start of the recording and sends a clock-sync packet.
+
+        Args:
+            clock_anchor (ClockAnchor): The anchor of the recording.
+        """
+        self.start_ns = clock_anchor.monotonic_ns
+        self._sync_requested = True
+        self._wake_event.set()
+
+    def push(self, ns, value):
+        """Adds a sample to the next packet, which is sent by the stream thread. Safe to call from any thread.
+
+        Args:
+            ns (int): Nanoseconds since the start of the recording.
+            value (float or tuple): The value, a tuple for multiple scales.
+        """
+        self.buffer.push((ns, value))
+        if not self.batch_interval:
+            self._wake_event.set()
+
+    def send_pending(self):
+        """Sends a requested clock-sync packet and the buffered samples."""
+        if self._sync_requested:
+            self._sync_requested = False
+            self.send_sync()
+        self.send_samples(self.buffer.drain())
+
+    def send_samples(self, samples):
+        """Sends samples in as few packets as possible.
+
+        Args:
+            samples (list): List of (nanoseconds since start, value) tuples.
+        """
+        pack = self.record.pack
+        for i in range(0, len(samples), self.batch_size):
+            batch = samples[i : i + self.batch_size]
+            if self.columns == 1:
+                records = [pack(self.start_ns + ns, value) for ns, value in batch]
+            else:
+                records = [pack(self.start_ns + ns, *values) for ns, values in batch]
+            self.send(KIND_SAMPLES, len(batch), b"".join(records))
+
+    def send_sync(self):
+        """Sends a clock-sync packet with the current monotonic and wall-clock time."""
+        self.send(
+            KIND_SYNC, 1, SYNC_RECORD.pack(now_ns(), time.time_ns(), self.start_ns)
+        )
+
+    def send(self, kind, count, payload):
+        """Sends a packet. Failed packets are counted and not repeated.
+
+        Args:
+            kind (int): KIND_SAMPLES or KIND_SYNC.
+            count (int): Number of records in the payload.
+            payload (bytes): The records.
+        """
+        with self._send_lock:
+            if self._socket is None:
+                self.packets_failed += 1
+                return
+            packet = (
+                PACKET_HEADER.pack(
+                    STREAM_MAGIC,
+                    STREAM_VERSION,
+                    kind,
+                    self.columns,
+                    count,
+                    self.sequence,
+                )
+                + payload
+            )
+            self.sequence = (self.sequence + 1) % 2**32
+            try:
+                if self.protocol == "tcp":
+                    self._socket.sendall(PACKET_LENGTH.pack(len(packet)) + packet)
+                else:
+                    self._socket.send(packet)
+            except OSError as e:
+                self.packets_failed += 1
+                if self.packets_failed == 1:
+                    logging.warning(f"Stream packet could not be sent: '{e}'")
+                if self.protocol == "tcp":
+                    self._socket.close()
+                    self._socket = None
+
+    def start(self):
+        self.connect()
+        super().start()
+
+    def run(self):
+        self.send_sync()
+        next_sync = time.monotonic() + self.sync_interval
+
+        while not self._stop_event.is_set():
+            # without batches, each pushed sample wakes the thread up
+            timeout = next_sync - time.monotonic()
+            if self.batch_interval:
+                timeout = min(timeout, self.batch_interval)
+            self._wake_event.wait(max(timeout, 0))
+            self._wake_event.clear()
+
+            self.send_pending()
+            if time.monotonic() >= next_sync:
+                next_sync += self.sync_interval
+                if self._socket is None:
+                    self.connect()
+                self.send_sync()
+
+    def close(self):
+        """Sends the remaining samples and closes the socket."""
+        self._stop_event.set()
+        self._wake_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        self.send_pending()
+
+        with self._send_lock:
+            if self._socket is not None:
+                self._socket.close()
+                self._socket = None
+
+        if self.packets_failed:
+            logging.warning(f"{self.packets_failed} stream packets could not be sent.")
+
+
+def parse_packet(packet):
+    """Parses a packet of the stream.
+
+    Args:
+        packet (bytes): The packet.
+
+    Returns:
+        tuple: The kind, the sequence number and a list of the records.
+    """
+    magic, version, kind, columns, count, sequence = PACKET_HEADER.unpack_from(packet)
+    if magic != STREAM_MAGIC or version != STREAM_VERSION:
+        raise ValueError("Not a packet of the eVAS stream.")
+    record = SYNC_RECORD if kind == KIND_SYNC else sample_record(columns)
+    records = [
+        record.unpack_from(packet, PACKET_HEADER.size + i * record.size)
+        for i in range(count)
+    ]
+    return kind, sequence, records
+
+
+def iter_packets(address=DEFAULT_ADDRESS, protocol="udp"):
+    """Receives the packets of a stream.
+
+    Args:
+        address (str, optional): Address to listen on in the form 'host:port'. Defaults to DEFAULT_ADDRESS.
+        protocol (str, optional): "udp" or "tcp". Defaults to "udp".
+
+    Yields:
+        tuple: Monotonic time of the receipt, the kind, the sequence number and a list of the records.
+    """
+    if protocol == "udp":
+        with socket.socket(socket.AF_INET, socket.SOCK_DGRAM) as server:
+            server.bind(parse_address(address))
+            while True:
+                packet = server.recv(65535)
+                yield (now_ns(), *parse_packet(packet))
+
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as server:
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind(parse_address(address))
+        server.listen()
+        while True:
+            connection, _ = server.accept()
+            with connection, connection.makefile("rb") as f:
+                while True:
+                    length = f.read(PACKET_LENGTH.size)
+                    if len(length) < PACKET_LENGTH.size:
+                        break
+                    packet = f.read(PACKET_LENGTH.unpack(length)[0])
+                    yield (now_ns(), *parse_packet(packet))
+
+
+def receive(address=DEFAULT_ADDRESS, protocol="udp"):
+    """Reference receiver: prints the received samples, lost packets and the delivery latency.
+
+    Args:
+        address (str, optional): Address to listen on in the form 'host:port'. Defaults to DEFAULT_ADDRESS.
+        protocol (str, optional): "udp" or "tcp". Defaults to "udp".
+    """
+    print(f"Receiving the eVAS stream on {address} ({protocol}).")
+    expected = None
+    for received_ns, kind, sequence, records in iter_packets(address, protocol):
+        if expected is not None and sequence != expected:
+            print(f"# lost {(sequence - expected) % 2**32} packet(s)")
+        expected = (sequence + 1) % 2**32
+
+        if kind == KIND_SYNC:
+            monotonic_ns, wall_ns, start_ns = records[0]
+            print(f"# sync monotonic={monotonic_ns} wall={wall_ns} start={start_ns}")
+            continue
+
+        for record in records:
+            print(";".join(str(x) for x in record))
+        # valid if sender and receiver run on the same computer
+        print(f"# latency {(received_ns - records[-1][0]) / 1e6:.3f} ms")
+
+
+if __name__ == "__main__":
+    arguments = [x for x in sys.argv[1:] if not x.startswith("--")]
+    try:
+        receive(
+            address=arguments[0] if arguments else DEFAULT_ADDRESS,
+            protocol="tcp" if "--tcp" in sys.argv else "udp",
+        )
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Live value of the eVAS in shared memory.
+
+If a 'live_value_file' is configured, the eVAS publishes the current value(s) of the slider to a small
+memory-mapped file on every change, so software on the same computer (e.g. stimulus or EEG software) can read
+it at any rate without system calls.
+
+Layout of the file (little endian):
+    0   magic 'eVLV', version (uint8), number of values (uint8), 2 bytes padding
+    8   sequence (uint64), odd while the snapshot is written
+    16  monotonic time of the causing event in nanoseconds (int64)
+    24  monotonic start of the recording in nanoseconds (int64), 0 before the start
+    32  state (uint8): 0 waiting for the start, 1 recording, 2 ended, followed by 7 bytes padding
+    40  one float64 per scale
+
+The snapshot is protected by a sequence lock: readers read the sequence, the snapshot and the sequence again
+and retry if the sequence was odd or changed in between. 'LiveValueReader' implements this and prints the
+values if started with:
+    python live_value.py live_value.bin
+"""
+
+import os
+import sys
+import mmap
+import time
+import struct
+import threading
+
+LIVE_MAGIC = b"eVLV"
+LIVE_VERSION = 1
+LIVE_HEADER = struct.Struct("<4sBBxx")
+SEQUENCE = struct.Struct("<Q")
+SEQUENCE_OFFSET = 8
+SNAPSHOT_OFFSET = 16
+STATE_WAITING, STATE_RECORDING, STATE_ENDED = 0, 1, 2
+
+
+def snapshot_struct(columns):
+    """Returns the struct of a snapshot.
+
+    Args:
+        columns (int): Number of values, one per scale.
+
+    Returns:
+        struct.Struct: Event time, start of the recording, state and the values.
+    """
+    return struct.Struct("<qqB7x" + "d" * columns)
+
+
+class LiveValue:
+    """Publishes the current value(s) to a memory-mapped file."""
+
+    def __init__(self, path, columns=1):
+        """
+        Args:
+            path (str): Path of the memory-mapped file.
+            columns (int, optional): Number of values, one per scale. Defaults to 1.
+        """
+        self.path = path
+        self.columns = columns
+        self.snapshot = snapshot_struct(columns)
+        self.sequence = 0
+        self.start_ns = 0
+        self._lock = threading.Lock()
+
+        size = SNAPSHOT_OFFSET + self.snapshot.size
+        # an existing file is overwritten in place, as readers may still have it mapped
+        with open(path, "r+b" if os.path.isfile(path) else "w+b") as f:
+            f.write(LIVE_HEADER.pack(LIVE_MAGIC, LIVE_VERSION, columns))
+            f.write(bytes(size - LIVE_HEADER.size))
+            f.truncate(size)
+            f.flush()
+            self._map = mmap.mmap(f.fileno(), size)
+
+    def publish(self, event_ns, value, state=STATE_RECORDING):
+        """Writes a snapshot. Safe to call from any thread.
+
+        Args:
+            event_ns (int): Monotonic time of the causing event in nanoseconds.
+            value (float or tuple): The value, a tuple for multiple scales.
+            state (int, optional): State of the eVAS. Defaults to STATE_RECORDING.
+        """
+        values = value if isinstance(value, tuple) else (value,)
+        with self._lock:
+            if self._map is None:
+                return
+            # odd while writing
+            self.sequence += 1
+            SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+            self.snapshot.pack_into(
+                self._map, SNAPSHOT_OFFSET, event_ns, self.start_ns, state, *values
+            )
+            self.sequence += 1
+            SEQUENCE.pack_into(self._map, SEQUENCE_OFFSET, self.sequence)
+
+    def start_recording(self, clock_anchor, value):
+        """Publishes the start of the recording.
+
+        Args:
+            clock_anchor (ClockAnchor): The anchor of the recording.
+            value (float or tuple): The start value(s).
+        """
+        self.start_ns = clock_anchor.monotonic_ns
+        self.publish(clock_anchor.monotonic_ns, value)
+
+    def close(self, event_ns, value):
+        """Publishes the end of the recording and unmaps the file. The file is kept for readers.
+
+        Args:
+            event_ns (int): Monotonic time of the end in nanoseconds.
+            value (float or tuple): The last value(s).
+        """
+        self.publish(event_ns, value, state=STATE_ENDED)
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                self._map = None
+
+
+class LiveValueReader:
+    """Reads consistent snapshots of the live value."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the memory-mapped file.
+        """
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.columns = LIVE_HEADER.unpack_from(self._map)
+        if magic != LIVE_MAGIC or version != LIVE_VERSION:
+            raise ValueError(f"'{path}' is not a live value file of the eVAS.")
+        self.snapshot = snapshot_struct(self.columns)
+
+    def read(self):
+        """Reads the current snapshot.
+
+        Returns:
+            tuple: The sequence, the event time, the start of the recording, the state and a tuple of the values.
+        """
+        while True:
+            (before,) = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)
+            if before % 2:
+                continue
+            event_ns, start_ns, state, *values = self.snapshot.unpack_from(
+                self._map, SNAPSHOT_OFFSET
+            )
+            (after,) = SEQUENCE.unpack_from(self._map, SEQUENCE_OFFSET)
+            if before == after:
+                return before, event_ns, start_ns, state, tuple(values)
+
+    def close(self):
+        self._map.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    reader = LiveValueReader(sys.argv[1])
+    last_sequence = None
+    try:
+        while True:
+            sequence, event_ns, start_ns, state, values = reader.read()
+            if sequence != last_sequence:
+                last_sequence = sequence
+                print(f"{event_ns};{state};" + ";".join(str(v) for v in values))
+            time.sleep(0.001)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
@@ -0,0 +1,238 @@
+"""
+Low-jitter runtime settings of the eVAS.
+
+'RuntimeTuning' applies the options of the [performance] section for the duration of a recording:
+    - garbage collection: freeze the objects created during startup, disable the collector or change its thresholds
+    - priority of the process and of the sampling and writer threads
+    - CPU affinity of the sampling and writer threads
+Settings the operating system refuses (e.g. a real-time priority without administrator rights) are logged
+and the recording continues without them.
+"""
+
+import gc
+import os
+import sys
+import logging
+import threading
+
+PRIORITIES = ["above_normal", "high", "realtime"]
+# nice values of the priorities on POSIX systems
+NICE_VALUES = {"above_normal": -5, "high": -10, "realtime": -20}
+# thread priorities on Windows
+WINDOWS_THREAD_PRIORITIES = {"above_normal": 1, "high": 2, "realtime": 15}
+
+
+class RuntimeTuning:
+    """Garbage collection, priority and CPU affinity settings applied while recording."""
+
+    def __init__(
+        self,
+        gc_freeze=False,
+        disable_gc=False,
+        gc_threshold=None,
+        process_priority=None,
+        thread_priority=None,
+        sampling_cpus=None,
+        writer_cpus=None,
+    ):
+        """
+        Args:
+            gc_freeze (bool, optional): Whether to move all objects created so far to a permanent generation,
+                which the garbage collector does not check anymore. Defaults to False.
+            disable_gc (bool, optional): Whether to disable the garbage collector. Defaults to False.
+            gc_threshold (tuple, optional): Thresholds of the garbage collector or None to keep them. Defaults to None.
+            process_priority (str, optional): "above_normal", "high", "realtime" or None to keep it. Defaults to None.
+            thread_priority (str, optional): Priority of the sampling and writer threads, like 'process_priority'. Defaults to None.
+            sampling_cpus (list, optional): CPUs to run the sampling thread on or None for all. Defaults to None.
+            writer_cpus (list, optional): CPUs to run the writer thread on or None for all. Defaults to None.
+        """
+        self.gc_freeze = gc_freeze
+        self.disable_gc = disable_gc
+        self.gc_threshold = gc_threshold
+        self.process_priority = process_priority
+        self.thread_priority = thread_priority
+        self.sampling_cpus = sampling_cpus
+        self.writer_cpus = writer_cpus
+
+        self._applied = False
+        self._gc_enabled = None
+        self._gc_threshold = None
+        self._process_priority = None
+
+    @classmethod
+    def from_settings(cls, settings):
+        """Creates the tuning from the [performance] section of the settings.
+
+        Args:
+            settings (Settings): The settings of the eVAS.
+
+        Returns:
+            RuntimeTuning: The tuning.
+        """
+        return cls(
+            gc_freeze=settings.gc_freeze,
+            disable_gc=settings.disable_gc,
+            gc_threshold=settings.gc_threshold,
+            process_priority=settings.process_priority,
+            thread_priority=settings.thread_priority,
+            sampling_cpus=settings.sampling_cpus,
+            writer_cpus=settings.writer_cpus,
+        )
+
+    def apply(self):
+        """Applies the garbage collection and process priority settings at the start of a recording."""
+        if self._applied:
+            return
+        self._applied = True
+
+        self._gc_enabled = gc.isenabled()
+        self._gc_threshold = gc.get_threshold()
+        if self.gc_freeze:
+            # collect first, so no garbage is frozen
+            gc.collect()
+            gc.freeze()
+        if self.gc_threshold is not None:
+            gc.set_threshold(*self.gc_threshold)
+        if self.disable_gc:
+            gc.disable()
+
+        if self.process_priority is not None:
+            self.set_process_priority(self.process_priority)
+
+    def restore(self):
+        """Restores the garbage collection and process priority at the end of a recording."""
+        if not self._applied:
+            return
+        self._applied = False
+
+        if self._gc_enabled:
+            gc.enable()
+        gc.set_threshold(*self._gc_threshold)
+        if self.gc_freeze:
+            gc.unfreeze()
+
+        if self._process_priority is not None:
+            try:
+                import psutil
+
+                psutil.Process().nice(self._process_priority)
+            except Exception as e:
+                logging.warning(f"Process priority could not be restored: '{e}'")
+
+    def set_process_priority(self, priority):
+        """Sets the priority of the process.
+
+        Args:
+            priority (str): "above_normal", "high" or "realtime".
+        """
+        try:
+            import psutil
+
+            process = psutil.Process()
+            self._process_priority = process.nice()
+            if sys.platform == "win32":
+                process.nice(
+                    {
+                        "above_normal": psutil.ABOVE_NORMAL_PRIORITY_CLASS,
+                        "high": psutil.HIGH_PRIORITY_CLASS,
+                        "realtime": psutil.REALTIME_PRIORITY_CLASS,
+                    }[priority]
+                )
+            else:
+                process.nice(NICE_VALUES[priority])
+        except Exception as e:
+            self._process_priority = None
+            logging.warning(f"Process priority '{priority}' could not be set: '{e}'")
+
+    def tune_sampling_thread(self):
+        """Applies the priority and CPU affinity to the calling sampling thread."""
+        tune_thread(
+            threading.get_native_id(),
+            "sampling",
+            self.thread_priority,
+            self.sampling_cpus,
+        )
+
+    def tune_writer_thread(self, writer):
+        """Applies the priority and CPU affinity to the thread of a started writer.
+
+        Args:
+            writer (RecordingWriter): The writer.
+        """
+        tune_thread(writer.native_id, "writer", self.thread_priority, self.writer_cpus)
+
+
+def tune_thread(native_id, name, priority=None, cpus=None):
+    """Sets the priority and CPU affinity of a thread. Refused settings are logged.
+
+    Args:
+        native_id (int): Native id of the thread.
+        name (str): Name of the thread used in the log.
+        priority (str, optional): "above_normal", "high", "realtime" or None to keep it. Defaults to None.
+        cpus (list, optional): CPUs to run the thread on or None to keep them. Defaults to None.
+    """
+    if priority is None and cpus is None:
+        return
+
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        kernel32 = ctypes.windll.kernel32
+        # handles and affinity masks are pointer-sized on 64-bit Windows
+        kernel32.OpenThread.argtypes = [wintypes.DWORD, wintypes.BOOL, wintypes.DWORD]
+        kernel32.OpenThread.restype = wintypes.HANDLE
+        kernel32.SetThreadPriority.argtypes = [wintypes.HANDLE, ctypes.c_int]
+        kernel32.SetThreadPriority.restype = wintypes.BOOL
+        kernel32.SetThreadAffinityMask.argtypes = [wintypes.HANDLE, ctypes.c_size_t]
+        kernel32.SetThreadAffinityMask.restype = ctypes.c_size_t
+        kernel32.CloseHandle.argtypes = [wintypes.HANDLE]
+        kernel32.CloseHandle.restype = wintypes.BOOL
+        # THREAD_SET_INFORMATION | THREAD_QUERY_INFORMATION
+        handle = kernel32.OpenThread(0x0020 | 0x0040, False, native_id)
+        if not handle:
+            logging.warning(f"The {name} thread could not be opened to tune it.")
+            return
+        try:
+            if priority is not None and not kernel32.SetThreadPriority(
+                handle, WINDOWS_THREAD_PRIORITIES[priority]
+            ):
+                logging.warning(
+                    f"Priority '{priority}' of the {name} thread could not be set."
+                )
+            if cpus is not None and not kernel32.SetThreadAffinityMask(
+                handle, sum(1 << cpu for cpu in cpus)
+            ):
+                logging.warning(f"The {name} thread could not be pinned to {cpus}.")
+        finally:
+            kernel32.CloseHandle(handle)
+        return
+
+    if priority is not None:
+        try:
+            if priority == "realtime" and hasattr(os, "sched_setscheduler"):
+                os.sched_setscheduler(
+                    native_id,
+                    os.SCHED_FIFO,
+                    os.sched_param(os.sched_get_priority_min(os.SCHED_FIFO)),
+                )
+            elif sys.platform == "linux":
+                # on Linux, the nice value is set per thread
+                os.setpriority(os.PRIO_PROCESS, native_id, NICE_VALUES[priority])
+            else:
+                logging.warning(
+                    f"Thread priorities are not supported on '{sys.platform}'."
+                )
+        except OSError as e:
+            logging.warning(
+                f"Priority '{priority}' of the {name} thread could not be set: '{e}'"
+            )
+
+    if cpus is not None:
+        if not hasattr(os, "sched_setaffinity"):
+            logging.warning(f"CPU affinity is not supported on '{sys.platform}'.")
+            return
+        try:
+            os.sched_setaffinity(native_id, cpus)
+        except OSError as e:
+            logging.warning(f"The {name} thread could not be pinned to {cpus}: '{e}'")
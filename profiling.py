@@ -0,0 +1,103 @@
+"""
+Startup profiling of the eVAS.
+
+Started with '--startup-profile', the eVAS measures the time of each import and startup phase
+and reports them once the first frame is shown.
+"""
+
+import sys
+import time
+import builtins
+import threading
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """Measures imports and phases during the startup of the eVAS. Does nothing if not enabled."""
+
+    def __init__(self, enabled=False):
+        """
+        Args:
+            enabled (bool, optional): Whether to measure the startup. Defaults to False.
+        """
+        self.enabled = enabled
+        self.start_ns = time.perf_counter_ns()
+        self.imports = []
+        self.phases = []
+        self.marks = []
+        self.reported = False
+
+        self._local = threading.local()
+        self._import = builtins.__import__
+        if enabled:
+            builtins.__import__ = self._timed_import
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        # only measure the outermost import of modules that are not loaded yet
+        depth = getattr(self._local, "depth", 0)
+        if level or depth or name in sys.modules:
+            return self._import(name, globals, locals, fromlist, level)
+
+        self._local.depth = 1
+        start = time.perf_counter_ns()
+        try:
+            return self._import(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = 0
+            self.imports.append((name, time.perf_counter_ns() - start))
+
+    @contextmanager
+    def phase(self, name):
+        """Context manager measuring the duration of a startup phase.
+
+        Args:
+            name (str): Name of the phase.
+        """
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            if self.enabled:
+                self.phases.append((name, time.perf_counter_ns() - start))
+
+    def mark(self, name):
+        """Records the time since the start of the application.
+
+        Args:
+            name (str): Name of the mark, e.g. "first frame".
+        """
+        if self.enabled:
+            self.marks.append((name, time.perf_counter_ns() - self.start_ns))
+
+    def report(self):
+        """Returns the measured imports, phases and marks as text.
+
+        Returns:
+            str: The report.
+        """
+        lines = ["eVAS startup profile", "", "Marks (time since start):"]
+        lines += [f"  {name:<30} {ns / 1e6:10.1f} ms" for name, ns in self.marks]
+        lines += ["", "Phases:"]
+        lines += [f"  {name:<30} {ns / 1e6:10.1f} ms" for name, ns in self.phases]
+        lines += ["", "Imports (slowest first):"]
+        lines += [
+            f"  {name:<30} {ns / 1e6:10.1f} ms"
+            for name, ns in sorted(self.imports, key=lambda x: -x[1])
+        ]
+        return "\n".join(lines) + "\n"
+
+    def finish(self, filename):
+        """Stops measuring imports and writes the report to a file and the console. Only reports once.
+
+        Args:
+            filename (str): Path of the report file.
+        """
+        if not self.enabled or self.reported:
+            return
+        self.reported = True
+        builtins.__import__ = self._import
+
+        report = self.report()
+        print(report)
+        with open(filename, "w") as f:
+            f.write(report)
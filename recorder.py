@@ -0,0 +1,434 @@
+"""
+Recording pipeline of the eVAS.
+
+Producers (key listener, TK thread and sampling thread) only push samples into a bounded ring buffer.
+A single writer thread formats the samples and writes them to the output file in batches,
+which keeps the disk I/O and string formatting off the input and sampling paths.
+
+The writer can sync the file to the disk after a number of samples or an interval (group commit), and
+keeps a journal file next to the recording while it is open. Recordings of sessions that ended without
+closing the file (crash, power loss) are repaired on the next start by 'recover_recordings()'.
+Optionally, each batch is compressed into an independent block (see 'compression.py').
+"""
+
+import os
+import glob
+import json
+import time
+import struct
+import logging
+import threading
+from collections import deque
+
+
+class SampleBuffer:
+    """Bounded, thread-safe ring buffer of recorded samples.
+
+    If the buffer is full, the oldest sample is overwritten and counted as an overrun.
+    """
+
+    def __init__(self, size=100000):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+        self.overruns = 0
+
+    def push(self, sample):
+        """Appends a sample to the buffer.
+
+        Args:
+            sample (tuple): The sample to append.
+        """
+        with self._lock:
+            if len(self._samples) == self._samples.maxlen:
+                self.overruns += 1
+            self._samples.append(sample)
+
+    def drain(self):
+        """Removes and returns all samples currently held by the buffer.
+
+        Returns:
+            list: The buffered samples, oldest first.
+        """
+        with self._lock:
+            samples = list(self._samples)
+            self._samples.clear()
+        return samples
+
+
+class CsvFormat:
+    """Formats samples as lines of the eVAS CSV file."""
+
+    mode = "w"
+
+    def __init__(
+        self,
+        delimiter=";",
+        decimal_point=",",
+        decimal_places=4,
+        header_lines=(),
+        columns=("values",),
+    ):
+        """
+        Args:
+            delimiter (str, optional): Delimiter of the columns. Defaults to ";".
+            decimal_point (str, optional): Decimal point of the numbers. Defaults to ",".
+            decimal_places (int, optional): Number of digits after the decimal point of the values. Defaults to 4.
+            header_lines (list, optional): Lines written before the column names, e.g. the used config. Defaults to ().
+            columns (tuple, optional): Names of the value columns, one per scale. Defaults to ("values",).
+        """
+        self.delimiter = delimiter
+        self.decimal_point = decimal_point
+        self.decimal_places = decimal_places
+        self.header_lines = list(header_lines)
+        self.columns = tuple(columns)
+        self.metadata = {}
+
+    def header(self):
+        """Returns the header of the CSV file.
+
+        Returns:
+            str: Optional header lines and metadata followed by the column names.
+        """
+        metadata = [f"# {key} = {value}\n" for key, value in self.metadata.items()]
+        return (
+            "".join(self.header_lines)
+            + "".join(metadata)
+            + self.delimiter.join(("secs",) + self.columns)
+            + "\n"
+        )
+
+    def format(self, samples):
+        """Formats a batch of samples.
+
+        Args:
+            samples (list): List of (nanoseconds since start, value) tuples. With multiple columns, the value is a tuple.
+
+        Returns:
+            str: One CSV line per sample.
+        """
+        lines = []
+        for ns, value in samples:
+            values = value if isinstance(value, tuple) else (value,)
+            numbers = [str(round(ns / 1e9, 2))] + [
+                str(round(v, self.decimal_places)) for v in values
+            ]
+            if self.decimal_point != ".":
+                numbers = [n.replace(".", self.decimal_point) for n in numbers]
+            lines.append(self.delimiter.join(numbers) + "\n")
+        return "".join(lines)
+
+
+# binary recordings: magic, format version and length of the JSON header, followed by the header and the records
+BINARY_MAGIC = b"eVAS"
+BINARY_VERSION = 1
+BINARY_PREFIX = struct.Struct("<4sHxxI")
+# each record: int64 nanoseconds since start and float64 value
+BINARY_RECORD = struct.Struct("<qd")
+
+
+def binary_record(columns=1):
+    """Returns the struct of a binary record.
+
+    Args:
+        columns (int, optional): Number of value columns. Defaults to 1.
+
+    Returns:
+        struct.Struct: int64 nanoseconds since start followed by one float64 per column.
+    """
+    if columns == 1:
+        return BINARY_RECORD
+    return struct.Struct("<q" + "d" * columns)
+
+
+class BinaryFormat:
+    """Formats samples as fixed-width binary records.
+
+    The file starts with a small JSON header (config, CSV options and metadata such as the clock anchor),
+    padded so the records are aligned to the record size and the file can be memory-mapped directly.
+    Use 'export_csv.py' to convert a binary recording to the CSV layout.
+    """
+
+    mode = "wb"
+
+    def __init__(self, config_text="", csv_options=None, columns=("values",)):
+        """
+        Args:
+            config_text (str, optional): Content of the used config file. Defaults to "".
+            csv_options (dict, optional): Options used to convert the recording to CSV. Defaults to None.
+            columns (tuple, optional): Names of the value columns, one per scale. Defaults to ("values",).
+        """
+        self.config_text = config_text
+        self.csv_options = csv_options or {}
+        self.columns = tuple(columns)
+        self.record = binary_record(len(self.columns))
+        self.metadata = {}
+
+    def header(self):
+        """Returns the header of the binary file.
+
+        Returns:
+            bytes: Prefix and padded JSON header.
+        """
+        header = json.dumps(
+            {
+                "config": self.config_text,
+                "csv": self.csv_options,
+                "columns": self.columns,
+                "metadata": self.metadata,
+            }
+        ).encode("utf-8")
+        # pad the header with spaces so the records start aligned
+        size = BINARY_PREFIX.size + len(header)
+        header += b" " * (-size % BINARY_RECORD.size)
+        return BINARY_PREFIX.pack(BINARY_MAGIC, BINARY_VERSION, len(header)) + header
+
+    def format(self, samples):
+        """Formats a batch of samples.
+
+        Args:
+            samples (list): List of (nanoseconds since start, value) tuples. With multiple columns, the value is a tuple.
+
+        Returns:
+            bytes: One packed record per sample.
+        """
+        pack = self.record.pack
+        if len(self.columns) == 1:
+            return b"".join([pack(ns, value) for ns, value in samples])
+        return b"".join([pack(ns, *values) for ns, values in samples])
+
+
+class RecordingWriter(threading.Thread):
+    """Background thread that writes buffered samples to the recording file in batches."""
+
+    def __init__(
+        self,
+        filename,
+        sample_format,
+        flush_interval=0.5,
+        buffer_size=100000,
+        on_write=None,
+        fsync_interval=None,
+        fsync_samples=None,
+        journal=False,
+        codec=None,
+    ):
+        """
+        Args:
+            filename (str): Path of the output file.
+            sample_format (CsvFormat or BinaryFormat): Format used to write the header and samples.
+            flush_interval (float, optional): Interval in seconds in which samples are written. Defaults to 0.5.
+            buffer_size (int, optional): Maximum number of samples held in memory. Defaults to 100000.
+            on_write (function, optional): Called with each batch of samples after it was written. Defaults to None.
+            fsync_interval (float, optional): Interval in seconds after which written samples are synced to the disk.
+                0 to sync every write, None to leave it to the operating system. Defaults to None.
+            fsync_samples (int, optional): Number of written samples after which they are synced to the disk. Defaults to None.
+            journal (bool, optional): Whether to keep a journal file while the recording is open. Defaults to False.
+            codec (str, optional): Name of the codec to compress the file with. None to not compress. Defaults to None.
+        """
+        super().__init__(name="RecordingWriter", daemon=True)
+        self.filename = filename
+        self.sample_format = sample_format
+        self.flush_interval = flush_interval
+        self.buffer = SampleBuffer(size=buffer_size)
+        self.on_write = on_write
+        self.fsync_interval = fsync_interval
+        self.fsync_samples = fsync_samples
+        self.journal_path = filename + JOURNAL_EXTENSION if journal else None
+        self.codec = codec
+        self.samples_written = 0
+        self.syncs = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+        self._file = None
+        self._closed = False
+        self._write_lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+    def add_metadata(self, metadata):
+        """Adds metadata to the header of the file. Only has an effect before the first samples are written.
+
+        Args:
+            metadata (dict): Metadata to add.
+        """
+        with self._write_lock:
+            if self._file is not None:
+                logging.warning(
+                    f"Metadata added after the header was written: {metadata}"
+                )
+                return
+            self.sample_format.metadata.update(metadata)
+
+    def push(self, ns, value):
+        """Adds a sample to the recording. Safe to call from any thread.
+
+        Args:
+            ns (int): Nanoseconds since the start of the recording.
+            value (float): The slider value.
+        """
+        self.buffer.push((ns, value))
+
+    def run(self):
+        while not self._stop_event.wait(self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        """Writes all buffered samples to the file. The header is written together with the first samples."""
+        with self._write_lock:
+            samples = self.buffer.drain()
+            if not samples or self._closed:
+                return
+
+            if self._file is None:
+                self.write_journal()
+                if self.codec is None:
+                    self._file = open(self.filename, self.sample_format.mode)
+                else:
+                    from compression import CompressedWriter
+
+                    self._file = CompressedWriter(
+                        self.filename,
+                        self.codec,
+                        text=self.sample_format.mode == "w",
+                    )
+                self._file.write(self.sample_format.header())
+            self._file.write(self.sample_format.format(samples))
+            self._file.flush()
+            self.samples_written += len(samples)
+            self._unsynced += len(samples)
+            if self.is_sync_due():
+                self.sync()
+
+        if self.on_write is not None:
+            self.on_write(samples)
+
+    def is_syncing(self):
+        """Returns whether the written samples are synced to the disk.
+
+        Returns:
+            bool: Whether a sync policy is configured.
+        """
+        return self.fsync_interval is not None or self.fsync_samples is not None
+
+    def is_sync_due(self):
+        """Returns whether the written samples should be synced to the disk now.
+
+        Returns:
+            bool: Whether a sync is due according to the interval or number of samples.
+        """
+        if self.fsync_samples is not None and self._unsynced >= self.fsync_samples:
+            return True
+        return (
+            self.fsync_interval is not None
+            and time.monotonic() - self._last_sync >= self.fsync_interval
+        )
+
+    def sync(self):
+        """Syncs the written samples to the disk. All samples written since the last sync are committed at once."""
+        os.fsync(self._file.fileno())
+        self.syncs += 1
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def write_journal(self):
+        """Marks the recording as open, so it is repaired on the next start if it is not closed."""
+        if self.journal_path is None:
+            return
+        with open(self.journal_path, "w") as f:
+            json.dump({"filename": os.path.basename(self.filename)}, f)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def close(self):
+        """Stops the writer thread, writes the remaining samples and closes the file. Can be called multiple times."""
+        self._stop_event.set()
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join()
+        self.flush()
+
+        with self._write_lock:
+            self._closed = True
+            if self._file is not None:
+                if self._unsynced and self.is_syncing():
+                    self.sync()
+                self._file.close()
+            # the recording is complete
+            if self.journal_path is not None and os.path.isfile(self.journal_path):
+                os.remove(self.journal_path)
+
+        if self.buffer.overruns:
+            logging.warning(
+                f"Recording buffer overrun: {self.buffer.overruns} samples were dropped."
+            )
+
+
+# journal file kept next to a recording while it is open
+JOURNAL_EXTENSION = ".journal"
+
+
+def incomplete_tail(path):
+    """Returns the size of the incomplete record at the end of a recording.
+
+    Args:
+        path (str): Path of the CSV, binary or compressed recording.
+
+    Returns:
+        int: Number of bytes of the incomplete last record, line or block.
+    """
+    from compression import complete_size, is_compressed
+
+    size = os.path.getsize(path)
+    if is_compressed(path):
+        # compressed files end with the last complete block
+        return size - complete_size(path)
+
+    with open(path, "rb") as f:
+        prefix = f.read(BINARY_PREFIX.size)
+
+        if prefix[: len(BINARY_MAGIC)] == BINARY_MAGIC:
+            if len(prefix) < BINARY_PREFIX.size:
+                return size
+            _, _, header_size = BINARY_PREFIX.unpack(prefix)
+            try:
+                header = json.loads(f.read(header_size).decode("utf-8"))
+            except ValueError:
+                # the header itself is incomplete
+                return size
+            record = binary_record(len(header.get("columns", ["values"])))
+            return (size - BINARY_PREFIX.size - header_size) % record.size
+
+        # CSV lines end with a line break, only the end of the file is read
+        f.seek(max(size - 65536, 0))
+        tail = f.read()
+        return len(tail) - (tail.rfind(b"\n") + 1)
+
+
+def recover_recordings(directory):
+    """Repairs recordings of sessions that ended without closing the file, e.g. after a crash or a power loss.
+    Incomplete records at the end of these recordings are removed, the journals of complete recordings are
+    only deleted.
+
+    Args:
+        directory (str): Directory of the recordings.
+
+    Returns:
+        list: Paths of the recordings that were truncated.
+    """
+    recovered = []
+    for journal_path in glob.glob(os.path.join(directory, "*" + JOURNAL_EXTENSION)):
+        path = journal_path[: -len(JOURNAL_EXTENSION)]
+        try:
+            if os.path.isfile(path):
+                tail = incomplete_tail(path)
+                if tail:
+                    with open(path, "r+b") as f:
+                        f.truncate(os.path.getsize(path) - tail)
+                        os.fsync(f.fileno())
+                    logging.warning(
+                        f"Removed {tail} bytes of an incomplete record from '{path}'."
+                    )
+                    recovered.append(path)
+            os.remove(journal_path)
+        except OSError as e:
+            logging.exception(e)
+    return recovered
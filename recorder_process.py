@@ -0,0 +1,214 @@
+"""
+Recorder of the eVAS in a separate process.
+
+If 'recorder_process' is enabled, the sampling clock, the recording writer and the network stream run in their own
+process, so image resizes, cursor warping or garbage collection of the GUI process do not delay the samples.
+The GUI process only sends the start of the recording and every change of the values through a pipe.
+
+'RecorderProcess' is used by the GUI process in place of the 'RecordingWriter'.
+"""
+
+import logging
+import threading
+import multiprocessing
+
+from recorder import RecordingWriter
+from timing import SamplingScheduler, now_ns
+from live_stream import SampleStream
+from session_index import SessionStats
+
+
+class RecorderProcess:
+    """Runs the recorder in a separate process and passes the values of the GUI process on to it."""
+
+    def __init__(
+        self,
+        writer_options,
+        columns,
+        sampling_rate,
+        spin_time,
+        only_on_change,
+        stream_options=None,
+        tuning=None,
+    ):
+        """
+        Args:
+            writer_options (dict): Arguments of the 'RecordingWriter', except 'on_write'.
+            columns (list): Names of the value columns, one per scale.
+            sampling_rate (float): Interval in seconds between two samples.
+            spin_time (float): Time in seconds before each sample that is spent busy-waiting.
+            only_on_change (bool): Whether values are only saved on change, as sent by the GUI process.
+            stream_options (dict, optional): Arguments of the 'SampleStream' or None to not stream. Defaults to None.
+            tuning (RuntimeTuning, optional): Garbage collection, priority and CPU affinity applied by the recorder
+                process during the recording. Defaults to None.
+        """
+        self.filename = writer_options["filename"]
+        self.samples_written = 0
+        self.session_stats = SessionStats(columns)
+        self._connection, child_connection = multiprocessing.Pipe()
+        self._send_lock = threading.Lock()
+        self._closed = False
+        self.process = multiprocessing.Process(
+            target=run_recorder,
+            args=(
+                child_connection,
+                writer_options,
+                columns,
+                sampling_rate,
+                spin_time,
+                only_on_change,
+                stream_options,
+                tuning,
+            ),
+            name="Recorder",
+            daemon=True,
+        )
+
+    def send(self, *message):
+        # messages are sent from the key listener, TK and mouse threads
+        with self._send_lock:
+            if not self._closed:
+                self._connection.send(message)
+
+    def start(self):
+        self.process.start()
+
+    def add_metadata(self, metadata):
+        """Adds metadata to the header of the file.
+
+        Args:
+            metadata (dict): Metadata to add.
+        """
+        self.send("metadata", metadata)
+
+    def start_recording(self, clock_anchor, value):
+        """Starts the sampling of the recorder on the clock of the recording.
+
+        Args:
+            clock_anchor (ClockAnchor): The anchor of the recording.
+            value (float or tuple): The start value(s).
+        """
+        self.send("start", clock_anchor, value)
+
+    def set_value(self, event_ns, value):
+        """Passes a changed value on, which is sampled by the recorder.
+
+        Args:
+            event_ns (int): Monotonic time of the causing event in nanoseconds.
+            value (float or tuple): The value, a tuple for multiple scales.
+        """
+        self.send("value", value)
+
+    def push(self, ns, value):
+        """Passes a sample on, if values are only saved on change.
+
+        Args:
+            ns (int): Nanoseconds since the start of the recording.
+            value (float or tuple): The value, a tuple for multiple scales.
+        """
+        self.send("sample", ns, value)
+
+    def close(self):
+        """Ends the recording and waits until the recorder has written all samples. Can be called multiple times."""
+        if self._closed:
+            return
+        self.send("close")
+        with self._send_lock:
+            self._closed = True
+        try:
+            self.samples_written, self.session_stats = self._connection.recv()
+        except EOFError:
+            logging.error("The recorder process ended unexpectedly.")
+        self.process.join(timeout=5)
+        self._connection.close()
+
+
+def run_recorder(
+    connection,
+    writer_options,
+    columns,
+    sampling_rate,
+    spin_time,
+    only_on_change,
+    stream_options,
+    tuning=None,
+):
+    """Main function of the recorder process: samples and writes the values sent by the GUI process.
+
+    Args:
+        connection (Connection): Pipe to the GUI process.
+        writer_options (dict): Arguments of the 'RecordingWriter', except 'on_write'.
+        columns (list): Names of the value columns, one per scale.
+        sampling_rate (float): Interval in seconds between two samples.
+        spin_time (float): Time in seconds before each sample that is spent busy-waiting.
+        only_on_change (bool): Whether values are only saved on change.
+        stream_options (dict): Arguments of the 'SampleStream' or None to not stream.
+        tuning (RuntimeTuning, optional): Garbage collection, priority and CPU affinity. Defaults to None.
+    """
+    session_stats = SessionStats(columns)
+    writer = RecordingWriter(**writer_options, on_write=session_stats.update)
+    stream = SampleStream(**stream_options) if stream_options is not None else None
+    state = {"value": None, "start_ns": None, "running": True}
+
+    def record(ns, value):
+        writer.push(ns, value)
+        if stream is not None:
+            stream.push(ns, value)
+
+    def run_sampling():
+        if tuning is not None:
+            tuning.tune_sampling_thread()
+        scheduler = SamplingScheduler(interval=sampling_rate, spin_time=spin_time)
+        scheduler.run(
+            function=lambda: record(now_ns() - state["start_ns"], state["value"]),
+            is_running=lambda: state["running"],
+            start_ns=state["start_ns"],
+        )
+
+    writer.start()
+    if tuning is not None:
+        tuning.tune_writer_thread(writer)
+    if stream is not None:
+        stream.start()
+    sampling_thread = None
+    try:
+        while True:
+            message = connection.recv()
+            kind = message[0]
+            if kind == "value":
+                state["value"] = message[1]
+            elif kind == "sample":
+                record(message[1], message[2])
+            elif kind == "metadata":
+                writer.add_metadata(message[1])
+            elif kind == "start":
+                clock_anchor, state["value"] = message[1], message[2]
+                state["start_ns"] = clock_anchor.monotonic_ns
+                if tuning is not None:
+                    tuning.apply()
+                if stream is not None:
+                    stream.start_recording(clock_anchor)
+                if not only_on_change:
+                    sampling_thread = threading.Thread(
+                        target=run_sampling, name="Sampling"
+                    )
+                    sampling_thread.start()
+            elif kind == "close":
+                break
+    except EOFError:
+        # the GUI process ended without closing the recorder, the samples so far are kept
+        pass
+    finally:
+        state["running"] = False
+        if sampling_thread is not None:
+            sampling_thread.join()
+        writer.close()
+        if stream is not None:
+            stream.close()
+        if tuning is not None:
+            tuning.restore()
+        try:
+            connection.send((writer.samples_written, session_stats))
+        except OSError:
+            pass
+        connection.close()
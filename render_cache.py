@@ -0,0 +1,61 @@
+"""
+Render cache of the eVAS.
+
+Keeps decoded source images and resized TK images, so resizing the window does not
+decode and resize the same images again.
+"""
+
+from collections import OrderedDict
+
+import PIL.Image, PIL.ImageTk
+
+
+class RenderCache:
+    """Cache for decoded source images and resized 'PhotoImage's."""
+
+    def __init__(self, max_images=16):
+        """
+        Args:
+            max_images (int, optional): Maximum number of resized images kept. Defaults to 16.
+        """
+        self.max_images = max_images
+        self._sources = {}
+        self._images = OrderedDict()
+
+    def source_image(self, pattern, find_path):
+        """Returns the decoded image for the given file pattern. The file is only searched and decoded once.
+
+        Args:
+            pattern (str): Pattern of the image file, e.g. "image.*".
+            find_path (function): Function returning the path of the image for the pattern.
+
+        Returns:
+            PIL.Image.Image: The decoded image.
+        """
+        if pattern not in self._sources:
+            image = PIL.Image.open(find_path(pattern))
+            image.load()
+            self._sources[pattern] = image
+        return self._sources[pattern]
+
+    def photo_image(self, key, create_image, master):
+        """Returns the TK image for the given key. The image is only created if it is not cached.
+
+        Args:
+            key (tuple): Key of the image, e.g. the layer name, size and appearance config.
+            create_image (function): Function returning the 'PIL.Image.Image' to show.
+            master (tk.Widget): Master of the created 'PhotoImage'.
+
+        Returns:
+            PIL.ImageTk.PhotoImage: The TK image.
+        """
+        if key in self._images:
+            self._images.move_to_end(key)
+            return self._images[key]
+
+        image = PIL.ImageTk.PhotoImage(create_image(), master=master)
+        self._images[key] = image
+        # drop the least recently used images, images shown are still referenced by their widgets
+        while len(self._images) > self.max_images:
+            self._images.popitem(last=False)
+        return image
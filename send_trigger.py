@@ -1,34 +1,45 @@
+import json
+import time
+
+
 def get_com(root):
     """Function to find the COM of the 'QST.LAB TCS2' device.
 
-    First looks for it automatically, if not found ask for the user to define the port.
+    Looks for it automatically, if not found ask for the user to define the port.
+
+    Args:
+        root (tk.Tk): Root window used to ask for the port.
 
     Returns:
         str: COM port of the 'QST.LAB TCS2' device.
     """
-    from serial.tools.list_ports_windows import comports
-    # find all com ports
-    ports = comports()
-    # filter ports for the one with "CH340" in the description title
-    ports = [x for x in ports if "CH340" in x.description]
+    from serial.tools.list_ports import comports
+
+    # find all com ports with "CH340" in the description title
+    ports = [x for x in comports() if "CH340" in x.description]
 
     # if the port was not found
     if len(ports) != 1:
         print("QST.LAB TCS2 could not be found automatically.")
 
         # create a GUI to ask for the port
-        import tkinter as tk
         from tkinter import simpledialog
+
         root.withdraw()
-        com = simpledialog.askstring(title="COM", prompt="QST.LAB TCS2 could not be found automatically. Please define COM:", parent=root)
+        com = simpledialog.askstring(
+            title="COM",
+            prompt="QST.LAB TCS2 could not be found automatically. Please define COM:",
+            parent=root,
+        )
         root.deiconify()
 
         return com
 
     # if the correct port was found, use its COM
-    com = ports[0].device 
+    com = ports[0].device
     return com
 
+
 def send_start_trigger(com, baudrate=115200):
     """Sends a trigger to the 'QST.LAB TCS2'.
 
@@ -37,9 +48,105 @@ def send_start_trigger(com, baudrate=115200):
         baudrate (int, optional): Used baudrate for the signal. Defaults to 115200.
     """
     import serial
+
     ser = serial.Serial(com, baudrate=baudrate)
-    ser.write(str.encode('H'))
+    ser.write(str.encode("H"))
+
+
+class TriggerDevice:
+    """Persistent serial connection to the 'QST.LAB TCS2'.
+
+    The port is discovered and opened once at startup, so a trigger only costs a single write.
+    The discovered port is cached in a state file and reused in the next run.
+
+    Any serial port can be used, e.g. a pty for testing:
+        master, slave = pty.openpty()
+        device = TriggerDevice(port=os.ttyname(slave))
+        device.open()
+        device.fire()
+        os.read(master, 1)  # b"H"
+    """
+
+    def __init__(self, port=None, baudrate=115200, state_path=None):
+        """
+        Args:
+            port (str, optional): Port of the device. Discovered on 'open()' if None. Defaults to None.
+            baudrate (int, optional): Used baudrate for the signal. Defaults to 115200.
+            state_path (str, optional): Path of the file caching the discovered port. Defaults to None.
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.state_path = state_path
+        self.serial = None
+
+    def read_cached_port(self):
+        """Returns the port cached in the state file.
+
+        Returns:
+            str: The cached port or None.
+        """
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)["port"]
+        except Exception:
+            return None
+
+    def write_cached_port(self):
+        """Caches the port in the state file."""
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump({"port": self.port}, f)
+        except Exception as e:
+            print(f"Could not cache trigger port: '{e}'")
+
+    def open(self, root=None):
+        """Discovers the port if needed and opens the connection.
+
+        Args:
+            root (tk.Tk, optional): Root window used to ask for the port if it cannot be found. Defaults to None.
+        """
+        import serial
+
+        if self.port is None and self.state_path:
+            # open the port of the last run directly, the ports are only scanned if it fails
+            cached_port = self.read_cached_port()
+            if cached_port is not None:
+                try:
+                    self.serial = serial.Serial(cached_port, baudrate=self.baudrate)
+                    self.port = cached_port
+                    return
+                except (serial.SerialException, OSError):
+                    pass
+
+        if self.port is None:
+            self.port = get_com(root)
+            if self.state_path and self.port is not None:
+                self.write_cached_port()
+
+        self.serial = serial.Serial(self.port, baudrate=self.baudrate)
+
+    def fire(self, event_ns=None):
+        """Sends the start trigger.
+
+        Args:
+            event_ns (int, optional): Time of the causing event of 'time.perf_counter_ns()'. Defaults to None.
+
+        Returns:
+            int: Nanoseconds from the event until the trigger was written or None if no event time was given.
+        """
+        self.serial.write(b"H")
+        self.serial.flush()
+        if event_ns is None:
+            return None
+        return time.perf_counter_ns() - event_ns
+
+    def close(self):
+        """Closes the connection."""
+        if self.serial is not None:
+            self.serial.close()
+            self.serial = None
+
 
-if __name__ == '__main__':
+if __name__ == "__main__":
     com = get_com()
-    send_start_trigger(com)
\ No newline at end of file
+    send_start_trigger(com)
@@ -0,0 +1,409 @@
+#!/usr/bin/env python3
+"""
+Session index of the eVAS.
+
+Each recording is registered in a local SQLite database ('sessions.db' next to the recordings) when it is
+closed, with one row per scale: the path, start and end time, number of samples, minimum, maximum and mean of
+the recorded values, a hash of the config and the range of the scale. The database uses write-ahead logging,
+so it can be queried while the eVAS registers a session.
+
+Existing recordings are added to the index with:
+    python session_index.py [directory]
+Only new or changed files are read again. The index can then be queried with any SQLite client or with:
+    python session_index.py [directory] --query "SELECT path, duration FROM sessions WHERE duration > 60"
+"""
+
+import os
+import ast
+import sys
+import json
+import sqlite3
+import hashlib
+import argparse
+import configparser
+from datetime import datetime, timedelta
+
+from compression import COMPRESSED_EXTENSION, open_recording
+from recorder import BINARY_MAGIC
+from export_csv import iter_records, parse_csv_header, read_header
+
+INDEX_FILE_NAME = "sessions.db"
+RECORDING_SUFFIXES = ["_vas.csv", "_vas.bin"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    path TEXT NOT NULL,
+    scale TEXT NOT NULL,
+    start TEXT,
+    end TEXT,
+    duration REAL,
+    samples INTEGER,
+    min REAL,
+    max REAL,
+    mean REAL,
+    config_hash TEXT,
+    range_min REAL,
+    range_max REAL,
+    size INTEGER,
+    mtime REAL,
+    PRIMARY KEY (path, scale)
+);
+CREATE INDEX IF NOT EXISTS sessions_start ON sessions (start);
+CREATE INDEX IF NOT EXISTS sessions_config_hash ON sessions (config_hash);
+"""
+
+
+class SessionStats:
+    """Summary of the samples of a recording, updated batch by batch by the recording writer."""
+
+    def __init__(self, columns=("values",)):
+        """
+        Args:
+            columns (tuple, optional): Names of the value columns, one per scale. Defaults to ("values",).
+        """
+        self.columns = tuple(columns)
+        self.samples = 0
+        self.first_ns = None
+        self.last_ns = None
+        self.min = [None] * len(self.columns)
+        self.max = [None] * len(self.columns)
+        self.sum = [0.0] * len(self.columns)
+
+    def update(self, samples):
+        """Adds a batch of samples.
+
+        Args:
+            samples (list): List of (nanoseconds since start, value) tuples. With multiple columns, the value is a tuple.
+        """
+        if not samples:
+            return
+        if self.first_ns is None:
+            self.first_ns = samples[0][0]
+        self.last_ns = samples[-1][0]
+        self.samples += len(samples)
+
+        if len(self.columns) == 1:
+            columns = [[value for _, value in samples]]
+        else:
+            columns = list(zip(*(values for _, values in samples)))
+        for i, values in enumerate(columns):
+            low, high = min(values), max(values)
+            self.min[i] = low if self.min[i] is None else min(self.min[i], low)
+            self.max[i] = high if self.max[i] is None else max(self.max[i], high)
+            self.sum[i] += sum(values)
+
+    def mean(self, i):
+        """Returns the mean of the recorded values of a column.
+
+        Args:
+            i (int): Index of the column.
+
+        Returns:
+            float: The mean or None if no samples were recorded.
+        """
+        return self.sum[i] / self.samples if self.samples else None
+
+
+def config_hash(config_text):
+    """Returns a hash of a config that does not depend on comments, formatting or the order of the options.
+
+    Args:
+        config_text (str): Text of the config, may be surrounded by other comment lines.
+
+    Returns:
+        str: The hash or None if there is no config.
+    """
+    config = parse_config(config_text)
+    if config is None:
+        return None
+    canonical = {
+        section: dict(sorted(config[section].items()))
+        for section in sorted(config.sections())
+    }
+    return hashlib.sha256(json.dumps(canonical).encode("utf-8")).hexdigest()[:16]
+
+
+def parse_config(config_text):
+    """Parses the text of a config.
+
+    Args:
+        config_text (str): Text of the config.
+
+    Returns:
+        ConfigParser: The config or None if the text contains no config.
+    """
+    if not config_text:
+        return None
+    config = configparser.ConfigParser(allow_no_value=True, comment_prefixes=("#",))
+    config.optionxform = str
+    try:
+        config.read_string(config_text)
+    except configparser.Error:
+        return None
+    return config if config.sections() else None
+
+
+def scale_range(config, scale):
+    """Returns the range of a scale defined in a config.
+
+    Args:
+        config (ConfigParser): The config or None.
+        scale (str): Name of the scale, 'values' for a single scale.
+
+    Returns:
+        tuple: The minimum and maximum of the scale or (None, None) if unknown.
+    """
+    if config is None:
+        return None, None
+    # the sections of multiple scales override the range of the [scale] section
+    for section in [scale, "scale"]:
+        if config.has_option(section, "range"):
+            try:
+                low, high = ast.literal_eval(config[section]["range"])
+                return float(low), float(high)
+            except (ValueError, SyntaxError, TypeError):
+                return None, None
+    return None, None
+
+
+def connect(index_path):
+    """Opens the session index and creates its table if necessary.
+
+    Args:
+        index_path (str): Path of the database.
+
+    Returns:
+        sqlite3.Connection: The connection.
+    """
+    connection = sqlite3.connect(index_path, timeout=10)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def register_session(connection, path, stats, start, config_text):
+    """Adds a recording to the session index or updates its entry.
+
+    Args:
+        connection (sqlite3.Connection): Connection to the session index.
+        path (str): Path of the recording.
+        stats (SessionStats): Summary of the samples.
+        start (datetime): Wall-clock time of the start of the recording or None if unknown.
+        config_text (str): Text of the config used for the recording or None if unknown.
+    """
+    path = os.path.abspath(path)
+    config = parse_config(config_text)
+    hash_ = config_hash(config_text)
+    file_stat = os.stat(path)
+
+    duration = None
+    if stats.samples:
+        duration = (stats.last_ns - stats.first_ns) / 1e9
+    end = None
+    if start is not None and stats.last_ns is not None:
+        end = start + timedelta(microseconds=stats.last_ns / 1e3)
+
+    rows = []
+    for i, scale in enumerate(stats.columns):
+        range_min, range_max = scale_range(config, scale)
+        rows.append(
+            (
+                path,
+                scale,
+                start.isoformat(timespec="microseconds") if start else None,
+                end.isoformat(timespec="microseconds") if end else None,
+                duration,
+                stats.samples,
+                stats.min[i],
+                stats.max[i],
+                stats.mean(i),
+                hash_,
+                range_min,
+                range_max,
+                file_stat.st_size,
+                file_stat.st_mtime,
+            )
+        )
+
+    with connection:
+        connection.execute("DELETE FROM sessions WHERE path = ?", (path,))
+        connection.executemany(
+            "INSERT INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows,
+        )
+
+
+def start_from_name(path):
+    """Returns the time encoded in the name of a recording, e.g. '20240101_120000_vas.csv'.
+
+    Args:
+        path (str): Path of the recording.
+
+    Returns:
+        datetime: The time or None if the name does not start with a time.
+    """
+    try:
+        return datetime.strptime(os.path.basename(path)[:15], "%Y%m%d_%H%M%S")
+    except ValueError:
+        return None
+
+
+def scan_recording(path):
+    """Reads the summary of a CSV, binary or compressed recording.
+
+    Args:
+        path (str): Path of the recording.
+
+    Returns:
+        tuple: The summary of the samples, the start time and the text of the config.
+    """
+    with open_recording(path) as f:
+        magic = f.read(len(BINARY_MAGIC))
+
+    if magic == BINARY_MAGIC:
+        header, _ = read_header(path)
+        stats = SessionStats(header.get("columns", ["values"]))
+        batch = []
+        for record in iter_records(path):
+            batch.append(record)
+            if len(batch) == 10000:
+                stats.update(batch)
+                batch = []
+        stats.update(batch)
+        metadata = header.get("metadata", {})
+        config_text = header.get("config")
+    else:
+        with open_recording(path, "r") as f:
+            lines = f.readlines()
+        index, columns, delimiter, decimal_point = parse_csv_header(lines)
+        stats = SessionStats(columns)
+        samples = []
+        for line in lines[index + 1 :]:
+            # a line cut off during a crash is ignored
+            if not line.endswith("\n"):
+                break
+            numbers = [
+                float(number.replace(decimal_point, "."))
+                for number in line.rstrip("\r\n").split(delimiter)
+            ]
+            value = numbers[1] if len(numbers) == 2 else tuple(numbers[1:])
+            samples.append((round(numbers[0] * 1e9), value))
+        stats.update(samples)
+
+        # metadata lines '# key = value' directly precede the column names
+        metadata = {}
+        for line in reversed(lines[:index]):
+            key, separator, value = line[2:].partition(" = ")
+            if not line.startswith("# ") or not separator:
+                break
+            metadata[key] = value.rstrip("\r\n")
+        config_text = "".join(lines[:index])
+
+    start = None
+    if "wall_clock_start" in metadata:
+        try:
+            start = datetime.fromisoformat(metadata["wall_clock_start"])
+        except ValueError:
+            pass
+    if start is None:
+        start = start_from_name(path)
+    return stats, start, config_text
+
+
+def is_recording(name):
+    """Returns whether a file name is the name of a recording.
+
+    Args:
+        name (str): The file name.
+
+    Returns:
+        bool: Whether the name ends with a suffix of a recording, optionally compressed.
+    """
+    if name.endswith(COMPRESSED_EXTENSION):
+        name = name[: -len(COMPRESSED_EXTENSION)]
+    return any(name.endswith(suffix) for suffix in RECORDING_SUFFIXES)
+
+
+def index_directory(directory, index_path=None):
+    """Adds new and changed recordings of a directory to the session index and removes deleted ones.
+
+    Args:
+        directory (str): Directory of the recordings.
+        index_path (str, optional): Path of the database. Defaults to 'sessions.db' in the directory.
+
+    Returns:
+        tuple: Number of indexed, unchanged and failed recordings.
+    """
+    directory = os.path.abspath(directory)
+    if index_path is None:
+        index_path = os.path.join(directory, INDEX_FILE_NAME)
+
+    indexed = unchanged = failed = 0
+    with connect(index_path) as connection:
+        known = {
+            path: (size, mtime)
+            for path, size, mtime in connection.execute(
+                "SELECT DISTINCT path, size, mtime FROM sessions"
+            )
+        }
+
+        for entry in sorted(os.scandir(directory), key=lambda entry: entry.name):
+            if not entry.is_file() or not is_recording(entry.name):
+                continue
+            file_stat = entry.stat()
+            if known.get(entry.path) == (file_stat.st_size, file_stat.st_mtime):
+                unchanged += 1
+                continue
+            try:
+                register_session(connection, entry.path, *scan_recording(entry.path))
+                indexed += 1
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Could not index '{entry.path}': {e}", file=sys.stderr)
+                failed += 1
+
+        # recordings that were deleted or moved
+        removed = [
+            (path,)
+            for path in known
+            if os.path.dirname(path) == directory and not os.path.isfile(path)
+        ]
+        connection.executemany("DELETE FROM sessions WHERE path = ?", removed)
+    connection.close()
+    return indexed, unchanged, failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Session index of the eVAS.")
+    parser.add_argument(
+        "directory",
+        nargs="?",
+        default=os.path.dirname(os.path.abspath(__file__)),
+        help="Directory of the recordings.",
+    )
+    parser.add_argument("--index", help="Path of the database.")
+    parser.add_argument("--query", help="SQL query to run after indexing.")
+    args = parser.parse_args()
+
+    indexed, unchanged, failed = index_directory(args.directory, args.index)
+    print(
+        f"Indexed {indexed} recordings, {unchanged} unchanged, {failed} failed.",
+        file=sys.stderr,
+    )
+
+    if args.query is not None:
+        index_path = args.index or os.path.join(args.directory, INDEX_FILE_NAME)
+        connection = sqlite3.connect(index_path)
+        try:
+            cursor = connection.execute(args.query)
+            if cursor.description is not None:
+                print(";".join(column[0] for column in cursor.description))
+            for row in cursor:
+                print(";".join("" if x is None else str(x) for x in row))
+        finally:
+            connection.close()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,963 @@
+"""
+Typed settings of the eVAS.
+
+The config file is parsed and validated once into an immutable 'Settings' object, which is passed
+to all parts of the eVAS. The settings are cached as JSON next to the config file and reused as long as
+the config file is unchanged.
+"""
+
+import os
+import json
+import enum
+import configparser
+import hashlib
+import logging
+
+
+def get_key_string(x):
+    # get string and remove "Key."
+    x = [str(i).replace("Key.", "") for i in x]
+    if len(x) == 1:
+        return x[0]
+    if len(x) == 2:
+        return x[0] + " or " + x[1]
+    if len(x) > 2:
+        x = [el if ((i + 1) == len(x)) else el + "," for i, el in enumerate(x)]
+        x.insert(len(x) - 1, "or")
+        return " ".join(x)
+
+
+class KeyName:
+    """Stand-in for a key of pynput, which can not be imported without a display.
+
+    Used to parse the settings headless, e.g. by the benchmark. Keys compare equal by their name.
+    """
+
+    def __init__(self, kind, name):
+        """
+        Args:
+            kind (str): "Key" for special keys or "KeyCode" for characters.
+            name (str): Name of the special key, e.g. "right", or the character.
+        """
+        self.kind = kind
+        self.name = name
+
+    def __eq__(self, other):
+        return isinstance(other, KeyName) and (self.kind, self.name) == (
+            other.kind,
+            other.name,
+        )
+
+    def __hash__(self):
+        return hash((self.kind, self.name))
+
+    def __repr__(self):
+        # as printed by pynput
+        return f"Key.{self.name}" if self.kind == "Key" else repr(self.name)
+
+
+class _KeyNames:
+    """Stand-in for 'pynput.keyboard.Key': 'Key.right' or 'Key["right"]'."""
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return KeyName("Key", name)
+
+    def __getitem__(self, name):
+        return KeyName("Key", name)
+
+
+class _KeyCodes:
+    """Stand-in for 'pynput.keyboard.KeyCode': 'KeyCode.from_char("a")'."""
+
+    @staticmethod
+    def from_char(char):
+        return KeyName("KeyCode", char)
+
+
+# keys used to parse the settings without pynput
+HEADLESS_KEYBOARD = {"Key": _KeyNames(), "KeyCode": _KeyCodes()}
+
+
+def pynput_keyboard():
+    """Returns the key types of pynput, used by the eVAS to compare the keys of the listener with the settings.
+
+    Returns:
+        dict: 'Key' and 'KeyCode' of pynput.
+    """
+    from pynput.keyboard import Key, KeyCode
+
+    return {"Key": Key, "KeyCode": KeyCode}
+
+
+# parsers of the raw config strings
+def literal(raw, namespace):
+    return eval(raw, namespace)
+
+
+def text(raw, namespace):
+    return raw
+
+
+def text_or_none(raw, namespace):
+    return None if raw.strip() in ["", "None"] else raw.strip()
+
+
+def integer(raw, namespace):
+    return int(eval(raw, namespace))
+
+
+def keys(raw, namespace):
+    # characters can be given as strings, e.g. 'a', as pynput passes them as 'KeyCode'
+    return tuple(
+        (
+            namespace["KeyCode"].from_char(key)
+            if isinstance(key, str) and len(key) == 1
+            else key
+        )
+        for key in eval(raw, namespace)
+    )
+
+
+# checks of the parsed values, return an error message or None
+def is_bool(value):
+    if not isinstance(value, bool):
+        return "should be True or False"
+
+
+def is_positive(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        return "should be a number larger than 0"
+
+
+def is_number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return "should be a number"
+
+
+def is_not_negative(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        return "should be a number larger or equal to 0"
+
+
+def is_positive_or_none(value):
+    if value is not None:
+        return is_positive(value)
+
+
+def is_not_negative_or_none(value):
+    if value is not None:
+        return is_not_negative(value)
+
+
+def is_color(value):
+    if (
+        not isinstance(value, tuple)
+        or len(value) != 3
+        # values outside of 0 to 255 are clipped when drawn
+        or not all(isinstance(c, int) for c in value)
+    ):
+        return "should be a color in form (R,G,B)"
+
+
+def is_color_or_none(value):
+    if value is not None:
+        return is_color(value)
+
+
+def is_range(value):
+    if type(value) != list or len(value) != 2:
+        return f"should be a list with two entries but is '{value}'"
+    if any(is_number(x) for x in value):
+        return f"should be a list of two numbers but is '{value}'"
+    if value[0] >= value[1]:
+        return (
+            "should have a first element smaller than the second value, "
+            + f"but are '{value[0]}' and '{value[1]}'"
+        )
+
+
+def is_index_or_none(value):
+    if value is not None and (
+        isinstance(value, bool) or not isinstance(value, int) or value < 0
+    ):
+        return "should be an index larger or equal to 0 or None"
+
+
+def is_names_or_none(value):
+    if value is not None and (
+        type(value) != list or not all(isinstance(name, str) for name in value)
+    ):
+        return f"should be a list of section names or None but is '{value}'"
+
+
+def is_protocol(value):
+    if value not in ["udp", "tcp"]:
+        return f"should be 'udp' or 'tcp' but is '{value}'"
+
+
+def is_mouse_backend(value):
+    if value not in ["tk", "pynput"]:
+        return f"should be 'tk' or 'pynput' but is '{value}'"
+
+
+def is_address_or_none(value):
+    if value is not None:
+        host, _, port = value.rpartition(":")
+        if not port.isdigit() or not 0 < int(port) < 65536:
+            return f"should be an address in form host:port or None but is '{value}'"
+
+
+def is_compression_or_none(value):
+    from compression import CODECS
+
+    if value is not None and value not in CODECS:
+        return f"should be one of {list(CODECS)} or None but is '{value}'"
+
+
+def is_output_format(value):
+    if value not in ["csv", "binary"]:
+        return f"should be 'csv' or 'binary' but is '{value}'"
+
+
+def is_priority_or_none(value):
+    from performance import PRIORITIES
+
+    if value is not None and value not in PRIORITIES:
+        return f"should be one of {PRIORITIES} or None but is '{value}'"
+
+
+def is_threshold_or_none(value):
+    if value is not None and (
+        type(value) != tuple
+        or not 1 <= len(value) <= 3
+        or not all(type(x) == int and x >= 0 for x in value)
+    ):
+        return f"should be a tuple of up to three thresholds larger or equal to 0 or None but is '{value}'"
+
+
+def is_cpus_or_none(value):
+    if value is not None and (
+        type(value) != list
+        or not value
+        or not all(type(cpu) == int and cpu >= 0 for cpu in value)
+    ):
+        return f"should be a list of CPU indices or None but is '{value}'"
+
+
+# name of the setting, section and option in the config, parser and check
+SPECS = [
+    ("sampling_rate", "general", "sampling_rate", literal, is_positive),
+    ("spin_time", "general", "spin_time", literal, is_not_negative),
+    ("only_on_change", "general", "only_on_change", literal, is_bool),
+    ("recorder_process", "general", "recorder_process", literal, is_bool),
+    ("use_second_screen", "general", "use_second_screen", literal, is_bool),
+    ("monitor", "general", "monitor", literal, is_index_or_none),
+    ("scales", "general", "scales", literal, is_names_or_none),
+    ("frame_rate", "general", "frame_rate", literal, is_positive_or_none),
+    (
+        "update_check_interval",
+        "general",
+        "update_check_interval",
+        literal,
+        is_not_negative_or_none,
+    ),
+    ("labels", "scale", "anchors", literal, None),
+    ("label_size", "scale", "label_size", literal, is_positive),
+    ("range", "scale", "range", literal, is_range),
+    ("start_value", "scale", "start", literal, is_number),
+    ("step_size", "scale", "step_size", literal, is_positive),
+    ("vertical_line_height", "scale", "vertical_line_height", literal, None),
+    ("numbers", "scale", "numbers", literal, is_bool),
+    ("number_size", "scale", "number_size", literal, is_positive),
+    ("trigger_thermode", "devices", "trigger_thermode", literal, is_bool),
+    ("move_while_down", "devices", "move_while_down", literal, is_bool),
+    ("use_mouse", "devices", "use_mouse", literal, is_bool),
+    ("on_click", "devices", "on_click", literal, is_bool),
+    ("mouse_rate", "devices", "mouse_rate", literal, is_positive_or_none),
+    ("mouse_backend", "devices", "mouse_backend", text, is_mouse_backend),
+    ("keys_start", "keys", "keys_start", keys, None),
+    ("keys_end", "keys", "keys_end", keys, None),
+    ("keys_left", "keys", "keys_left", keys, None),
+    ("keys_right", "keys", "keys_right", keys, None),
+    ("use_image", "appearance", "use_image", literal, is_bool),
+    ("use_upper_image", "appearance", "use_upper_image", literal, is_bool),
+    ("slider_width", "appearance", "slider_width", integer, is_positive),
+    ("slider_height", "appearance", "slider_height", integer, is_positive),
+    ("slider_color", "appearance", "slider_color", literal, is_color),
+    ("left_color", "appearance", "left_color", literal, is_color),
+    ("right_color", "appearance", "right_color", literal, is_color),
+    ("mid_color", "appearance", "mid_color", literal, is_color_or_none),
+    ("line_height", "appearance", "line_height", integer, is_positive),
+    ("use_triangle", "appearance", "use_triangle", literal, is_bool),
+    ("use_two_triangle", "appearance", "use_two_triangle", literal, is_bool),
+    ("welcome_message", "appearance", "welcome_message", literal, None),
+    ("hide_slider", "appearance", "hide_slider", literal, is_bool),
+    ("delimiter", "csv", "delimiter", text, None),
+    ("decimal_point", "csv", "decimal_point", text, None),
+    ("decimal_places", "csv", "decimal_places", integer, is_not_negative),
+    ("save_config_in_csv", "csv", "save_config_in_csv", literal, is_bool),
+    ("save_clock_anchor", "csv", "save_clock_anchor", literal, is_bool),
+    ("flush_interval", "csv", "flush_interval", literal, is_positive),
+    ("fsync_interval", "csv", "fsync_interval", literal, is_not_negative_or_none),
+    ("fsync_samples", "csv", "fsync_samples", literal, is_not_negative_or_none),
+    ("output_format", "csv", "output_format", text, is_output_format),
+    ("compression", "csv", "compression", text_or_none, is_compression_or_none),
+    ("save_latency_trace", "csv", "save_latency_trace", literal, is_bool),
+    ("save_session_index", "csv", "save_session_index", literal, is_bool),
+    ("save_frame_stats", "csv", "save_frame_stats", literal, is_bool),
+    ("stream_address", "stream", "address", text_or_none, is_address_or_none),
+    ("stream_protocol", "stream", "protocol", text, is_protocol),
+    ("stream_batch_interval", "stream", "batch_interval", literal, is_not_negative),
+    ("stream_sync_interval", "stream", "sync_interval", literal, is_positive),
+    ("live_value_file", "stream", "live_value_file", text_or_none, None),
+    ("gc_freeze", "performance", "gc_freeze", literal, is_bool),
+    ("disable_gc", "performance", "disable_gc", literal, is_bool),
+    ("gc_threshold", "performance", "gc_threshold", literal, is_threshold_or_none),
+    (
+        "process_priority",
+        "performance",
+        "process_priority",
+        text_or_none,
+        is_priority_or_none,
+    ),
+    (
+        "thread_priority",
+        "performance",
+        "thread_priority",
+        text_or_none,
+        is_priority_or_none,
+    ),
+    ("sampling_cpus", "performance", "sampling_cpus", literal, is_cpus_or_none),
+    ("writer_cpus", "performance", "writer_cpus", literal, is_cpus_or_none),
+]
+
+
+class Settings:
+    """Validated, immutable settings of the eVAS."""
+
+    __slots__ = tuple(spec[0] for spec in SPECS)
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            object.__setattr__(self, name, values[name])
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are immutable.")
+
+    def __delattr__(self, name):
+        raise AttributeError("Settings are immutable.")
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            object.__setattr__(self, name, value)
+
+    @classmethod
+    def from_config(cls, config, config_file_name="config.ini", keyboard=None):
+        """Parses and validates the given config.
+
+        Args:
+            config (ConfigParser): The config containing all entries of the default config.
+            config_file_name (str, optional): Name of the config file, used by the welcome message. Defaults to "config.ini".
+            keyboard (dict, optional): 'Key' and 'KeyCode' types the keys are parsed into, see 'pynput_keyboard()'.
+                Defaults to HEADLESS_KEYBOARD, which does not need a display.
+
+        Raises:
+            ValueError: If a setting could not be parsed or is not permitted.
+
+        Returns:
+            Settings: The settings.
+        """
+        if keyboard is None:
+            keyboard = HEADLESS_KEYBOARD
+        Key = keyboard["Key"]
+
+        values = {}
+        for name, section, option, parse, check in SPECS:
+            # the welcome message can refer to other settings as 'self'
+            namespace = {
+                "Key": Key,
+                "KeyCode": keyboard["KeyCode"],
+                "self": _Namespace(values),
+                "get_key_string": get_key_string,
+                "config_file_name": config_file_name,
+            }
+            try:
+                value = parse(config[section][option], namespace)
+            except Exception as e:
+                raise ValueError(
+                    f"Setting '{option}' in section '{section}' could not be read: '{e}'."
+                )
+            error = check(value) if check is not None else None
+            if error is not None:
+                raise ValueError(f"Setting '{option}' in section '{section}' {error}.")
+            values[name] = value
+
+            # the escape key always ends the eVAS
+            if name == "keys_end" and Key.esc not in value:
+                values[name] = value + (Key.esc,)
+
+        values["range"] = tuple(values["range"])
+        values["scales"] = scale_settings(
+            config, values["scales"], config_file_name, keyboard
+        )
+        values["welcome_message"] = "\n".join(values["welcome_message"])
+
+        start, (low, high) = values["start_value"], values["range"]
+        if start < low or start > high:
+            raise ValueError(
+                "Start value should be in-between range, "
+                + f"but is '{start}' with range '{low}' and '{high}'."
+            )
+
+        return cls(**values)
+
+
+def scale_settings(config, names, config_file_name="config.ini", keyboard=None):
+    """Parses the settings of each scale of a multi-scale config.
+
+    Each scale is defined by a section of the config, which overrides options of the other sections.
+
+    Args:
+        config (ConfigParser): The config containing all entries of the default config.
+        names (list): Names of the sections defining the scales or None.
+        config_file_name (str, optional): Name of the config file, used by the welcome message. Defaults to "config.ini".
+        keyboard (dict, optional): 'Key' and 'KeyCode' types the keys are parsed into. Defaults to None.
+
+    Raises:
+        ValueError: If a section is missing or overrides an unknown option.
+
+    Returns:
+        tuple: Pairs of the name and the 'Settings' of each scale or None if there is only one scale.
+    """
+    if not names:
+        return None
+
+    sections = {option: section for _, section, option, _, _ in SPECS}
+    scales = []
+    for name in names:
+        if not config.has_section(name):
+            raise ValueError(f"Section '{name}' of the scale '{name}' is missing.")
+
+        scale_config = configparser.ConfigParser(allow_no_value=True)
+        scale_config.optionxform = str
+        scale_config.read_dict(config)
+        # scales can not define scales themselves
+        scale_config.set("general", "scales", "None")
+        for option in config[name]:
+            if option.startswith("#"):
+                continue
+            if option not in sections or option == "scales":
+                raise ValueError(
+                    f"Option '{option}' of the scale '{name}' is not a setting."
+                )
+            scale_config.set(sections[option], option, config[name][option])
+
+        scales.append(
+            (name, Settings.from_config(scale_config, config_file_name, keyboard))
+        )
+    return tuple(scales)
+
+
+class _Namespace:
+    """Read-only attribute access to the already parsed settings."""
+
+    def __init__(self, values):
+        self._values = values
+
+    def __getattr__(self, name):
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name)
+
+
+def config_fingerprint(config_path):
+    """Returns the modification time and hash of the config file.
+
+    Args:
+        config_path (str): Path of the config file.
+
+    Returns:
+        tuple: Modification time in nanoseconds and SHA-256 hash of the content.
+    """
+    with open(config_path, "rb") as f:
+        digest = hashlib.sha256(f.read()).hexdigest()
+    return os.stat(config_path).st_mtime_ns, digest
+
+
+def encode_value(value):
+    """Converts a setting into a JSON-compatible value.
+
+    Args:
+        value: The value of a setting.
+
+    Raises:
+        TypeError: If the value can not be converted.
+
+    Returns:
+        The JSON-compatible value. Tuples, keys and nested settings are tagged to restore them.
+    """
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, list):
+        return [encode_value(x) for x in value]
+    if isinstance(value, tuple):
+        return {"tuple": [encode_value(x) for x in value]}
+    if isinstance(value, Settings):
+        return {
+            "settings": {
+                name: encode_value(getattr(value, name)) for name in value.__slots__
+            }
+        }
+    # keys of pynput or of the headless keyboard
+    if isinstance(value, enum.Enum):
+        return {"key": value.name}
+    if isinstance(value, KeyName):
+        if value.kind == "Key":
+            return {"key": value.name}
+        return {"char": value.name, "vk": None}
+    if hasattr(value, "char") and hasattr(value, "vk"):
+        return {"char": value.char, "vk": value.vk}
+    raise TypeError(f"Setting of type '{type(value).__name__}' can not be cached.")
+
+
+def decode_value(value, keyboard):
+    """Restores a setting converted by 'encode_value()'.
+
+    Args:
+        value: The JSON-compatible value.
+        keyboard (dict): 'Key' and 'KeyCode' types the keys are restored into.
+
+    Returns:
+        The value of the setting.
+    """
+    if isinstance(value, list):
+        return [decode_value(x, keyboard) for x in value]
+    if not isinstance(value, dict):
+        return value
+    if "tuple" in value:
+        return tuple(decode_value(x, keyboard) for x in value["tuple"])
+    if "settings" in value:
+        return Settings(
+            **{name: decode_value(x, keyboard) for name, x in value["settings"].items()}
+        )
+    if "key" in value:
+        return keyboard["Key"][value["key"]]
+    if value["char"] is not None:
+        return keyboard["KeyCode"].from_char(value["char"])
+    return keyboard["KeyCode"].from_vk(value["vk"])
+
+
+def read_cached_settings(config_path, cache_path, version, keyboard=None):
+    """Returns the cached settings if the config file did not change since they were cached.
+
+    Args:
+        config_path (str): Path of the config file.
+        cache_path (str): Path of the cache file.
+        version (str): Version of the application that created the cache.
+        keyboard (dict, optional): 'Key' and 'KeyCode' types the keys are restored into, see 'pynput_keyboard()'.
+            Defaults to HEADLESS_KEYBOARD.
+
+    Returns:
+        Settings: The cached settings or None.
+    """
+    try:
+        with open(cache_path, "r", encoding="utf-8") as f:
+            cached = json.load(f)
+        # the fields change with new settings, even within a version
+        if (cached["version"], cached["fields"], cached["fingerprint"]) == (
+            version,
+            list(Settings.__slots__),
+            list(config_fingerprint(config_path)),
+        ):
+            return decode_value(cached["settings"], keyboard or HEADLESS_KEYBOARD)
+    except Exception as e:
+        # missing or outdated cache
+        logging.debug(f"Settings cache not used: '{e}'.")
+    return None
+
+
+def write_cached_settings(settings, config_path, cache_path, version):
+    """Caches the settings for the current state of the config file.
+
+    Args:
+        settings (Settings): The settings to cache.
+        config_path (str): Path of the config file.
+        cache_path (str): Path of the cache file.
+        version (str): Version of the application.
+    """
+    try:
+        content = json.dumps(
+            {
+                "version": version,
+                "fields": list(Settings.__slots__),
+                "fingerprint": list(config_fingerprint(config_path)),
+                "settings": encode_value(settings),
+            }
+        )
+        with open(cache_path, "w", encoding="utf-8") as f:
+            f.write(content)
+    except Exception as e:
+        print(f"Could not cache settings: '{e}'")
+        logging.exception(e)
+
+
+def create_config():
+    """Creates the default configuration file with it default elements.
+
+    Returns:
+        ConfigParser: Default configuration.
+    """
+    config = configparser.ConfigParser(allow_no_value=True)
+
+    # preserve capital letters in config
+    config.optionxform = str
+
+    config.add_section("general")
+    config.set(
+        "general",
+        "# Sampling rate: How often should values be saved to file (in seconds).",
+    )
+    config.set("general", "sampling_rate", "0.1")
+    config.set(
+        "general",
+        "# Time in seconds before each sample in which the sampling waits actively instead of sleeping. Increases the timing precision at the cost of CPU load. Can be 0.",
+    )
+    config.set("general", "spin_time", "0.002")
+    config.set(
+        "general", "# Whether to save values only upon change. Should be: True/False"
+    )
+    config.set("general", "only_on_change", "True")
+    config.set(
+        "general",
+        "# Whether to sample and save the values in a separate process, so the drawing of the window can not delay the samples. The latency trace then only covers the input, value and frame stages. Should be: True/False",
+    )
+    config.set("general", "recorder_process", "False")
+    config.set(
+        "general",
+        "# Whether to use the second screen to show the eVAS. Should be: True/False",
+    )
+    config.set("general", "use_second_screen", "True")
+    config.set(
+        "general",
+        "# Index of the monitor to show the eVAS on. None to choose the monitor by 'use_second_screen'.",
+    )
+    config.set("general", "monitor", "None")
+    config.set(
+        "general",
+        "# Names of sections that define one scale each, e.g. ['intensity', 'unpleasantness'], or None for a single scale. "
+        + "Each section can override options of the other sections, e.g. the anchors, keys or monitor. "
+        + "All scales are started together and saved to one file with one column per scale.",
+    )
+    config.set("general", "scales", "None")
+    config.set(
+        "general",
+        "# Number of frames per second in which the slider is redrawn. The slider is only redrawn when its value changes. None to use the refresh rate of the monitor.",
+    )
+    config.set("general", "frame_rate", "None")
+    config.set(
+        "general",
+        "# Interval in hours in which to check for a new version of the eVAS. Can be 0 to check on every start or None to never check.",
+    )
+    config.set("general", "update_check_interval", "24")
+
+    config.add_section("scale")
+    config.set(
+        "scale",
+        "# Define the anchor labels of the scale. You can wrap text by placing a '\\n' in the label.",
+    )
+    config.set("scale", "anchors", "['No pain', 'Highest\\nimaginable pain']")
+    config.set("scale", "# Font size of the defined anchor labels above.")
+    config.set("scale", "label_size", "32")
+    config.set("scale", "# Define the value range")
+    config.set("scale", "range", "[0, 1]")
+    config.set("scale", "# Define the start value")
+    config.set("scale", "start", "0")
+    config.set("scale", "# Step size to move the slider whenever a key is released.")
+    config.set("scale", "step_size", "0.02")
+    config.set(
+        "scale",
+        "# Height of vertical lines for each anchor. Can be 0 to not draw any vertical lines.",
+    )
+    config.set("scale", "vertical_line_height", "0")
+    config.set(
+        "scale", "# Whether to plot numbers below the lines. Should be: True/False"
+    )
+    config.set("scale", "numbers", "False")
+    config.set("scale", "# Font size of the defined numbers below the scale.")
+    config.set("scale", "number_size", "32")
+
+    config.add_section("devices")
+    config.set(
+        "devices",
+        "# Whether to send a signal to trigger a 'QST.LAB TCS2' thermode when the eVAS is recording. Only works on Windows. Should be: True/False",
+    )
+    config.set("devices", "trigger_thermode", "False")
+    config.set(
+        "devices",
+        "# Moving the slider not only when the button is released, but also while the button is held down. Should be: True/False",
+    )
+    config.set("devices", "move_while_down", "False")
+    config.set(
+        "devices",
+        "# Whether to use the mouse (slider does not move with keys anymore). Should be: True/False",
+    )
+    config.set("devices", "use_mouse", "False")
+    config.set(
+        "devices",
+        "# Whether to update only on mouse click (only has an effect if 'use_mouse' is 'True'). Should be: True/False",
+    )
+    config.set("devices", "on_click", "False")
+    config.set(
+        "devices",
+        "# Maximum rate in Hz at which mouse movements move the slider (only has an effect if 'use_mouse' is 'True' and 'on_click' is 'False'). Movements in between are combined into the latest one, which keeps the time of its event. None to apply every movement.",
+    )
+    config.set("devices", "mouse_rate", "None")
+    config.set(
+        "devices",
+        "# How mouse input is received (only has an effect if 'use_mouse' is 'True'). 'tk' for the events of the window, 'pynput' to listen to the mouse in the background, which timestamps each movement on arrival independent of the drawing of the window.",
+    )
+    config.set("devices", "mouse_backend", "tk")
+
+    config.add_section("keys")
+    config.set("keys", "# The following section is used to defined the keys.")
+    config.set(
+        "keys",
+        "# Keys code names can be found under: 'https://pynput.readthedocs.io/en/latest/keyboard.html'",
+    )
+    config.set(
+        "keys",
+        "# Character keys can be given as strings, e.g. ['a', 'd'], or as KeyCode.from_char('a').",
+    )
+    config.set("keys", "")
+    config.set("keys", "# Keys to start the recording.")
+    config.set("keys", "keys_start", "[Key.space]")
+    config.set("keys", "# Keys to end the application.")
+    config.set("keys", "keys_end", "[Key.esc, Key.end]")
+    config.set("keys", "# Keys to move the slider left.")
+    config.set("keys", "keys_left", "[Key.left, Key.page_up]")
+    config.set("keys", "# Keys to move the slider right.")
+    config.set("keys", "keys_right", "[Key.right, Key.page_down]")
+
+    config.add_section("appearance")
+    config.set(
+        "appearance",
+        "# Whether to load an image as slider background. Image must be placed in the same directory and called 'image'. Should be: True/False",
+    )
+    config.set("appearance", "use_image", "False")
+    config.set(
+        "appearance",
+        "# Whether to load an image and place it above the slider. Image must be placed in the same directory and called 'upper_image'. Should be: True/False",
+    )
+    config.set("appearance", "use_upper_image", "False")
+    config.set("appearance", "# Width of the slider")
+    config.set("appearance", "slider_width", "31")
+    config.set("appearance", "# Height of the slider")
+    config.set("appearance", "slider_height", "138")
+    config.set(
+        "appearance",
+        "# Color of the slider. Should be in form (R,G,B). Colors can be found under: 'https://redketchup.io/color-picker'",
+    )
+    config.set("appearance", "slider_color", "(0,0,0)")
+    config.set("appearance", "# Background color left")
+    config.set("appearance", "left_color", "(192,192,192)")
+    config.set("appearance", "# Background color right")
+    config.set("appearance", "right_color", "(64,64,64)")
+    config.set(
+        "appearance", "# Background color mid. Can also be disabled with 'None'."
+    )
+    config.set("appearance", "mid_color", "None")
+    config.set("appearance", "# Height of the line the slider moves on.")
+    config.set("appearance", "line_height", "128")
+    config.set(
+        "appearance",
+        "# Use a triangle instead of a square for the background. Should be: True/False.",
+    )
+    config.set("appearance", "use_triangle", "False")
+    config.set(
+        "appearance",
+        "# Use a decreasing and an increasing triangle instead of a square for the background. Should be: True/False.",
+    )
+    config.set("appearance", "use_two_triangle", "False")
+    config.set(
+        "appearance",
+        "# Welcome message that is displayed at the beginning. Should be list of Strings. Each element of the list is separated by a line break.",
+    )
+    config.set(
+        "appearance",
+        "welcome_message",
+        '[f"Press {get_key_string(self.keys_start)} to start.", f"You can configure {config_file_name} to change the eVAS.", f"The application can be exited at any time by pressing {get_key_string(self.keys_end)}."]',
+    )
+    config.set(
+        "appearance",
+        "# Whether to hide the slider until first user interaction. Should only be used with 'use_mouse' set to 'True'. Should be: True/False.",
+    )
+    config.set("appearance", "hide_slider", "False")
+
+    config.add_section("csv")
+    config.set("csv", "# Delimiter used in the CSV output file, for example ';'.")
+    config.set("csv", "delimiter", ";")
+    config.set("csv", "# Decimal point used in the CSV output file, for example ','.")
+    config.set("csv", "decimal_point", ",")
+    config.set(
+        "csv", "# Number of digits after the decimal point for the slider values saved."
+    )
+    config.set("csv", "decimal_places", "4")
+    config.set(
+        "csv", "# Whether to save the used config at the beginning of the CSV file."
+    )
+    config.set("csv", "save_config_in_csv", "False")
+    config.set(
+        "csv",
+        "# Whether to save the wall-clock time of the start of the recording at the beginning of the CSV file. Should be: True/False",
+    )
+    config.set("csv", "save_clock_anchor", "False")
+    config.set(
+        "csv",
+        "# Interval in seconds in which the recorded values are written to the CSV file.",
+    )
+    config.set("csv", "flush_interval", "0.5")
+    config.set(
+        "csv",
+        "# Interval in seconds after which the written values are synced to the disk, so they survive a crash or power loss. 0 to sync every write, None to leave it to the operating system.",
+    )
+    config.set("csv", "fsync_interval", "None")
+    config.set(
+        "csv",
+        "# Number of written values after which they are synced to the disk. None to not sync by the number of values.",
+    )
+    config.set("csv", "fsync_samples", "None")
+    config.set(
+        "csv",
+        "# Format of the output file. Either 'csv' or 'binary'. Binary files are smaller and faster to write and can be converted to CSV with 'export_csv.py'.",
+    )
+    config.set("csv", "output_format", "csv")
+    config.set(
+        "csv",
+        "# Codec to compress the output file with while recording, e.g. 'gzip', 'zlib', 'bz2' or 'lzma'. Compressed files end with '.evz' and can be decompressed with 'compression.py'. None to not compress.",
+    )
+    config.set("csv", "compression", "None")
+    config.set(
+        "csv",
+        "# Whether to save a trace of the latency of each input event until its value is saved and shown to '<recording>_trace.bin'. Should be: True/False",
+    )
+    config.set("csv", "save_latency_trace", "False")
+    config.set(
+        "csv",
+        "# Whether to register each recording in the session index 'sessions.db' when it is closed, which can be queried with SQLite. Should be: True/False",
+    )
+    config.set("csv", "save_session_index", "False")
+    config.set(
+        "csv",
+        "# Whether to save statistics of the frame timing (frame intervals, render times and dropped frames) to '<recording>_frames.json'. Should be: True/False",
+    )
+    config.set("csv", "save_frame_stats", "False")
+
+    config.add_section("stream")
+    config.set(
+        "stream",
+        "# Address in form host:port to send the recorded values to while recording, e.g. 127.0.0.1:5005. None to not send the values.",
+    )
+    config.set("stream", "address", "None")
+    config.set("stream", "# Protocol to send the values with. Either 'udp' or 'tcp'.")
+    config.set("stream", "protocol", "udp")
+    config.set(
+        "stream",
+        "# Interval in seconds in which values are sent in batches. 0 to send each value as soon as possible.",
+    )
+    config.set("stream", "batch_interval", "0")
+    config.set(
+        "stream",
+        "# Interval in seconds in which the monotonic and wall-clock time of the eVAS are sent to synchronize the clocks.",
+    )
+    config.set("stream", "sync_interval", "1")
+    config.set(
+        "stream",
+        "# Path of a file to which the current value is published in shared memory on every change, for software on the same computer (see 'live_value.py'). Relative paths are relative to the eVAS. None to not publish the value.",
+    )
+    config.set("stream", "live_value_file", "None")
+
+    config.add_section("performance")
+    config.set(
+        "performance",
+        "# Whether to exclude all objects created before the recording from garbage collection during the recording, which shortens the pauses of the garbage collector. Should be: True/False",
+    )
+    config.set("performance", "gc_freeze", "False")
+    config.set(
+        "performance",
+        "# Whether to disable the garbage collector during the recording. Memory of reference cycles is then only freed after the recording. Should be: True/False",
+    )
+    config.set("performance", "disable_gc", "False")
+    config.set(
+        "performance",
+        "# Thresholds of the three generations of the garbage collector during the recording, e.g. (10000, 50, 100). None to keep the defaults.",
+    )
+    config.set("performance", "gc_threshold", "None")
+    config.set(
+        "performance",
+        "# Priority of the eVAS during the recording. Either 'above_normal', 'high', 'realtime' or None to keep it. Higher priorities may need administrator rights; refused settings are logged.",
+    )
+    config.set("performance", "process_priority", "None")
+    config.set(
+        "performance",
+        "# Priority of the sampling and writer threads during the recording, like 'process_priority'. Only supported on Windows and Linux.",
+    )
+    config.set("performance", "thread_priority", "None")
+    config.set(
+        "performance",
+        "# Indices of the CPU cores to run the sampling thread on, e.g. [2]. None to run it on any core. Only supported on Windows and Linux.",
+    )
+    config.set("performance", "sampling_cpus", "None")
+    config.set(
+        "performance",
+        "# Indices of the CPU cores to run the writer thread on, e.g. [3]. None to run it on any core.",
+    )
+    config.set("performance", "writer_cpus", "None")
+
+    return config
+
+
+def complete_config(config):
+    """Fills entries that are in the default configuration but missing in the given one.
+    The comments of the default configuration are added and the sections of further scales are kept.
+
+    Args:
+        config (ConfigParser): The config to complete.
+
+    Returns:
+        ConfigParser: The completed config.
+    """
+    generic_config = create_config()
+
+    # check if all elements are present
+    new_config = configparser.ConfigParser(allow_no_value=True)
+    new_config.optionxform = str
+
+    for section in generic_config:
+        if section == "DEFAULT":
+            continue
+        new_config.add_section(section)
+        for entry in generic_config[section]:
+            if len(entry) == 0:
+                continue
+            if entry.startswith("#"):
+                new_config.set(section, entry)
+                continue
+            if not config.has_option(section, entry):
+                new_config.set(section, entry, generic_config[section][entry])
+                continue
+            new_config.set(section, entry, config[section][entry])
+
+    # keep the sections defining the scales of a multi-scale config
+    for section in config.sections():
+        if not new_config.has_section(section):
+            new_config.add_section(section)
+            for entry in config[section]:
+                new_config.set(section, entry, config[section][entry])
+
+    return new_config
@@ -0,0 +1,111 @@
+"""
+Single-instance detection of the eVAS.
+
+The running instance holds an exclusive lock on a lock file in the application directory, which the
+operating system releases when the process ends. The running instance also listens on a local socket,
+whose port is written to the lock file, so a second launch can hand the focus back to it.
+"""
+
+import sys
+import socket
+import logging
+import threading
+
+# the lock is placed behind the port, so other processes can still read the port on Windows
+LOCK_OFFSET = 1024
+FOCUS_MESSAGE = b"focus"
+
+
+class InstanceLock:
+    """Exclusive lock ensuring that only one instance of the eVAS is running."""
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Path of the lock file.
+        """
+        self.path = path
+        self._file = None
+        self._server = None
+
+    def acquire(self):
+        """Tries to acquire the lock without blocking.
+
+        Returns:
+            bool: Whether the lock was acquired, False if another instance holds it.
+        """
+        f = open(self.path, "a+b")
+        try:
+            if sys.platform == "win32":
+                import msvcrt
+
+                f.seek(LOCK_OFFSET)
+                msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            f.close()
+            return False
+
+        self._file = f
+        return True
+
+    def listen_for_focus(self, on_focus):
+        """Listens for focus requests of other instances on a local socket.
+
+        Args:
+            on_focus (function): Function called when another instance requests the focus.
+        """
+        self._server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._server.bind(("127.0.0.1", 0))
+        self._server.listen()
+
+        # write the port to the start of the lock file
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(self._server.getsockname()[1]).encode("ascii"))
+        self._file.flush()
+
+        def serve():
+            while True:
+                try:
+                    connection, _ = self._server.accept()
+                except OSError:
+                    return
+                with connection:
+                    connection.settimeout(1)
+                    try:
+                        if connection.recv(len(FOCUS_MESSAGE)) == FOCUS_MESSAGE:
+                            on_focus()
+                    except OSError as e:
+                        logging.exception(e)
+
+        threading.Thread(target=serve, name="FocusListener", daemon=True).start()
+
+    def request_focus(self):
+        """Asks the running instance to bring its window to the front.
+
+        Returns:
+            bool: Whether the request was sent.
+        """
+        try:
+            with open(self.path, "r") as f:
+                port = int(f.read(16).strip())
+            with socket.create_connection(("127.0.0.1", port), timeout=1) as connection:
+                connection.sendall(FOCUS_MESSAGE)
+            return True
+        except (OSError, ValueError) as e:
+            print(f"Could not hand the focus to the running instance: '{e}'")
+            return False
+
+    def release(self):
+        """Releases the lock and stops listening for focus requests."""
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+        if self._file is not None:
+            # closing the file releases the lock
+            self._file.close()
+            self._file = None
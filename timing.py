@@ -0,0 +1,131 @@
+"""
+Timing utilities of the eVAS.
+
+All timestamps are taken from the monotonic 'time.perf_counter_ns' clock, so wall-clock
+adjustments (e.g. by NTP) do not affect the recorded intervals.
+"""
+
+import time
+import logging
+from datetime import datetime
+
+
+def now_ns():
+    """Returns the current time of the monotonic high-resolution clock.
+
+    Returns:
+        int: Time in nanoseconds.
+    """
+    return time.perf_counter_ns()
+
+
+class ClockAnchor:
+    """Pair of a wall-clock and a monotonic timestamp taken at the same moment.
+
+    Used to map monotonic timestamps of a recording to wall-clock time.
+    """
+
+    def __init__(self):
+        self.wall_ns = time.time_ns()
+        self.monotonic_ns = now_ns()
+
+    def to_wall_ns(self, monotonic_ns):
+        """Converts a monotonic timestamp into wall-clock time.
+
+        Args:
+            monotonic_ns (int): Timestamp of the monotonic clock in nanoseconds.
+
+        Returns:
+            int: Wall-clock time in nanoseconds since the epoch.
+        """
+        return self.wall_ns + (monotonic_ns - self.monotonic_ns)
+
+    def metadata(self):
+        """Returns the anchor as metadata for the header of a recording.
+
+        Returns:
+            dict: Wall-clock time and monotonic time of the anchor.
+        """
+        wall = datetime.fromtimestamp(self.wall_ns / 1e9).isoformat(
+            timespec="microseconds"
+        )
+        return {"wall_clock_start": wall, "monotonic_start_ns": self.monotonic_ns}
+
+
+class SamplingScheduler:
+    """Calls a function at fixed intervals using absolute deadlines on the monotonic clock.
+
+    The scheduler sleeps until shortly before each deadline and busy-waits for the remaining time.
+    As deadlines are absolute, delays do not accumulate. Deadlines that could not be met are counted
+    and reported instead of being skipped silently.
+    """
+
+    # number of missed deadline events logged individually
+    max_logged_misses = 10
+
+    def __init__(self, interval, spin_time=0.002):
+        """
+        Args:
+            interval (float): Interval between two calls in seconds.
+            spin_time (float, optional): Time in seconds before each deadline that is spent busy-waiting
+                instead of sleeping. Defaults to 0.002.
+        """
+        self.interval_ns = max(int(round(interval * 1e9)), 1)
+        self.spin_ns = max(int(round(spin_time * 1e9)), 0)
+        self.missed_deadlines = 0
+        self.calls = 0
+        self._miss_events = 0
+
+    def wait_until(self, deadline_ns):
+        """Blocks until the given deadline of the monotonic clock is reached.
+
+        Args:
+            deadline_ns (int): The deadline in nanoseconds.
+        """
+        remaining = deadline_ns - now_ns()
+        if remaining > self.spin_ns:
+            time.sleep((remaining - self.spin_ns) / 1e9)
+        while now_ns() < deadline_ns:
+            pass
+
+    def run(self, function, is_running, start_ns=None):
+        """Calls the function at every deadline as long as 'is_running' returns True.
+
+        Args:
+            function (function): Function called at each deadline.
+            is_running (function): Function returning whether the scheduler should continue.
+            start_ns (int, optional): First deadline in nanoseconds. Defaults to now.
+        """
+        deadline = now_ns() if start_ns is None else start_ns
+
+        while is_running():
+            self.wait_until(deadline)
+            function()
+            self.calls += 1
+
+            deadline += self.interval_ns
+            late = now_ns() - deadline
+            if late >= 0:
+                # the next deadline has already passed, continue with the next one in the future
+                missed = late // self.interval_ns + 1
+                deadline += missed * self.interval_ns
+                self.report_miss(missed)
+
+        if self.missed_deadlines:
+            logging.warning(
+                f"Sampling missed {self.missed_deadlines} of "
+                + f"{self.calls + self.missed_deadlines} deadlines in total."
+            )
+
+    def report_miss(self, missed):
+        """Counts and logs missed deadlines.
+
+        Args:
+            missed (int): Number of deadlines missed in a row.
+        """
+        self.missed_deadlines += missed
+        self._miss_events += 1
+        if self._miss_events <= self.max_logged_misses:
+            logging.warning(
+                f"Sampling missed {missed} deadline(s) after sample {self.calls}."
+            )
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Background update check of the eVAS.
+
+The latest release is requested from GitHub in a background thread with a strict timeout.
+The result and the ETag of the response are cached in a state file, so the release information
+is only requested again after the configured interval and unchanged releases are not downloaded again.
+
+For testing, a local stand-in for the GitHub API can be started with:
+    python update_check.py 9.9.9 [port]
+and used by setting the environment variable 'EVAS_UPDATE_URL' to the printed URL.
+"""
+
+import sys
+import json
+import time
+import logging
+import threading
+
+RELEASES_URL = "https://api.github.com/repos/gouverneurp/eVAS/releases/latest"
+
+
+class UpdateChecker(threading.Thread):
+    """Checks for a new release of the eVAS in the background."""
+
+    def __init__(
+        self,
+        current_version,
+        state_path,
+        check_interval=24,
+        url=RELEASES_URL,
+        timeout=3,
+    ):
+        """
+        Args:
+            current_version (str): Version of the running application.
+            state_path (str): Path of the file caching the last result.
+            check_interval (float, optional): Minimum interval in hours between two requests. Defaults to 24.
+            url (str, optional): URL of the latest release. Defaults to RELEASES_URL.
+            timeout (float, optional): Timeout of the request in seconds. Defaults to 3.
+        """
+        super().__init__(name="UpdateChecker", daemon=True)
+        self.current_version = current_version
+        self.state_path = state_path
+        self.check_interval = check_interval
+        self.url = url
+        self.timeout = timeout
+        self.latest_version = None
+
+    def read_state(self):
+        """Reads the cached state.
+
+        Returns:
+            dict: The state with the time of the last check, the ETag and the latest version.
+        """
+        try:
+            with open(self.state_path, "r") as f:
+                return json.load(f)
+        except Exception:
+            return {}
+
+    def write_state(self, state):
+        """Writes the state to the state file.
+
+        Args:
+            state (dict): The state to write.
+        """
+        try:
+            with open(self.state_path, "w") as f:
+                json.dump(state, f)
+        except Exception as e:
+            logging.exception(e)
+
+    def run(self):
+        state = self.read_state()
+        self.latest_version = state.get("latest_version")
+
+        if time.time() - state.get("last_check", 0) < self.check_interval * 3600:
+            return
+
+        try:
+            import requests
+
+            headers = {}
+            if self.latest_version is not None and "etag" in state:
+                headers["If-None-Match"] = state["etag"]
+
+            response = requests.get(self.url, headers=headers, timeout=self.timeout)
+            # the release did not change since the last check
+            if response.status_code != 304:
+                response.raise_for_status()
+                self.latest_version = response.json()["tag_name"]
+                state["etag"] = response.headers.get("ETag")
+                state["latest_version"] = self.latest_version
+
+            state["last_check"] = time.time()
+            self.write_state(state)
+        except Exception as e:
+            print(f"Error while checking for update: '{e}'")
+            logging.exception(e)
+
+    def is_update_available(self, wait=0):
+        """Returns whether a newer release is available.
+
+        Args:
+            wait (float, optional): Maximum time in seconds to wait for the check to finish. Defaults to 0.
+
+        Returns:
+            bool: Whether a new release is available. False if the check did not finish in time.
+        """
+        self.join(timeout=wait)
+        if self.is_alive() or self.latest_version is None:
+            return False
+
+        from packaging import version
+
+        try:
+            return version.parse(self.current_version) < version.parse(
+                self.latest_version
+            )
+        except Exception as e:
+            logging.exception(e)
+            return False
+
+
+def serve_release(tag_name, port=8000):
+    """Serves a stand-in for the GitHub API of the latest release on localhost.
+
+    Args:
+        tag_name (str): Version of the served release.
+        port (int, optional): Port of the server. Defaults to 8000.
+    """
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+
+    body = json.dumps({"tag_name": tag_name}).encode("utf-8")
+    etag = f'"{tag_name}"'
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = HTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving release '{tag_name}' at http://127.0.0.1:{port}/")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(1)
+
+    serve_release(
+        tag_name=sys.argv[1], port=int(sys.argv[2]) if len(sys.argv) > 2 else 8000
+    )